@@ -0,0 +1,17 @@
+"""
+Gunicorn settings, `gunicorn -c config/gunicorn.py config.wsgi`.
+
+Every worker writes its Prometheus samples into `PROMETHEUS_MULTIPROC_DIR`, `/metrics` merges them.
+A worker sizes its database pool once the application is loaded, see `DATABASE_POOL_SIZES`.
+"""
+from prometheus_client import multiprocess
+
+
+def child_exit(server, worker):
+    multiprocess.mark_process_dead(worker.pid)
+
+
+def post_worker_init(worker):
+    from school_api.bases.backends.postgresql.base import configure_pools
+
+    configure_pools("gunicorn")
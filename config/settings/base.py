@@ -2,8 +2,10 @@
 Base settings to build other settings files upon.
 """
 from pathlib import Path
+from typing import Any
 
 import environ
+from celery.schedules import crontab
 from django.utils import timezone
 
 BASE_DIR = Path(__file__).resolve(strict=True).parent.parent.parent
@@ -54,9 +56,25 @@ DATABASES = {
     ),
 }
 DATABASES["default"]["ATOMIC_REQUESTS"] = True
+# read replicas of the primary, e.g. `DATABASE_REPLICA_URLS=postgres://replica-1/app,postgres://replica-2/app`
+DATABASE_REPLICAS = []
+for index, url in enumerate(env.list("DATABASE_REPLICA_URLS", default=[]), start=1):
+    DATABASES[f"replica_{index}"] = {**env.db_url_config(url), "TEST": {"MIRROR": "default"}}
+    DATABASE_REPLICAS.append(f"replica_{index}")
+# https://docs.djangoproject.com/en/dev/ref/settings/#database-routers
+DATABASE_ROUTERS = ["school_api.bases.routers.ReplicaRouter"]
 # https://docs.djangoproject.com/en/stable/ref/settings/#std:setting-DEFAULT_AUTO_FIELD
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# CACHES
+# ------------------------------------------------------------------------------
+# https://docs.djangoproject.com/en/dev/ref/settings/#caches
+# one alias per use, sessions, catalog pages and rate limits never evict each other
+CACHES: dict[str, dict[str, Any]] = {
+    alias: {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": alias}
+    for alias in ["default", "sessions", "catalog", "throttle"]
+}
+
 # URLS
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#root-urlconf
@@ -75,6 +93,7 @@ DJANGO_APPS = [
     "django.contrib.staticfiles",
     # "django.contrib.humanize", # Handy template tags
     "django.contrib.admin",
+    "django.contrib.postgres",
     "django.forms",
 ]
 THIRD_PARTY_APPS = [
@@ -143,6 +162,7 @@ AUTH_PASSWORD_VALIDATORS = [
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#middleware
 MIDDLEWARE = [
+    "school_api.bases.metrics.PrometheusMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
@@ -154,6 +174,8 @@ MIDDLEWARE = [
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "allauth.account.middleware.AccountMiddleware",
+    "school_api.users.middleware.APISessionGateMiddleware",
+    "school_api.bases.middleware.QueryBudgetMiddleware",
 ]
 
 # STATIC
@@ -221,6 +243,8 @@ FIXTURE_DIRS = (str(APPS_DIR / "fixtures"),)
 # ------------------------------------------------------------------------------
 # https://docs.djangoproject.com/en/dev/ref/settings/#session-cookie-httponly
 SESSION_COOKIE_HTTPONLY = True
+# https://docs.djangoproject.com/en/dev/ref/settings/#session-cache-alias
+SESSION_CACHE_ALIAS = "sessions"
 # https://docs.djangoproject.com/en/dev/ref/settings/#csrf-cookie-httponly
 CSRF_COOKIE_HTTPONLY = True
 # https://docs.djangoproject.com/en/dev/ref/settings/#x-frame-options
@@ -305,6 +329,21 @@ CELERY_BEAT_SCHEDULER = "django_celery_beat.schedulers:DatabaseScheduler"
 CELERY_WORKER_SEND_TASK_EVENTS = True
 # https://docs.celeryq.dev/en/stable/userguide/configuration.html#std-setting-task_send_sent_event
 CELERY_TASK_SEND_SENT_EVENT = True
+# https://docs.celeryq.dev/en/stable/userguide/periodic-tasks.html#beat-entries
+CELERY_BEAT_SCHEDULE = {
+    "reconcile-nearest-return-date": {
+        "task": "school_api.app_libraries.tasks.reconcile_nearest_return_date",
+        "schedule": crontab(hour=1, minute=0),
+    },
+    "send-borrow-reminders": {
+        "task": "school_api.app_libraries.tasks.send_borrow_reminders",
+        "schedule": crontab(hour=7, minute=0),
+    },
+    "archive-borrow-histories": {
+        "task": "school_api.app_libraries.tasks.archive_borrow_histories",
+        "schedule": crontab(hour=2, minute=0, day_of_week="sunday"),
+    },
+}
 # django-allauth
 # ------------------------------------------------------------------------------
 ACCOUNT_ALLOW_REGISTRATION = env.bool("DJANGO_ACCOUNT_ALLOW_REGISTRATION", True)
@@ -327,11 +366,8 @@ SOCIALACCOUNT_FORMS = {"signup": "school_api.users.forms.UserSocialSignupForm"}
 # -------------------------------------------------------------------------------
 # django-rest-framework - https://www.django-rest-framework.org/api-guide/settings/
 REST_FRAMEWORK = {
-    "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework.authentication.SessionAuthentication",
-        "rest_framework.authentication.TokenAuthentication",
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
-    ),
+    # one of the session, token and JWT authentications, picked from the `Authorization` scheme
+    "DEFAULT_AUTHENTICATION_CLASSES": ("school_api.users.authentication.AuthorizationSchemeAuthentication",),
     "TEST_REQUEST_DEFAULT_FORMAT": "json",
     "SEARCH_PARAM": "q",
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
@@ -341,6 +377,11 @@ REST_FRAMEWORK = {
         "rest_framework.filters.OrderingFilter",
         "django_filters.rest_framework.DjangoFilterBackend",
     ),
+    # counted in the `THROTTLE_CACHE_ALIAS` cache, the classes are enabled in production with `DJANGO_API_THROTTLING`
+    "DEFAULT_THROTTLE_RATES": {
+        "anon": env("DJANGO_THROTTLE_ANON_RATE", default="60/minute"),
+        "user": env("DJANGO_THROTTLE_USER_RATE", default="600/minute"),
+    },
 }
 
 # django-cors-headers - https://github.com/adamchainz/django-cors-headers#setup
@@ -369,4 +410,36 @@ DJOSER = {
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timezone.timedelta(hours=1),
     "REFRESH_TOKEN_LIFETIME": timezone.timedelta(days=7),
+    # role, username and active flag in the tokens, see `users.authentication.StatelessJWTAuthentication`
+    "TOKEN_OBTAIN_SERIALIZER": "school_api.users.api.serializers.auth_jwt.UserClaimsTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "school_api.users.api.serializers.auth_jwt.UserClaimsTokenRefreshSerializer",
 }
+
+# Libraries
+# ------------------------------------------------------------------------------
+# Seconds a librarian view may reuse a resolved student username -> id, 0 disables it
+LIBRARY_STUDENT_ID_CACHE_TIMEOUT = env.int("LIBRARY_STUDENT_ID_CACHE_TIMEOUT", default=0)
+
+# Throttling
+# ------------------------------------------------------------------------------
+# Cache of the request counts of `school_api.bases.throttles`
+THROTTLE_CACHE_ALIAS = "throttle"
+
+# Metrics
+# ------------------------------------------------------------------------------
+# Who may scrape `/metrics`, a bearer token or the addresses, e.g. `10.0.0.0/8`, of the Prometheus servers.
+# The addresses match `REMOTE_ADDR`, behind a reverse proxy every request has the address of the proxy.
+METRICS_TOKEN = env("DJANGO_METRICS_TOKEN", default="")
+METRICS_ALLOWED_NETWORKS = env.list("DJANGO_METRICS_ALLOWED_NETWORKS", default=[])
+
+# Database replicas
+# ------------------------------------------------------------------------------
+# Seconds the reads of a user who just wrote stay on the primary, longer than the replication lag
+REPLICA_STICKY_SECONDS = env.int("REPLICA_STICKY_SECONDS", default=5)
+
+# Query budget
+# ------------------------------------------------------------------------------
+# Raise instead of logging when a request goes over its view `query_budget` or repeats a query
+QUERY_BUDGET_STRICT = env.bool("QUERY_BUDGET_STRICT", default=False)
+# Runs of the same SQL shape in one request reported as a likely N+1
+QUERY_BUDGET_REPEAT_THRESHOLD = env.int("QUERY_BUDGET_REPEAT_THRESHOLD", default=5)
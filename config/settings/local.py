@@ -48,6 +48,10 @@ DEBUG_TOOLBAR_CONFIG = {
 # https://django-debug-toolbar.readthedocs.io/en/latest/installation.html#internal-ips
 INTERNAL_IPS = ["127.0.0.1", "10.0.2.2"]
 
+# Metrics
+# ------------------------------------------------------------------------------
+METRICS_ALLOWED_NETWORKS = ["127.0.0.1", "::1"]
+
 
 # django-extensions
 # ------------------------------------------------------------------------------
@@ -64,8 +68,6 @@ CELERY_TASK_EAGER_PROPAGATES = True
 
 # Caches
 CACHES = {
-    "default": {
-        "BACKEND": "django_redis.cache.RedisCache",
-        "LOCATION": env("CACHE_LOCATION"),
-    }
+    alias: {"BACKEND": "django_redis.cache.RedisCache", "LOCATION": env("CACHE_LOCATION"), "KEY_PREFIX": alias}
+    for alias in ["default", "sessions", "catalog", "throttle"]
 }
@@ -18,22 +18,93 @@ ALLOWED_HOSTS = env.list("DJANGO_ALLOWED_HOSTS", default=["ekoabdulaziz96@gmail.
 
 # DATABASES
 # ------------------------------------------------------------------------------
-DATABASES["default"]["CONN_MAX_AGE"] = env.int("CONN_MAX_AGE", default=60)  # noqa: F405
+# "pool": a psycopg pool per process, "pgbouncer": a pgbouncer in transaction mode in front of the database,
+# "persistent": a connection per thread kept for `CONN_MAX_AGE` seconds.
+DATABASE_POOL_MODE = env("DATABASE_POOL_MODE", default="pool")
+for database in DATABASES.values():  # noqa: F405
+    database["CONN_HEALTH_CHECKS"] = True
+    if DATABASE_POOL_MODE == "pool":
+        database["ENGINE"] = "school_api.bases.backends.postgresql"
+        database["CONN_MAX_AGE"] = 0
+        # https://www.psycopg.org/psycopg3/docs/api/pool.html#psycopg_pool.ConnectionPool
+        database.setdefault("OPTIONS", {})["pool"] = {
+            # management commands, the workers size their pool with `DATABASE_POOL_SIZES`
+            "min_size": 1,
+            "max_size": 2,
+            "timeout": env.float("DATABASE_POOL_TIMEOUT", default=10),
+            # below the idle timeout of the firewalls between the app and the database
+            "max_idle": env.float("DATABASE_POOL_MAX_IDLE", default=300),
+            "max_lifetime": env.float("DATABASE_POOL_MAX_LIFETIME", default=1800),
+        }
+    elif DATABASE_POOL_MODE == "pgbouncer":
+        # server-side cursors stay on for the export to stream its rows, pgbouncer keeps a transaction on
+        # one server connection and a `.iterator()` inside `transaction.atomic` declares its cursor
+        # `WITHOUT HOLD`, see `exports.iter_export_rows`. An `.iterator()` outside of a transaction breaks.
+        # https://docs.djangoproject.com/en/4.2/ref/databases/#transaction-pooling-server-side-cursors
+        database["CONN_MAX_AGE"] = 0
+    else:
+        database["CONN_MAX_AGE"] = env.int("CONN_MAX_AGE", default=60)
+# connections per process type, a gunicorn worker shares its pool between its threads,
+# a celery prefork child runs a task at a time
+DATABASE_POOL_SIZES = {
+    "gunicorn": {
+        "min_size": env.int("GUNICORN_DATABASE_POOL_MIN_SIZE", default=2),
+        "max_size": env.int("GUNICORN_DATABASE_POOL_MAX_SIZE", default=4),
+    },
+    "celery": {
+        "min_size": env.int("CELERY_WORKER_DATABASE_POOL_MIN_SIZE", default=1),
+        "max_size": env.int("CELERY_WORKER_DATABASE_POOL_MAX_SIZE", default=1),
+    },
+}
 
 # CACHES
 # ------------------------------------------------------------------------------
+REDIS_URL = env("REDIS_URL")
+REDIS_CACHE_OPTIONS = {
+    "CLIENT_CLASS": "django_redis.client.DefaultClient",
+    # https://github.com/redis/hiredis-py, C parsing of the replies
+    "PARSER_CLASS": "redis.connection._HiredisParser",
+    "SOCKET_CONNECT_TIMEOUT": env.float("REDIS_SOCKET_CONNECT_TIMEOUT", default=1),
+    "SOCKET_TIMEOUT": env.float("REDIS_SOCKET_TIMEOUT", default=1),
+    # one pool per process and url, shared by the aliases on the same url
+    "CONNECTION_POOL_KWARGS": {
+        "max_connections": env.int("REDIS_MAX_CONNECTIONS", default=50),
+        "retry_on_timeout": True,
+        "health_check_interval": 30,
+    },
+    # Mimicing memcache behavior.
+    # https://github.com/jazzband/django-redis#memcached-exceptions-behavior
+    "IGNORE_EXCEPTIONS": True,
+}
+# Eviction is per redis server, point the sessions to a server without `allkeys-*` eviction
+# and leave the catalog pages to one with `allkeys-lru`, for the aliases to never evict each other.
 CACHES = {
-    "default": {
+    alias: {
         "BACKEND": "django_redis.cache.RedisCache",
-        "LOCATION": env("REDIS_URL"),
-        "OPTIONS": {
-            "CLIENT_CLASS": "django_redis.client.DefaultClient",
-            # Mimicing memcache behavior.
-            # https://github.com/jazzband/django-redis#memcached-exceptions-behavior
-            "IGNORE_EXCEPTIONS": True,
-        },
+        "LOCATION": env(f"REDIS_{alias.upper()}_URL", default=REDIS_URL),
+        "KEY_PREFIX": alias,
+        "OPTIONS": REDIS_CACHE_OPTIONS,
     }
+    for alias in ["default", "sessions", "catalog", "throttle"]
 }
+# https://github.com/jazzband/django-redis#log-ignored-exceptions
+DJANGO_REDIS_LOG_IGNORED_EXCEPTIONS = True
+
+# SESSIONS
+# ------------------------------------------------------------------------------
+# https://docs.djangoproject.com/en/dev/ref/settings/#session-engine
+# read from the `sessions` cache, written through to the database,
+# `django.contrib.sessions.backends.cache` drops the database for sessions lost on eviction
+SESSION_ENGINE = env("DJANGO_SESSION_ENGINE", default="django.contrib.sessions.backends.cached_db")
+
+# THROTTLING
+# ------------------------------------------------------------------------------
+# off by default, the students and kiosks behind a school NAT share one IP address for the anon rate
+if env.bool("DJANGO_API_THROTTLING", default=False):
+    REST_FRAMEWORK["DEFAULT_THROTTLE_CLASSES"] = (  # noqa: F405
+        "school_api.bases.throttles.CachedAnonRateThrottle",
+        "school_api.bases.throttles.CachedUserRateThrottle",
+    )
 
 # SECURITY
 # ------------------------------------------------------------------------------
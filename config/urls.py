@@ -6,6 +6,8 @@ from django.views import defaults as default_views
 from django.views.generic import TemplateView
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView
 
+from school_api.bases.metrics import metrics_view
+
 # from rest_framework.authtoken.views import obtain_auth_token
 
 urlpatterns = [
@@ -16,6 +18,8 @@ urlpatterns = [
     # User management
     path("users/", include("school_api.users.urls", namespace="users")),
     path("accounts/", include("allauth.urls")),
+    # Prometheus scrape endpoint
+    path("metrics", metrics_view, name="metrics"),
     # Your stuff: custom urls includes go here
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
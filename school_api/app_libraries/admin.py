@@ -1,8 +1,15 @@
+import io
+
 from django import forms
 from django.conf import settings
-from django.contrib import admin
+from django.contrib import admin, messages
 from django.contrib.auth import decorators
+from django.core.exceptions import PermissionDenied
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
 
+from school_api.app_libraries.imports import IMPORT_FORMATS, BookImportError, import_books
 from school_api.app_libraries.models import Book
 
 if settings.DJANGO_ADMIN_FORCE_ALLAUTH:
@@ -17,10 +24,55 @@ class BookForm(forms.ModelForm):
         fields = ["title", "author", "quantity"]
 
 
+class BookImportForm(forms.Form):
+    file = forms.FileField()
+    import_format = forms.ChoiceField(choices=[(value, value.upper()) for value in IMPORT_FORMATS])
+    replace_quantity = forms.BooleanField(
+        required=False, help_text="Overwrite the stock of existing books instead of adding the imported quantity."
+    )
+
+
 class BookAdmin(admin.ModelAdmin):
     form = BookForm
     list_display = ["title", "author", "quantity", "nearest_return_date"]
     search_fields = ["title", "author"]
+    change_list_template = "admin/app_libraries/book/change_list.html"
+
+    def get_urls(self):
+        return [
+            path("import/", self.admin_site.admin_view(self.import_view), name="app_libraries_book_import"),
+        ] + super().get_urls()
+
+    def import_view(self, request):
+        if not (self.has_add_permission(request) and self.has_change_permission(request)):
+            raise PermissionDenied
+
+        form = BookImportForm(request.POST or None, request.FILES or None)
+        if request.method == "POST" and form.is_valid():
+            # the upload is decoded while it is streamed into COPY, never read whole
+            file = io.TextIOWrapper(form.cleaned_data["file"], encoding="utf-8-sig", newline="")
+            try:
+                result = import_books(file, form.cleaned_data["import_format"], form.cleaned_data["replace_quantity"])
+            except BookImportError as e:
+                self.message_user(request, f"Books not imported: {e}", messages.ERROR)
+                return redirect("admin:app_libraries_book_changelist")
+
+            self.message_user(
+                request,
+                "Imported books: {inserted} inserted, {updated} updated, {rejected} rejected.".format(**result),
+                messages.WARNING if result["rejected"] else messages.SUCCESS,
+            )
+            for error in result["errors"]:
+                self.message_user(request, error, messages.WARNING)
+            return redirect("admin:app_libraries_book_changelist")
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Import books",
+            "form": form,
+        }
+        return TemplateResponse(request, "admin/app_libraries/book/import.html", context)
 
 
 admin.site.register(Book, BookAdmin)
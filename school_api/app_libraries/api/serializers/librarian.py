@@ -1,16 +1,39 @@
+from datetime import timedelta
+
+from django.contrib.postgres.aggregates import ArrayAgg
 from django.core.exceptions import ValidationError as CoreValidationError
+from django.db.models import Count, Exists, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from rest_framework import serializers
 from rest_framework.exceptions import NotFound, ValidationError
 
 from school_api.app_libraries import settings as app_settings
 from school_api.app_libraries.api.serializers import BookSerializer
-from school_api.app_libraries.bussiness_logics.books import BookBL
+from school_api.app_libraries.bussiness_logics.books import BookBL, BookOutOfStock
+from school_api.app_libraries.bussiness_logics.students import StudentBL
+from school_api.app_libraries.metrics import record_borrow_event
 from school_api.app_libraries.models import Book, BorrowHistory
 from school_api.bases.serializers import BaseModelSerializer, BaseSerializer
 from school_api.users.models import User
 
 
+def parse_book_uuids(book_uuids):
+    """Unique requested uuids in request order, and the error of every malformed one."""
+    uuid_field = Book._meta.get_field("uuid")
+    parsed_uuids, errors = [], []
+    for book_uuid in book_uuids:
+        try:
+            book_uuid = uuid_field.to_python(book_uuid)
+        except CoreValidationError as e:
+            errors.extend(e.messages)
+            continue
+        if book_uuid not in parsed_uuids:
+            parsed_uuids.append(book_uuid)
+
+    return parsed_uuids, errors
+
+
 class ListStudentBorrowSerializer(BaseModelSerializer):
     book = BookSerializer()
 
@@ -23,19 +46,36 @@ class StudentBorrowCreationSerializer(BaseSerializer):
     book_uuids = serializers.ListField(child=serializers.CharField())
 
     def validate(self, attrs):
-        self.user_student = User.objects.filter(username=self.context["username"]).first()
+        self.user_student = self.context.get("user_student") or StudentBL().get_student(self.context["username"])
         if not self.user_student:
             raise NotFound(app_settings.MSG_STUDENT_NOT_FOUND)
 
-        current_borrow_count = self.user_student.borrow_histories.filter(is_borrowed=1).count()
-
         attrs = super().validate(attrs)
 
-        attrs["borrow_objects"] = self.get_validated_books(attrs.get("book_uuids"), current_borrow_count)
+        attrs["borrow_objects"] = self.get_validated_books(attrs.get("book_uuids"))
 
         return attrs
 
-    def get_validated_books(self, book_uuids, current_borrow_count):
+    def get_requested_books(self, book_uuids):
+        """
+        Requested books by uuid, in a single query.
+
+        Every book is annotated with whether the student already holds it and with the count
+        of active loans of the student, an unknown uuid has no entry.
+        """
+        active_borrows = BorrowHistory.objects.filter(user_student=self.user_student, is_borrowed=True)
+        current_borrow_count = active_borrows.order_by().values("user_student").annotate(count=Count("pk"))
+        book_objects = (
+            Book.objects.filter(uuid__in=book_uuids)
+            .annotate(
+                is_held=Exists(active_borrows.filter(book=OuterRef("pk"))),
+                current_borrow_count=Coalesce(Subquery(current_borrow_count.values("count")), 0),
+            )
+            .only("pk", "uuid", "title", "quantity")
+        )
+        return {book.uuid: book for book in book_objects}
+
+    def get_validated_books(self, book_uuids):
         if book_uuids is None:
             raise ValidationError({"book_uuids": serializers.Field.default_error_messages["required"]})
 
@@ -45,46 +85,164 @@ class StudentBorrowCreationSerializer(BaseSerializer):
         elif len(book_uuids) > app_settings.BORROW_MAX_BOOK:
             raise ValidationError({"book_uuids": app_settings.MSG_BORROW_INVALID_MAX_COUNT})
 
-        try:
-            book_objects = Book.objects.filter(uuid__in=book_uuids)
-        except CoreValidationError as e:
-            raise ValidationError({"book_uuids": str(e)})
+        book_uuids, errors = parse_book_uuids(book_uuids)
+        book_objects = self.get_requested_books(book_uuids) if book_uuids else {}
+
+        if not book_objects:
+            errors.append(app_settings.MSG_BORROW_INVALID_MIN_COUNT)
+
+        errors += [
+            app_settings.MSG_BORROW_INVALID_BOOK_UUID.format(book_uuid)
+            for book_uuid in book_uuids
+            if book_uuid not in book_objects
+        ]
+        errors += [
+            app_settings.MSG_BORROW_BORROWED_YET.format(book.title) for book in book_objects.values() if book.is_held
+        ]
+
+        current_borrow_count = next(iter(book_objects.values())).current_borrow_count if book_objects else 0
+        if len(book_uuids) + current_borrow_count > app_settings.BORROW_MAX_BOOK:
+            errors.append(app_settings.MSG_BORROW_INVALID_MAX_COUNT)
+
+        errors += [
+            app_settings.MSG_BORROW_INVALID_BOOK_QTY.format(book.title)
+            for book in book_objects.values()
+            if book.quantity < 1
+        ]
+        if errors:
+            raise ValidationError({"book_uuids": errors})
+
+        deadline_date = timezone.localtime().date() + timedelta(days=app_settings.BORROW_DEADLINE_DAYS)
+        return [
+            BorrowHistory(user_student=self.user_student, book=book, deadline_date=deadline_date)
+            for book in book_objects.values()
+        ]
+
+    def save(self, **kwargs):
+        borrow_history_objects = BorrowHistory.objects.bulk_create(self.validated_data["borrow_objects"])
+        result_data = {"count_borrow": len(borrow_history_objects), "student_name": self.user_student.name}
 
         try:
-            borrow_objects = self.user_student.borrow_histories.filter(
-                book__uuid__in=book_uuids, is_borrowed=True
-            ).first()
-            if borrow_objects:
-                raise ValidationError(
-                    {"book_uuids": app_settings.MSG_BORROW_BORROWED_YET.format(borrow_objects.book.title)}
-                )
-        except CoreValidationError as e:
-            raise ValidationError({"book_uuids": str(e)})
+            BookBL().sync_qty_for_borrowed_book(borrow_history_objects)
+        except BookOutOfStock as e:
+            raise ValidationError(
+                {"book_uuids": [app_settings.MSG_BORROW_INVALID_BOOK_QTY.format(title) for title in e.titles]}
+            )
+        record_borrow_event("borrow", len(borrow_history_objects))
+        return result_data
 
-        if len(book_objects) == 0:
-            raise ValidationError({"book_uuids": app_settings.MSG_BORROW_INVALID_MIN_COUNT})
 
-        elif len(book_uuids) + current_borrow_count > app_settings.BORROW_MAX_BOOK:
-            raise ValidationError({"book_uuids": app_settings.MSG_BORROW_INVALID_MAX_COUNT})
+class StudentBulkBorrowCreationSerializer(BaseSerializer):
+    """
+    Check out the same books to many students at once, e.g. the textbook set of a class.
+
+    Students and books are validated with set based queries, the stock is allocated to the
+    students in request order and a student who cannot get every book borrows none of them.
+    """
+
+    usernames = serializers.ListField(child=serializers.CharField())
+    book_uuids = serializers.ListField(child=serializers.CharField())
+
+    def validate_usernames(self, usernames):
+        if len(usernames) < 1:
+            raise ValidationError(app_settings.MSG_BORROW_BULK_INVALID_MIN_STUDENT)
+
+        elif len(usernames) > app_settings.BORROW_BULK_MAX_STUDENT:
+            raise ValidationError(app_settings.MSG_BORROW_BULK_INVALID_MAX_STUDENT)
+
+        return list(dict.fromkeys(usernames))
+
+    def validate_book_uuids(self, book_uuids):
+        if len(book_uuids) < app_settings.BORROW_MIN_BOOK:
+            raise ValidationError(app_settings.MSG_BORROW_INVALID_MIN_COUNT)
+
+        elif len(book_uuids) > app_settings.BORROW_MAX_BOOK:
+            raise ValidationError(app_settings.MSG_BORROW_INVALID_MAX_COUNT)
 
-        borrow_objects = []
-        for book in book_objects:
-            if book.quantity < 1:
-                raise ValidationError({"book_uuids": app_settings.MSG_BORROW_INVALID_BOOK_QTY.format(book.title)})
+        book_uuids, errors = parse_book_uuids(book_uuids)
+        if errors:
+            raise ValidationError(errors)
 
-            deadline_date = timezone.localtime().date() + timezone.timedelta(days=app_settings.BORROW_DEADLINE_DAYS)
-            borrow_objects.append(
-                BorrowHistory(user_student=self.user_student, book=book, deadline_date=deadline_date)
+        return book_uuids
+
+    def get_locked_books(self, book_uuids):
+        """Requested books locked in primary key order, like `BookBL.sync_qty_for_borrowed_book` does."""
+        locked_books = (
+            Book.objects.select_for_update()
+            .filter(uuid__in=book_uuids)
+            .order_by("pk")
+            .only("pk", "uuid", "title", "quantity")
+        )
+        book_objects = {book.uuid: book for book in locked_books}
+
+        unknown_uuids = [book_uuid for book_uuid in book_uuids if book_uuid not in book_objects]
+        if unknown_uuids:
+            raise ValidationError(
+                {"book_uuids": [app_settings.MSG_BORROW_INVALID_BOOK_UUID.format(uuid) for uuid in unknown_uuids]}
             )
 
-        return borrow_objects
+        return list(book_objects.values())
+
+    def get_students(self, usernames, book_objects):
+        """Students by username with their active loan count and the requested books they hold, in one query."""
+        active_borrow = Q(borrow_histories__is_borrowed=True)
+        user_students = User.objects.filter(username__in=usernames).annotate(
+            current_borrow_count=Count("borrow_histories", filter=active_borrow),
+            held_book_ids=ArrayAgg(
+                "borrow_histories__book_id",
+                filter=active_borrow & Q(borrow_histories__book__in=book_objects),
+                default=Value([]),
+            ),
+        )
+        return {user_student.username: user_student for user_student in user_students}
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+
+        book_objects = self.get_locked_books(attrs["book_uuids"])
+        user_students = self.get_students(attrs["usernames"], book_objects)
+        stock = {book.pk: book.quantity for book in book_objects}
+        deadline_date = timezone.localtime().date() + timedelta(days=app_settings.BORROW_DEADLINE_DAYS)
+
+        results, borrow_objects = [], []
+        for username in attrs["usernames"]:
+            user_student = user_students.get(username)
+            errors = self.get_student_errors(user_student, book_objects, stock)
+            results.append(
+                {"username": username, "count_borrow": 0 if errors else len(book_objects), "errors": errors}
+            )
+            if errors:
+                continue
+
+            for book in book_objects:
+                stock[book.pk] -= 1
+                borrow_objects.append(BorrowHistory(user_student=user_student, book=book, deadline_date=deadline_date))
+
+        attrs["results"], attrs["borrow_objects"] = results, borrow_objects
+        return attrs
+
+    def get_student_errors(self, user_student, book_objects, stock):
+        if not user_student:
+            return [app_settings.MSG_STUDENT_NOT_FOUND]
+
+        errors = [
+            app_settings.MSG_BORROW_BORROWED_YET.format(book.title)
+            for book in book_objects
+            if book.pk in user_student.held_book_ids
+        ]
+        if len(book_objects) + user_student.current_borrow_count > app_settings.BORROW_MAX_BOOK:
+            errors.append(app_settings.MSG_BORROW_INVALID_MAX_COUNT)
+
+        errors += [
+            app_settings.MSG_BORROW_INVALID_BOOK_QTY.format(book.title) for book in book_objects if stock[book.pk] < 1
+        ]
+        return errors
 
     def save(self, **kwargs):
         borrow_history_objects = BorrowHistory.objects.bulk_create(self.validated_data["borrow_objects"])
-        result_data = {"count_borrow": len(borrow_history_objects), "student_name": self.user_student.name}
-
         BookBL().sync_qty_for_borrowed_book(borrow_history_objects)
-        return result_data
+        record_borrow_event("borrow", len(borrow_history_objects))
+        return self.validated_data["results"]
 
 
 class StudentBorrowreturnSerializer(BaseSerializer):
@@ -93,9 +251,7 @@ class StudentBorrowreturnSerializer(BaseSerializer):
     def validate(self, attrs):
         attrs = super().validate(attrs)
 
-        attrs["borrow_histories"], attrs["borrow_history_objects"] = self.get_validated_borrow_history(
-            attrs.get("book_uuids")
-        )
+        attrs["borrow_histories"] = self.get_validated_borrow_history(attrs.get("book_uuids"))
 
         return attrs
 
@@ -109,39 +265,135 @@ class StudentBorrowreturnSerializer(BaseSerializer):
         elif len(book_uuids) > app_settings.BORROW_MAX_BOOK:
             raise ValidationError({"book_uuids": app_settings.MSG_BORROW_INVALID_MAX_COUNT})
 
+        borrow_histories = self.instance.borrow_histories
         try:
-            borrow_history_objects = self.instance.borrow_histories.filter(book__uuid__in=book_uuids).select_related(
-                "book"
+            # locked, a concurrent or retried return of the same loan waits and then finds it returned
+            borrow_history_objects = list(
+                borrow_histories.select_for_update(of=("self",))
+                .filter(is_borrowed=True, book__uuid__in=book_uuids)
+                .select_related("book")
             )
         except CoreValidationError as e:
             raise ValidationError({"book_uuids": str(e)})
 
-        if len(borrow_history_objects) == 0:
-            raise ValidationError({"book_uuids": app_settings.MSG_BORROW_INVALID_MIN_COUNT})
-
-        bulk_update_borrow = []
-        for borrow_history in borrow_history_objects:
-            if borrow_history.is_borrowed is False:
+        if len(borrow_history_objects) < len(book_uuids):
+            borrow_history_returned = (
+                borrow_histories.filter(is_borrowed=False, book__uuid__in=book_uuids)
+                .exclude(book_id__in=[borrow_history.book_id for borrow_history in borrow_history_objects])
+                .select_related("book")
+                .first()
+            )
+            if borrow_history_returned:
                 raise ValidationError(
-                    {"book_uuids": app_settings.MSG_BORROW_RETURNED_YET.format(borrow_history.book.title)}
+                    {"book_uuids": app_settings.MSG_BORROW_RETURNED_YET.format(borrow_history_returned.book.title)}
                 )
 
-            borrow_history.is_borrowed = False
-            borrow_history.deadline_date = None
-            bulk_update_borrow.append(borrow_history)
+        if len(borrow_history_objects) == 0:
+            raise ValidationError({"book_uuids": app_settings.MSG_BORROW_INVALID_MIN_COUNT})
 
-        return bulk_update_borrow, borrow_history_objects
+        return borrow_history_objects
 
     def save(self, **kwargs):
-        bulk_update_borrow = self.validated_data["borrow_histories"]
+        borrow_history_objects = self.validated_data["borrow_histories"]
 
-        count_return = BorrowHistory.objects.bulk_update(bulk_update_borrow, ["is_borrowed", "deadline_date"])
+        # the rows are locked and still borrowed, the update flips every one of them
+        count_return = BorrowHistory.objects.filter(
+            pk__in=[borrow_history.pk for borrow_history in borrow_history_objects], is_borrowed=True
+        ).update(is_borrowed=False, deadline_date=None, updated_at=timezone.now())
         result_data = {"count_borrow": count_return, "student_name": self.instance.name}
 
-        BookBL().sync_qty_for_returned_book(self.validated_data["borrow_history_objects"])
+        BookBL().sync_qty_for_returned_book(borrow_history_objects)
+        record_borrow_event("return", count_return)
         return result_data
 
 
+class StudentBulkBorrowReturnSerializer(BaseSerializer):
+    """
+    Return a pile of scanned books from many students at once.
+
+    A scan is either `{"borrow_uuid"}` or `{"username", "book_uuid"}`, every scan gets its own
+    outcome. Scans are resolved with one locking query whatever the size of the batch.
+    """
+
+    scans = serializers.ListField(child=serializers.DictField(child=serializers.CharField()))
+
+    def validate_scans(self, scans):
+        if len(scans) < 1:
+            raise ValidationError(app_settings.MSG_BORROW_INVALID_MIN_COUNT)
+
+        elif len(scans) > app_settings.BORROW_BULK_MAX_SCAN:
+            raise ValidationError(app_settings.MSG_BORROW_BULK_INVALID_MAX_SCAN)
+
+        return scans
+
+    def parse_scan(self, scan):
+        """Lookup key of a scan, `("borrow", uuid)` or `("book", username, uuid)`, or its error."""
+        uuid_field = BorrowHistory._meta.get_field("uuid")
+        try:
+            if scan.get("borrow_uuid"):
+                return ("borrow", uuid_field.to_python(scan["borrow_uuid"])), None
+            if scan.get("username") and scan.get("book_uuid"):
+                return ("book", scan["username"], uuid_field.to_python(scan["book_uuid"])), None
+        except CoreValidationError as e:
+            return None, e.messages[0]
+        return None, app_settings.MSG_BORROW_SCAN_INVALID
+
+    def get_locked_borrow_histories(self, scan_keys):
+        """Borrow histories matching any scan key, a superset narrowed in python, locked for the return."""
+        borrow_uuids = {key[1] for key in scan_keys if key[0] == "borrow"}
+        usernames = {key[1] for key in scan_keys if key[0] == "book"}
+        book_uuids = {key[2] for key in scan_keys if key[0] == "book"}
+
+        borrow_history_objects = (
+            BorrowHistory.objects.select_for_update(of=("self",))
+            .filter(
+                Q(uuid__in=borrow_uuids)
+                | Q(is_borrowed=True, user_student__username__in=usernames, book__uuid__in=book_uuids)
+            )
+            .select_related("book", "user_student")
+            .only("uuid", "is_borrowed", "book__uuid", "book__title", "user_student__username")
+        )
+
+        borrow_histories: dict[tuple, BorrowHistory] = {}
+        for borrow_history in borrow_history_objects:
+            borrow_histories[("borrow", borrow_history.uuid)] = borrow_history
+            if borrow_history.is_borrowed:
+                key = ("book", borrow_history.user_student.username, borrow_history.book.uuid)
+                borrow_histories[key] = borrow_history
+        return borrow_histories
+
+    def validate(self, attrs):
+        attrs = super().validate(attrs)
+
+        scan_keys = [self.parse_scan(scan) for scan in attrs["scans"]]
+        borrow_histories = self.get_locked_borrow_histories([key for key, error in scan_keys if key])
+
+        results, returned_histories = [], {}
+        for scan, (key, error) in zip(attrs["scans"], scan_keys):
+            borrow_history = borrow_histories.get(key) if key else None
+            if key and not borrow_history:
+                error = app_settings.MSG_BORROW_SCAN_NOT_FOUND
+            elif borrow_history and (not borrow_history.is_borrowed or borrow_history.pk in returned_histories):
+                error = app_settings.MSG_BORROW_RETURNED_YET.format(borrow_history.book.title)
+
+            if not error:
+                returned_histories[borrow_history.pk] = borrow_history
+            results.append({**scan, "is_returned": not error, "error": error})
+
+        attrs["results"], attrs["borrow_history_objects"] = results, list(returned_histories.values())
+        return attrs
+
+    def save(self, **kwargs):
+        borrow_history_objects = self.validated_data["borrow_history_objects"]
+        if borrow_history_objects:
+            BorrowHistory.objects.filter(pk__in=[borrow.pk for borrow in borrow_history_objects]).update(
+                is_borrowed=False, deadline_date=None, updated_at=timezone.now()
+            )
+            BookBL().sync_qty_for_returned_book(borrow_history_objects)
+            record_borrow_event("return", len(borrow_history_objects))
+        return self.validated_data["results"]
+
+
 class StudentBorrowExtendSerializer(BaseSerializer):
     book_uuids = serializers.ListField(child=serializers.CharField())
 
@@ -172,7 +424,7 @@ class StudentBorrowExtendSerializer(BaseSerializer):
         if len(borrow_history_objects) == 0:
             raise ValidationError({"book_uuids": app_settings.MSG_BORROW_INVALID_MIN_COUNT})
 
-        deadline_date = timezone.localtime().date() + timezone.timedelta(days=app_settings.BORROW_DEADLINE_DAYS)
+        deadline_date = timezone.localtime().date() + timedelta(days=app_settings.BORROW_DEADLINE_DAYS)
         bulk_update_borrow = []
         for borrow_history in borrow_history_objects:
             if borrow_history.count_extend >= app_settings.BORROW_EXTEND_MAX_COUNT:
@@ -182,6 +434,7 @@ class StudentBorrowExtendSerializer(BaseSerializer):
 
             borrow_history.count_extend += 1
             borrow_history.deadline_date = deadline_date
+            borrow_history.updated_at = timezone.now()
             bulk_update_borrow.append(borrow_history)
 
         return bulk_update_borrow
@@ -189,7 +442,11 @@ class StudentBorrowExtendSerializer(BaseSerializer):
     def save(self, **kwargs):
         bulk_update_borrow = self.validated_data["borrow_histories"]
 
-        count_return = BorrowHistory.objects.bulk_update(bulk_update_borrow, ["count_extend", "deadline_date"])
+        count_return = BorrowHistory.objects.bulk_update(
+            bulk_update_borrow, ["count_extend", "deadline_date", "updated_at"]
+        )
         result_data = {"count_borrow": count_return, "student_name": self.instance.name}
 
+        BookBL().sync_nearest_return_date(bulk_update_borrow)
+        record_borrow_event("extend", count_return)
         return result_data
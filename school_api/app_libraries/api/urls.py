@@ -12,6 +12,12 @@ urlpatterns = [
 
 # librarian
 urlpatterns += [
+    path("student-borrow-bulk/", librarian.StudentBulkBorrowCreate.as_view(), name="student-borrow-bulk"),
+    path(
+        "student-borrow-bulk/return",
+        librarian.StudentBulkBorrowReturn.as_view(),
+        name="student-borrow-bulk-return",
+    ),
     path("student-borrow/<str:username>/", librarian.ListStudentBorrow.as_view(), name="list-student-borrow"),
     path(
         "student-borrow/<str:username>/return", librarian.StudentBorrowReturn.as_view(), name="student-borrow-return"
@@ -24,6 +30,7 @@ urlpatterns += [
         librarian.ListStudentBorrowHistory.as_view(),
         name="list-student-borrow-history",
     ),
+    path("borrow-histories/export/", librarian.BorrowHistoryExport.as_view(), name="borrow-history-export"),
 ]
 
 # student
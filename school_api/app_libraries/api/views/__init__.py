@@ -1,15 +1,53 @@
+from django.utils.functional import cached_property
+from django.utils.http import quote_etag
+from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import generics
+from rest_framework.filters import OrderingFilter
+from rest_framework.response import Response
 
 from school_api.app_libraries.api.serializers import BookSerializer
+from school_api.app_libraries.caches import (
+    CATALOG_PRIMARY_SCOPE,
+    get_cached_catalog_page,
+    get_catalog_cache_key,
+    set_cached_catalog_page,
+)
+from school_api.app_libraries.filters import BookSearchFilter
 from school_api.app_libraries.models import Book
 from school_api.app_libraries.paginations import BookPagination
+from school_api.bases.views import ConditionalListMixin, ReplicaReadMixin, TransactionPolicyMixin
 
 
-class ListBook(generics.ListAPIView):
+class ListBook(TransactionPolicyMixin, ReplicaReadMixin, ConditionalListMixin, generics.ListAPIView):
     permission_classes = []
+    query_budget = 4
     pagination_class = BookPagination
     serializer_class = BookSerializer
-    queryset = Book.objects.all()
+    queryset = Book.objects.defer("search_vector")
+    # search runs after ordering so relevance ranking can lead the default ordering
+    filter_backends = [OrderingFilter, BookSearchFilter, DjangoFilterBackend]
     ordering = ("title",)
-    search_fields = ["title", "author", "uuid"]
     ordering_fields = ["title", "author"]
+
+    def get_primary_scopes(self, request):
+        # a page cached from a lagging replica would stay stale for the whole catalog version
+        return [CATALOG_PRIMARY_SCOPE]
+
+    @cached_property
+    def catalog_cache_key(self):
+        # pages are cached per catalog version, any book or stock change bumps the version
+        return get_catalog_cache_key(self.request, search_param=BookSearchFilter.search_param)
+
+    def get_conditional_etag(self, request):
+        # the versioned cache key already changes with any catalog write, no aggregate needed
+        return quote_etag("-".join(self.catalog_cache_key.split(":")[-2:]))
+
+    def list(self, request, *args, **kwargs):
+        data = get_cached_catalog_page(self.catalog_cache_key)
+        if data is not None:
+            return Response(data, headers={"X-Cache": "HIT"})
+
+        response = super().list(request, *args, **kwargs)
+        set_cached_catalog_page(self.catalog_cache_key, response.data)
+        response["X-Cache"] = "MISS"
+        return response
@@ -1,6 +1,6 @@
-from django.db import transaction
+from django.http import StreamingHttpResponse
 from rest_framework import generics, status
-from rest_framework.exceptions import NotFound
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
 
 from school_api.app_libraries import settings as app_settings
@@ -9,14 +9,24 @@ from school_api.app_libraries.api.serializers.librarian import (
     StudentBorrowCreationSerializer,
     StudentBorrowExtendSerializer,
     StudentBorrowreturnSerializer,
+    StudentBulkBorrowCreationSerializer,
+    StudentBulkBorrowReturnSerializer,
 )
+from school_api.app_libraries.api.views.mixins import BulkStudentMixin, StudentMixin
+from school_api.app_libraries.bussiness_logics.students import StudentBL
+from school_api.app_libraries.exports import EXPORT_FORMATS, get_export_queryset, iter_export_rows, render_export
+from school_api.app_libraries.models import BorrowHistory, CombinedBorrowHistory
 from school_api.app_libraries.paginations import BorrowPagination
-from school_api.users.models import User
+from school_api.bases.views import ConditionalListMixin, ReplicaReadMixin, TransactionPolicyMixin
 from school_api.users.permissions import IsLibrarian, IsSuperadmin
 
 
-class ListStudentBorrow(generics.ListCreateAPIView):
+class ListStudentBorrow(
+    TransactionPolicyMixin, StudentMixin, ReplicaReadMixin, ConditionalListMixin, generics.ListCreateAPIView
+):
+    conditional_timestamp_fields = ["updated_at", "book__updated_at"]
     permission_classes = [IsSuperadmin | IsLibrarian]
+    query_budget = {"GET": 6, "POST": 8}
     pagination_class = BorrowPagination
     ordering = ("created_at",)
     search_fields = ["book__title", "book__author", "book__uuid"]
@@ -27,16 +37,11 @@ class ListStudentBorrow(generics.ListCreateAPIView):
         return ListStudentBorrowSerializer
 
     def get_queryset(self):
-        user_student = User.objects.filter(username=self.kwargs["username"]).first()
-        if not user_student:
-            raise NotFound(app_settings.MSG_STUDENT_NOT_FOUND)
+        return BorrowHistory.objects.filter(user_student_id=self.student_id, is_borrowed=True).select_related("book")
 
-        return user_student.borrow_histories.filter(is_borrowed=1).select_related("book")
-
-    @transaction.atomic
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(
-            data=request.data, context={"request": request, "username": self.kwargs["username"]}
+            data=request.data, context={"request": request, "user_student": self.user_student}
         )
         serializer.is_valid(raise_exception=True)
 
@@ -45,34 +50,48 @@ class ListStudentBorrow(generics.ListCreateAPIView):
         return Response(data=message, status=status.HTTP_201_CREATED)
 
 
-class ListStudentBorrowHistory(generics.ListCreateAPIView):
+class StudentBulkBorrowCreate(TransactionPolicyMixin, BulkStudentMixin, ReplicaReadMixin, generics.CreateAPIView):
     permission_classes = [IsSuperadmin | IsLibrarian]
+    query_budget = 8
+    serializer_class = StudentBulkBorrowCreationSerializer
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = serializer.save(**kwargs)
+        students_borrowed = [result for result in results if not result["errors"]]
+        self.student_usernames = [result["username"] for result in students_borrowed]
+        message = app_settings.MSG_BORROW_BULK_SUCCESS.format(
+            sum(result["count_borrow"] for result in students_borrowed), len(students_borrowed)
+        )
+        return Response(data={"message": message, "results": results}, status=status.HTTP_201_CREATED)
+
+
+class ListStudentBorrowHistory(
+    TransactionPolicyMixin, StudentMixin, ReplicaReadMixin, ConditionalListMixin, generics.ListCreateAPIView
+):
+    conditional_timestamp_fields = ["updated_at", "book__updated_at"]
+    permission_classes = [IsSuperadmin | IsLibrarian]
+    query_budget = 6
     pagination_class = BorrowPagination
     serializer_class = ListStudentBorrowSerializer
     ordering = ("created_at",)
     search_fields = ["book__title", "book__author", "book__uuid"]
 
     def get_queryset(self):
-        user_student = User.objects.filter(username=self.kwargs["username"]).first()
-        if not user_student:
-            raise NotFound(app_settings.MSG_STUDENT_NOT_FOUND)
-
-        return user_student.borrow_histories.select_related("book")
+        return CombinedBorrowHistory.objects.filter(user_student_id=self.student_id).select_related("book")
 
 
-class StudentBorrowReturn(generics.UpdateAPIView):
+class StudentBorrowReturn(TransactionPolicyMixin, StudentMixin, ReplicaReadMixin, generics.UpdateAPIView):
     permission_classes = [IsSuperadmin | IsLibrarian]
+    query_budget = 6
     pagination_class = BorrowPagination
     serializer_class = StudentBorrowreturnSerializer
     ordering = ("created_at",)
 
-    @transaction.atomic
     def update(self, request, *args, **kwargs):
-        user_student = User.objects.filter(username=self.kwargs["username"]).first()
-        if not user_student:
-            raise NotFound(app_settings.MSG_STUDENT_NOT_FOUND)
-
-        serializer = self.get_serializer(user_student, data=request.data, context={"request": request})
+        serializer = self.get_serializer(self.user_student, data=request.data, context={"request": request})
         serializer.is_valid(raise_exception=True)
 
         result = serializer.save(**kwargs)
@@ -80,21 +99,75 @@ class StudentBorrowReturn(generics.UpdateAPIView):
         return Response(data=message, status=status.HTTP_200_OK)
 
 
-class StudentBorrowExtend(generics.UpdateAPIView):
+class StudentBulkBorrowReturn(TransactionPolicyMixin, BulkStudentMixin, ReplicaReadMixin, generics.UpdateAPIView):
+    permission_classes = [IsSuperadmin | IsLibrarian]
+    query_budget = 5
+    serializer_class = StudentBulkBorrowReturnSerializer
+
+    def update(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        results = serializer.save(**kwargs)
+        self.student_usernames = list(
+            {
+                borrow_history.user_student.username
+                for borrow_history in serializer.validated_data["borrow_history_objects"]
+            }
+        )
+        message = app_settings.MSG_BORROW_BULK_RETURN_SUCCESS.format(sum(result["is_returned"] for result in results))
+        return Response(data={"message": message, "results": results}, status=status.HTTP_200_OK)
+
+
+class StudentBorrowExtend(TransactionPolicyMixin, StudentMixin, ReplicaReadMixin, generics.UpdateAPIView):
     permission_classes = [IsSuperadmin | IsLibrarian]
+    query_budget = 6
     pagination_class = BorrowPagination
     serializer_class = StudentBorrowExtendSerializer
     ordering = ("created_at",)
 
-    @transaction.atomic
     def update(self, request, *args, **kwargs):
-        user_student = User.objects.filter(username=self.kwargs["username"]).first()
-        if not user_student:
-            raise NotFound(app_settings.MSG_STUDENT_NOT_FOUND)
-
-        serializer = self.get_serializer(user_student, data=request.data, context={"request": request})
+        serializer = self.get_serializer(self.user_student, data=request.data, context={"request": request})
         serializer.is_valid(raise_exception=True)
 
         result = serializer.save(**kwargs)
         message = app_settings.MSG_BORROW_EXTEND_SUCCESS.format(result["count_borrow"], result["student_name"])
         return Response(data=message, status=status.HTTP_200_OK)
+
+
+class BorrowHistoryExport(TransactionPolicyMixin, generics.GenericAPIView):
+    """
+    Stream every borrow history with its book and student as CSV or NDJSON.
+
+    Rows are read through a server-side cursor and written as they come, so memory stays flat
+    whatever the size of the table. Narrow the export with `username` and `is_borrowed`.
+    """
+
+    permission_classes = [IsSuperadmin | IsLibrarian]
+    # the rows are streamed after the response left `QueryBudgetMiddleware`, they aren't counted
+    query_budget = 3
+    export_format_query_param = "export_format"
+
+    def get_export_filters(self, request):
+        filters = {}
+        if request.query_params.get("username"):
+            student_id = StudentBL().get_student_id(request.query_params["username"])
+            if student_id is None:
+                raise NotFound(app_settings.MSG_STUDENT_NOT_FOUND)
+            filters["user_student_id"] = student_id
+
+        if request.query_params.get("is_borrowed") in ("true", "false"):
+            filters["is_borrowed"] = request.query_params["is_borrowed"] == "true"
+        return filters
+
+    def get(self, request, *args, **kwargs):
+        export_format = request.query_params.get(self.export_format_query_param, "csv")
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError({self.export_format_query_param: app_settings.MSG_EXPORT_INVALID_FORMAT})
+
+        rows = iter_export_rows(get_export_queryset(**self.get_export_filters(request)))
+        response = StreamingHttpResponse(
+            render_export(rows, export_format), content_type=EXPORT_FORMATS[export_format]
+        )
+        response["Content-Disposition"] = f'attachment; filename="borrow-histories.{export_format}"'
+        return response
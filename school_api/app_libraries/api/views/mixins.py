@@ -0,0 +1,49 @@
+from typing import TYPE_CHECKING
+
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+
+from school_api.app_libraries import settings as app_settings
+from school_api.app_libraries.bussiness_logics.students import StudentBL
+from school_api.bases.views import ReplicaReadMixin
+
+if TYPE_CHECKING:
+    # the mixins extend the primary scopes of `ReplicaReadMixin`, type check them as one
+    ReplicaViewBase = ReplicaReadMixin
+else:
+    ReplicaViewBase = object
+
+
+class StudentMixin(ReplicaViewBase):
+    """Resolve the student of the `username` url kwarg at most once per request."""
+
+    def get_primary_scopes(self, request):
+        # the student reads the borrows and returns a librarian just wrote for them
+        return super().get_primary_scopes(request) + [f"user:{self.kwargs['username']}"]
+
+    @cached_property
+    def student_id(self):
+        if "user_student" in self.__dict__:
+            return self.user_student.pk
+
+        student_id = StudentBL().get_student_id(self.kwargs["username"])
+        if student_id is None:
+            raise NotFound(app_settings.MSG_STUDENT_NOT_FOUND)
+        return student_id
+
+    @cached_property
+    def user_student(self):
+        user_student = StudentBL().get_student(self.kwargs["username"])
+        if not user_student:
+            raise NotFound(app_settings.MSG_STUDENT_NOT_FOUND)
+        return user_student
+
+
+class BulkStudentMixin(ReplicaViewBase):
+    """Keep the students a bulk write touched, `student_usernames`, on the primary with its librarian."""
+
+    student_usernames: list[str] = []
+
+    def get_primary_scopes(self, request):
+        # the usernames are known once the serializer saved, `finalize_response` asks after that
+        return super().get_primary_scopes(request) + [f"user:{username}" for username in self.student_usernames]
@@ -1,24 +1,30 @@
-from django.db import transaction
+from typing import cast
+
 from rest_framework import generics, status
 from rest_framework.response import Response
 
 from school_api.app_libraries import settings as app_settings
 from school_api.app_libraries.api.serializers.librarian import ListStudentBorrowSerializer
+from school_api.app_libraries.models import BorrowHistory, CombinedBorrowHistory
 from school_api.app_libraries.paginations import BorrowPagination
+from school_api.bases.views import ConditionalListMixin, ReplicaReadMixin, TransactionPolicyMixin
 from school_api.users.permissions import IsStudent
 
 
-class ListBorrowMe(generics.ListCreateAPIView):
+class ListBorrowMe(TransactionPolicyMixin, ReplicaReadMixin, ConditionalListMixin, generics.ListCreateAPIView):
+    conditional_timestamp_fields = ["updated_at", "book__updated_at"]
     permission_classes = [IsStudent]
+    query_budget = 5
     pagination_class = BorrowPagination
     serializer_class = ListStudentBorrowSerializer
     ordering = ("created_at",)
     search_fields = ["book__title", "book__author", "book__uuid"]
 
     def get_queryset(self):
-        return self.request.user.borrow_histories.filter(is_borrowed=1).select_related("book")
+        # by pk, a token user then stays unloaded
+        user_student_id = cast(int, self.request.user.pk)
+        return BorrowHistory.objects.filter(user_student_id=user_student_id, is_borrowed=True).select_related("book")
 
-    @transaction.atomic
     def create(self, request, *args, **kwargs):
         serializer = self.get_serializer(
             data=request.data, context={"request": request, "username": self.kwargs["username"]}
@@ -30,12 +36,15 @@ class ListBorrowMe(generics.ListCreateAPIView):
         return Response(data=message, status=status.HTTP_201_CREATED)
 
 
-class ListBorrowMeHistory(generics.ListCreateAPIView):
+class ListBorrowMeHistory(TransactionPolicyMixin, ReplicaReadMixin, ConditionalListMixin, generics.ListCreateAPIView):
+    conditional_timestamp_fields = ["updated_at", "book__updated_at"]
     permission_classes = [IsStudent]
+    query_budget = 5
     pagination_class = BorrowPagination
     serializer_class = ListStudentBorrowSerializer
     ordering = ("created_at",)
     search_fields = ["book__title", "book__author", "book__uuid"]
 
     def get_queryset(self):
-        return self.request.user.borrow_histories.select_related("book")
+        user_student_id = cast(int, self.request.user.pk)
+        return CombinedBorrowHistory.objects.filter(user_student_id=user_student_id).select_related("book")
@@ -7,9 +7,8 @@ class AppLibrariesConfig(AppConfig):
     name = "school_api.app_libraries"
     verbose_name = _("Libraries")
 
-    # def ready(self):
-    #     try:
-    #         import school_api.app_libraries.signals  # noqa: F401
-    #         import school_api.app_libraries.tasks  # noqa: F401
-    #     except ImportError:
-    #         pass
+    def ready(self):
+        try:
+            import school_api.app_libraries.signals  # noqa: F401
+        except ImportError:
+            pass
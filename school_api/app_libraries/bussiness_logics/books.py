@@ -1,31 +1,155 @@
-from typing import List
+from collections import Counter
+from datetime import date
+from typing import Dict, List
 
+from django.db import transaction
+from django.db.models import Case, DateField, F, Min, OuterRef, Subquery, Value, When
+from django.utils import timezone
+
+from school_api.app_libraries.caches import bump_catalog_version
 from school_api.app_libraries.models import Book, BorrowHistory
 
 
+class BookOutOfStock(Exception):
+    def __init__(self, titles: List[str]):
+        self.titles = titles
+        super().__init__(", ".join(titles))
+
+
 class BookBL:
-    def _get_nearest_return_date(self, book: Book):
-        borrow_obj: BorrowHistory = book.borrow_histories.filter(is_borrowed=1).order_by("deadline_date").first()
-        if not borrow_obj:
-            return None
-        return borrow_obj.deadline_date
+    def _get_nearest_return_dates(self, book_ids: List[int]) -> Dict[int, date]:
+        """Earliest deadline of the active loans of every given book, in a single aggregate query."""
+        if not book_ids:
+            return {}
+
+        nearest_return_dates = (
+            BorrowHistory.objects.filter(book_id__in=book_ids, is_borrowed=True)
+            .values("book_id")
+            .annotate(nearest_return_date=Min("deadline_date"))
+            .values_list("book_id", "nearest_return_date")
+        )
+        return dict(nearest_return_dates)
+
+    def _nearest_return_date_expression(self):
+        """
+        Expected `nearest_return_date` of a book row, only an out of stock book is due back.
+
+        The earliest deadline is probed through the `active_borrow_book_deadline` partial index.
+        """
+        nearest_deadline = (
+            BorrowHistory.objects.filter(book_id=OuterRef("pk"), is_borrowed=True)
+            .order_by("deadline_date")
+            .values("deadline_date")[:1]
+        )
+        return Case(When(quantity=0, then=Subquery(nearest_deadline)), default=None, output_field=DateField())
+
+    def _count_per_book(self, borrow_history_objects: List[BorrowHistory]) -> Dict[int, int]:
+        return Counter(borrow.book_id for borrow in borrow_history_objects)
+
+    def _value_per_book(self, count_per_book: Dict[int, int]):
+        """Build an expression resolving to the borrowed/returned count of each book row."""
+        counts = set(count_per_book.values())
+        if len(counts) == 1:
+            return Value(counts.pop())
+
+        return Case(*[When(pk=book_id, then=Value(count)) for book_id, count in count_per_book.items()])
 
     def sync_qty_for_borrowed_book(self, borrow_history_objects: List[BorrowHistory]):
-        for borrow in borrow_history_objects:
-            book = borrow.book
-            book.quantity -= 1
+        """
+        Decrement the stock of every borrowed book in one statement, whatever the size of the batch.
 
-            if book.quantity == 0:
-                book.nearest_return_date = self._get_nearest_return_date(book)
+        The book rows are locked in primary key order first so concurrent checkouts of the same
+        titles queue up instead of losing updates, raise `BookOutOfStock` with the exhausted titles.
+        """
+        count_per_book = self._count_per_book(borrow_history_objects)
+        if not count_per_book:
+            return
 
-            book.save()
+        locked_books = list(
+            Book.objects.select_for_update()
+            .filter(pk__in=count_per_book)
+            .order_by("pk")
+            .only("pk", "title", "quantity")
+        )
+
+        out_of_stock_titles = [book.title for book in locked_books if book.quantity < count_per_book[book.pk]]
+        if out_of_stock_titles:
+            raise BookOutOfStock(out_of_stock_titles)
+
+        # a book running out of stock is due back at the earliest deadline of its active loans
+        sold_out_ids = [book.pk for book in locked_books if book.quantity == count_per_book[book.pk]]
+        nearest_return_dates = self._get_nearest_return_dates(sold_out_ids)
+
+        borrowed_count = self._value_per_book(count_per_book)
+        updated_at = timezone.now()
+        fields = {"quantity": F("quantity") - borrowed_count, "updated_at": updated_at}
+        if nearest_return_dates:
+            fields["nearest_return_date"] = Case(
+                *[When(pk=book_id, then=Value(value)) for book_id, value in nearest_return_dates.items()],
+                default=F("nearest_return_date"),
+                output_field=DateField(),
+            )
+
+        updated = Book.objects.filter(pk__in=count_per_book, quantity__gt=0, quantity__gte=borrowed_count).update(
+            **fields
+        )
+        if updated != len(count_per_book):
+            # the books the guard skipped kept their `updated_at`, those ran out
+            out_of_stock_titles = list(
+                Book.objects.filter(pk__in=count_per_book)
+                .exclude(updated_at=updated_at)
+                .order_by("pk")
+                .values_list("title", flat=True)
+            )
+            raise BookOutOfStock(out_of_stock_titles)
+        transaction.on_commit(bump_catalog_version)
 
     def sync_qty_for_returned_book(self, borrow_history_objects: List[BorrowHistory]):
-        for borrow in borrow_history_objects:
-            book = borrow.book
-            if book.quantity == 0:
-                book.nearest_return_date = None
+        """Increment the stock of every returned book in one statement, a restocked book is never due."""
+        count_per_book = self._count_per_book(borrow_history_objects)
+        if not count_per_book:
+            return
+
+        Book.objects.filter(pk__in=count_per_book).update(
+            quantity=F("quantity") + self._value_per_book(count_per_book),
+            nearest_return_date=None,
+            updated_at=timezone.now(),
+        )
+        transaction.on_commit(bump_catalog_version)
+
+    def sync_nearest_return_date(self, borrow_history_objects: List[BorrowHistory]):
+        """Recompute `nearest_return_date` of the books whose loan deadlines changed, e.g. on extend."""
+        book_ids = {borrow.book_id for borrow in borrow_history_objects}
+        if not book_ids:
+            return
+
+        Book.objects.filter(pk__in=book_ids).update(nearest_return_date=self._nearest_return_date_expression())
+        transaction.on_commit(bump_catalog_version)
+
+    def reconcile_nearest_return_date(self, chunk_size: int = 1000) -> int:
+        """
+        Repair drifted `nearest_return_date` values across the whole catalog.
+
+        The catalog is walked in primary key chunks, every chunk costs one read and at most one update.
+        """
+        count_repaired = 0
+        last_pk = 0
+        while True:
+            book_objects = list(
+                Book.objects.filter(pk__gt=last_pk)
+                .order_by("pk")
+                .annotate(expected_return_date=self._nearest_return_date_expression())
+                .values_list("pk", "nearest_return_date", "expected_return_date")[:chunk_size]
+            )
+            if not book_objects:
+                if count_repaired:
+                    transaction.on_commit(bump_catalog_version)
+                return count_repaired
 
-            book.quantity += 1
+            drifted_ids = [pk for pk, current, expected in book_objects if current != expected]
+            if drifted_ids:
+                count_repaired += Book.objects.filter(pk__in=drifted_ids).update(
+                    nearest_return_date=self._nearest_return_date_expression()
+                )
 
-            book.save()
+            last_pk = book_objects[-1][0]
@@ -0,0 +1,159 @@
+from datetime import date, datetime, timedelta
+from itertools import groupby
+from typing import Dict, Iterator, List, Optional
+
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection
+from django.db.models import Q, Value
+from django.db.models.lookups import GreaterThan
+from django.utils import timezone
+
+from school_api.app_libraries import settings as app_settings
+from school_api.app_libraries.models import BorrowHistory
+from school_api.bases.expressions import Row
+
+REMINDER_FIELDS = [
+    "pk",
+    "deadline_date",
+    "user_student_id",
+    "user_student__username",
+    "user_student__first_name",
+    "user_student__last_name",
+    "user_student__email",
+    "book__title",
+]
+
+
+BORROW_HISTORY_COLUMNS = (
+    "id, created_at, updated_at, uuid, count_extend, is_borrowed, deadline_date, book_id, user_student_id"
+)
+
+# moves a chunk of returned loans in a single statement, a loan is never in both tables
+ARCHIVE_CHUNK_SQL = f"""
+WITH archived AS (
+    DELETE FROM library_borrow_histories
+    WHERE id IN (
+        SELECT id FROM library_borrow_histories
+        WHERE id > %s AND NOT is_borrowed AND updated_at < %s
+        ORDER BY id
+        LIMIT %s
+    )
+    RETURNING {BORROW_HISTORY_COLUMNS}
+)
+INSERT INTO library_borrow_histories_archive ({BORROW_HISTORY_COLUMNS})
+SELECT {BORROW_HISTORY_COLUMNS} FROM archived
+RETURNING id
+"""
+
+
+class BorrowArchiveBL:
+    def archive_returned_borrows(self, returned_before: datetime, chunk_size: int) -> int:
+        """
+        Move the loans returned before `returned_before` into `library_borrow_histories_archive`.
+
+        The hot table is walked once in primary key chunks, outside a transaction every chunk commits
+        on its own so the moved rows are never locked for the whole run. Return the number of archived loans.
+        """
+        count_archived = 0
+        last_pk = 0
+        while True:
+            with connection.cursor() as cursor:
+                cursor.execute(ARCHIVE_CHUNK_SQL, [last_pk, returned_before, chunk_size])
+                archived_ids = [row[0] for row in cursor.fetchall()]
+            if not archived_ids:
+                return count_archived
+
+            count_archived += len(archived_ids)
+            last_pk = max(archived_ids)
+
+
+class BorrowReminderBL:
+    def iter_due_borrows(self, until_date: date, chunk_size: int) -> Iterator[List[dict]]:
+        """
+        Active loans due on or before `until_date`, overdue ones included, in chunks of about `chunk_size`.
+
+        Chunks are keyset paginated on the student through the `active_borrow_student_deadline` partial
+        index and always end with the last loan of a student, so a student is reminded once per run.
+        A full chunk is completed with the loans its last student still has past it.
+        """
+        due_borrows = (
+            BorrowHistory.objects.filter(is_borrowed=True, deadline_date__lte=until_date)
+            .order_by("user_student_id", "deadline_date", "pk")
+            .values(*REMINDER_FIELDS)
+        )
+        keyset = Q()
+        while True:
+            borrows = list(due_borrows.filter(keyset)[:chunk_size])
+            if not borrows:
+                return
+
+            last = borrows[-1]
+            if len(borrows) == chunk_size:
+                borrows += due_borrows.filter(
+                    GreaterThan(Row("deadline_date", "pk"), Row(Value(last["deadline_date"]), Value(last["pk"]))),
+                    user_student_id=last["user_student_id"],
+                )
+
+            yield borrows
+
+            keyset = Q(user_student_id__gt=last["user_student_id"])
+
+    def build_reminders(self, borrows: List[dict], today: date) -> List[Dict]:
+        """One JSON serializable reminder per student of the chunk, students without an email are skipped."""
+        reminders = []
+        borrows = sorted(borrows, key=lambda borrow: (borrow["user_student_id"], borrow["deadline_date"]))
+        for _, group in groupby(borrows, key=lambda borrow: borrow["user_student_id"]):
+            student_borrows = list(group)
+            student = student_borrows[0]
+            if not student["user_student__email"]:
+                continue
+
+            name = f"{student['user_student__first_name']} {student['user_student__last_name']}".strip()
+            reminders.append(
+                {
+                    "email": student["user_student__email"],
+                    "name": name or student["user_student__username"],
+                    "books": [
+                        {
+                            "title": borrow["book__title"],
+                            "deadline_date": borrow["deadline_date"].isoformat(),
+                            "is_overdue": borrow["deadline_date"] < today,
+                        }
+                        for borrow in student_borrows
+                    ],
+                }
+            )
+        return reminders
+
+    def iter_reminder_batches(self, today: Optional[date] = None, days: Optional[int] = None, chunk_size=None):
+        """Reminders of the overdue and soon due loans, one batch per chunk of loans with its loan count."""
+        today = today or timezone.localtime().date()
+        days = app_settings.BORROW_REMINDER_DAYS if days is None else days
+        chunk_size = chunk_size or app_settings.BORROW_REMINDER_CHUNK_SIZE
+
+        for borrows in self.iter_due_borrows(today + timedelta(days=days), chunk_size):
+            yield self.build_reminders(borrows, today), len(borrows)
+
+    def _format_book(self, book: Dict) -> str:
+        message = (
+            app_settings.MSG_BORROW_REMINDER_BOOK_OVERDUE
+            if book["is_overdue"]
+            else app_settings.MSG_BORROW_REMINDER_BOOK
+        )
+        return message.format(book["title"], book["deadline_date"])
+
+    def send_reminders(self, reminders: List[Dict]) -> int:
+        """Send a batch of reminders over a single mail connection, return the number sent."""
+        messages = []
+        for reminder in reminders:
+            books = "\n".join(self._format_book(book) for book in reminder["books"])
+            messages.append(
+                EmailMessage(
+                    subject=app_settings.MSG_BORROW_REMINDER_SUBJECT,
+                    body=app_settings.MSG_BORROW_REMINDER_BODY.format(reminder["name"], books),
+                    to=[reminder["email"]],
+                )
+            )
+
+        with get_connection() as connection:
+            return connection.send_messages(messages) or 0
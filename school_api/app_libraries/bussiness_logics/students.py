@@ -0,0 +1,40 @@
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import caches
+
+from school_api.app_libraries import settings as app_settings
+from school_api.app_libraries.metrics import record_cache_request
+from school_api.users.models import User
+
+
+class StudentBL:
+    def _get_cache_key(self, username: str) -> str:
+        return f"library:student-id:{username}"
+
+    def get_student(self, username: str) -> Optional[User]:
+        return User.objects.filter(username=username).first()
+
+    def get_student_id(self, username: str) -> Optional[int]:
+        """
+        Primary key of the student with the given username.
+
+        With `LIBRARY_STUDENT_ID_CACHE_TIMEOUT` set, the mapping is cached across requests for that many
+        seconds, the cached id is forgotten as soon as the user is renamed or deleted.
+        """
+        timeout = settings.LIBRARY_STUDENT_ID_CACHE_TIMEOUT
+        cache = caches[app_settings.CACHE_ALIAS]
+        if timeout:
+            student_id = cache.get(self._get_cache_key(username))
+            record_cache_request("student_id", is_hit=student_id is not None)
+            if student_id is not None:
+                return student_id
+
+        student_id = User.objects.filter(username=username).values_list("pk", flat=True).first()
+        if timeout and student_id is not None:
+            cache.set(self._get_cache_key(username), student_id, timeout=timeout)
+        return student_id
+
+    def forget_student_id(self, username: str):
+        if settings.LIBRARY_STUDENT_ID_CACHE_TIMEOUT:
+            caches[app_settings.CACHE_ALIAS].delete(self._get_cache_key(username))
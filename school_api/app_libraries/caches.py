@@ -0,0 +1,95 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.core.cache import caches
+
+from school_api.app_libraries import settings as app_settings
+from school_api.app_libraries.metrics import record_cache_request
+from school_api.bases.routers import stick_to_primary
+
+CATALOG_VERSION_KEY = "library:catalog:version"
+CATALOG_HIT_KEY = "library:catalog:hit"
+CATALOG_MISS_KEY = "library:catalog:miss"
+CATALOG_PRIMARY_SCOPE = "library:catalog"
+
+
+def get_catalog_cache():
+    return caches[app_settings.CACHE_ALIAS]
+
+
+def _incr(key):
+    cache = get_catalog_cache()
+    try:
+        return cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, timeout=None)
+        return cache.incr(key)
+
+
+def get_catalog_version():
+    """
+    Current version of the catalog, part of every cached page key.
+
+    A missing counter, e.g. evicted, restarts from the current time so pages cached
+    under an older counter value can never be served again.
+    """
+    cache = get_catalog_cache()
+    version = cache.get(CATALOG_VERSION_KEY)
+    if version is None:
+        cache.add(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+        version = cache.get(CATALOG_VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    """
+    Invalidate every cached catalog page at once, the stale pages simply expire.
+
+    The pages of the new version are read from the primary until the replicas caught up with the change.
+    """
+    cache = get_catalog_cache()
+    try:
+        cache.incr(CATALOG_VERSION_KEY)
+    except ValueError:
+        cache.add(CATALOG_VERSION_KEY, time.time_ns(), timeout=None)
+    stick_to_primary([CATALOG_PRIMARY_SCOPE])
+
+
+def normalize_query_params(query_params, search_param=None):
+    """Sorted, blank free query parameters, the search term is case and whitespace insensitive."""
+    params: list[tuple[str, str]] = []
+    for key in sorted(query_params):
+        values = [value.strip() for value in query_params.getlist(key) if value.strip()]
+        if key == search_param:
+            values = [" ".join(value.lower().split()) for value in values]
+        params.extend((key, value) for value in values)
+    return urlencode(params)
+
+
+def get_catalog_cache_key(request, search_param=None):
+    params = normalize_query_params(request.query_params, search_param)
+    # paginated pages embed absolute `next`/`previous` links, so the scheme and host are part of the key
+    digest = hashlib.md5(f"{request.build_absolute_uri(request.path)}?{params}".encode()).hexdigest()
+    return f"library:catalog:{get_catalog_version()}:{digest}"
+
+
+def get_cached_catalog_page(cache_key):
+    data = get_catalog_cache().get(cache_key)
+    _incr(CATALOG_MISS_KEY if data is None else CATALOG_HIT_KEY)
+    record_cache_request("catalog", is_hit=data is not None)
+    return data
+
+
+def set_cached_catalog_page(cache_key, data):
+    get_catalog_cache().set(cache_key, data, timeout=app_settings.CATALOG_CACHE_TIMEOUT)
+
+
+def get_catalog_cache_stats():
+    stats = get_catalog_cache().get_many([CATALOG_HIT_KEY, CATALOG_MISS_KEY])
+    hit, miss = stats.get(CATALOG_HIT_KEY, 0), stats.get(CATALOG_MISS_KEY, 0)
+    return {
+        "hit": hit,
+        "miss": miss,
+        "hit_ratio": hit / (hit + miss) if hit + miss else 0.0,
+    }
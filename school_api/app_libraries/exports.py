@@ -0,0 +1,67 @@
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from school_api.app_libraries.models import CombinedBorrowHistory
+
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+EXPORT_FIELDS = {
+    "uuid": "uuid",
+    "username": "user_student__username",
+    "first_name": "user_student__first_name",
+    "last_name": "user_student__last_name",
+    "book_uuid": "book__uuid",
+    "book_title": "book__title",
+    "book_author": "book__author",
+    "is_borrowed": "is_borrowed",
+    "count_extend": "count_extend",
+    "deadline_date": "deadline_date",
+    "created_at": "created_at",
+    "updated_at": "updated_at",
+}
+
+
+class Echo:
+    """File-like object for `csv.writer` handing every written line straight back."""
+
+    def write(self, value):
+        return value
+
+
+def get_export_queryset(**filters):
+    """Export rows of the active and the archived loans, in primary key order."""
+    return CombinedBorrowHistory.objects.filter(**filters).order_by("pk").values_list(*EXPORT_FIELDS.values())
+
+
+def iter_export_rows(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Rows through a server-side cursor, only `chunk_size` rows are held in memory at a time.
+
+    The cursor is read inside its own transaction, in autocommit PostgreSQL materializes the
+    whole `WITH HOLD` cursor before handing out the first row.
+    """
+    with transaction.atomic():
+        yield from queryset.iterator(chunk_size=chunk_size)
+
+
+def render_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_FIELDS.keys())
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def render_ndjson(rows):
+    for row in rows:
+        yield json.dumps(dict(zip(EXPORT_FIELDS, row)), cls=DjangoJSONEncoder) + "\n"
+
+
+def render_export(rows, export_format):
+    renderers = {"csv": render_csv, "ndjson": render_ndjson}
+    return renderers[export_format](rows)
@@ -0,0 +1,72 @@
+import re
+from functools import reduce
+from operator import and_
+from uuid import UUID
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db.models import F, Q
+from django.db.models.functions import Upper
+from rest_framework.settings import api_settings
+
+from school_api.bases.filters import CustomSearchFilter
+
+
+class BookSearchFilter(CustomSearchFilter):
+    """
+    Catalog search backend of `ListBook`.
+
+    An exact book uuid goes through the unique index. Otherwise books match the stored full text
+    vector with every term as a prefix, or every term as a trigram indexed partial title/author
+    match or fuzzy title word match. Results are ranked by relevance against the stored vector
+    unless the client asked for an explicit ordering.
+    """
+
+    search_config = "simple"
+
+    def get_search_uuid(self, search_terms):
+        if len(search_terms) != 1:
+            return None
+        try:
+            return UUID(search_terms[0])
+        except ValueError:
+            return None
+
+    def get_search_query(self, search_terms):
+        words = [word for term in search_terms for word in re.findall(r"\w+", term)]
+        if not words:
+            return None
+        return SearchQuery(" & ".join(f"{word}:*" for word in words), search_type="raw", config=self.search_config)
+
+    def filter_queryset(self, request, queryset, view):
+        self.check_min_length(request, view)
+        search_terms = self.get_search_terms(request)
+        if not search_terms:
+            return queryset
+
+        search_uuid = self.get_search_uuid(search_terms)
+        if search_uuid:
+            return queryset.filter(uuid=search_uuid)
+
+        queryset = queryset.alias(title_upper=Upper("title"))
+        conditions = reduce(
+            and_,
+            [
+                Q(title__icontains=term)
+                | Q(author__icontains=term)
+                | Q(title_upper__trigram_word_similar=term.upper())
+                for term in search_terms
+            ],
+        )
+
+        search_query = self.get_search_query(search_terms)
+        if search_query:
+            conditions |= Q(search_vector=search_query)
+
+        queryset = queryset.filter(conditions)
+        if request.query_params.get(api_settings.ORDERING_PARAM):
+            return queryset
+
+        if not search_query:
+            return queryset
+        rank = SearchRank(F("search_vector"), search_query)
+        return queryset.annotate(search_rank=rank).order_by("-search_rank", *queryset.query.order_by)
@@ -0,0 +1,225 @@
+import csv
+import json
+from typing import cast
+
+from django.core.exceptions import ValidationError as CoreValidationError
+from django.db import connection, transaction
+from django.db.models import Field
+
+from school_api.app_libraries.caches import bump_catalog_version
+from school_api.app_libraries.models import Book
+
+IMPORT_FORMATS = ["csv", "json", "ndjson"]
+IMPORT_MAX_ERRORS = 100
+# staged columns and the value of a blank cell
+IMPORT_FIELDS = {"uuid": None, "title": "", "author": "", "quantity": 0}
+IMPORT_DECODE_ERROR = "The file is not UTF-8 encoded."
+
+STAGE_TABLE_SQL = """
+CREATE TEMPORARY TABLE library_books_import (
+    line integer NOT NULL,
+    uuid uuid,
+    title varchar(255) NOT NULL,
+    author varchar(255) NOT NULL,
+    quantity integer NOT NULL,
+    book_id bigint
+) ON COMMIT DROP
+"""
+
+# the last row of the file wins when it holds the same book twice
+DEDUPLICATE_SQL = """
+DELETE FROM library_books_import WHERE line IN (
+    SELECT line FROM (
+        SELECT line, row_number() OVER (
+            PARTITION BY uuid, CASE WHEN uuid IS NULL THEN title END, CASE WHEN uuid IS NULL THEN author END
+            ORDER BY line DESC
+        ) AS position
+        FROM library_books_import
+    ) AS ranked
+    WHERE position > 1
+)
+"""
+
+# matched in two statements, so both can hash join against the catalog
+MATCH_BY_UUID_SQL = """
+UPDATE library_books_import AS staged SET book_id = book.id
+FROM library_books AS book
+WHERE staged.uuid IS NOT NULL AND book.uuid = staged.uuid AND book.deleted IS NULL
+"""
+
+MATCH_BY_TITLE_AUTHOR_SQL = """
+UPDATE library_books_import AS staged SET book_id = book.id
+FROM library_books AS book
+WHERE staged.uuid IS NULL AND book.title = staged.title AND book.author = staged.author AND book.deleted IS NULL
+"""
+
+UPDATE_SQL = """
+UPDATE library_books AS book SET
+    title = staged.title,
+    author = staged.author,
+    quantity = {quantity},
+    -- an out of stock book is due back at the earliest deadline of its active loans, as in `BookBL`
+    nearest_return_date = CASE WHEN {quantity} > 0 THEN NULL ELSE (
+        SELECT borrow.deadline_date FROM library_borrow_histories AS borrow
+        WHERE borrow.book_id = book.id AND borrow.is_borrowed
+        ORDER BY borrow.deadline_date LIMIT 1
+    ) END,
+    updated_at = now()
+FROM library_books_import AS staged
+WHERE staged.book_id = book.id
+"""
+
+INSERT_SQL = """
+INSERT INTO library_books (uuid, title, author, quantity, created_at, updated_at)
+SELECT coalesce(staged.uuid, gen_random_uuid()), staged.title, staged.author, staged.quantity, now(), now()
+FROM library_books_import AS staged
+WHERE staged.book_id IS NULL
+ON CONFLICT (uuid) DO NOTHING
+"""
+
+
+class BookImportError(Exception):
+    """A file that can't be imported at all, unlike a rejected row."""
+
+
+def parse_ndjson_line(line):
+    """Row of an NDJSON line, or the `ValidationError` rejecting a line that isn't JSON."""
+    try:
+        return json.loads(line)
+    except json.JSONDecodeError as e:
+        return CoreValidationError(f"Invalid JSON, {e.msg}.")
+
+
+def read_book_rows(file, import_format):
+    """
+    Book rows of a text file as dicts, CSV and NDJSON are read line by line.
+
+    A JSON file is read whole, raise `BookImportError` when it isn't a list of books.
+    """
+    if import_format == "csv":
+        return csv.DictReader(file)
+    if import_format == "ndjson":
+        return (parse_ndjson_line(line) for line in file if line.strip())
+
+    try:
+        rows = json.load(file)
+    except UnicodeDecodeError:
+        raise BookImportError(IMPORT_DECODE_ERROR)
+    except json.JSONDecodeError as e:
+        raise BookImportError(f"Invalid JSON, {e.msg} at line {e.lineno}.")
+    if not isinstance(rows, list):
+        raise BookImportError("A JSON file holds a list of books.")
+    # a plain list of books, or a fixture like `fixtures/dummy-books.json`
+    return (row.get("fields", row) if isinstance(row, dict) else row for row in rows)
+
+
+def clean_book_row(row):
+    """Tuple to stage for a book row, raise `ValidationError` for a row that can't be imported."""
+    if isinstance(row, CoreValidationError):
+        raise row
+    if not isinstance(row, dict):
+        raise CoreValidationError("Invalid row.")
+
+    # the model fields validate the values, without building a `Book` for every row
+    errors: dict[str, list[str]] = {}
+    values: dict[str, object] = {}
+    for name, default in IMPORT_FIELDS.items():
+        value = row.get(name)
+        value = value.strip() if isinstance(value, str) else value
+        if name == "uuid" and not value:
+            values[name] = None
+            continue
+        try:
+            values[name] = cast(Field, Book._meta.get_field(name)).clean(value or default, None)
+        except CoreValidationError as e:
+            errors[name] = e.messages
+    if errors:
+        raise CoreValidationError(errors)
+
+    return tuple(values.values())
+
+
+class BookImporter:
+    """
+    Upsert books into `library_books` in a constant number of statements.
+
+    Valid rows are streamed into a temporary table with `COPY`, then matched to the catalog by
+    uuid, or by title and author for rows without one. Matched books are updated and the others
+    inserted, the stock of a matched book is increased by the imported quantity unless
+    `replace_quantity` is set.
+    """
+
+    def __init__(self, replace_quantity=False):
+        self.replace_quantity = replace_quantity
+        self.count_rejected = 0
+        self.errors = []
+
+    def reject(self, line, error):
+        self.count_rejected += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append(f"line {line}: {error}")
+
+    def iter_staged_rows(self, rows):
+        for line, row in enumerate(rows, start=1):
+            try:
+                yield (line, *clean_book_row(row))
+            except CoreValidationError as e:
+                self.reject(line, "; ".join(e.messages))
+
+    def stage(self, cursor, rows):
+        """
+        Stream the valid rows into the staging table, raise `BookImportError` for a file that can't be read.
+
+        The file is read while the `COPY` runs, any error raised inside it would only be reported as
+        a cancelled `COPY`. A read error ends the `COPY` first, the import is then rolled back.
+        """
+        error = None
+        with cursor.copy("COPY library_books_import (line, uuid, title, author, quantity) FROM STDIN") as copy:
+            try:
+                for staged_row in self.iter_staged_rows(rows):
+                    copy.write_row(staged_row)
+            except UnicodeDecodeError:
+                error = BookImportError(IMPORT_DECODE_ERROR)
+            except csv.Error as e:
+                error = BookImportError(f"Invalid CSV, {e}.")
+        if error:
+            raise error
+
+    def run(self, rows):
+        quantity = "staged.quantity" if self.replace_quantity else "book.quantity + staged.quantity"
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(STAGE_TABLE_SQL)
+            self.stage(cursor, rows)
+            cursor.execute("ANALYZE library_books_import")
+
+            cursor.execute(DEDUPLICATE_SQL)
+            count_duplicate = cursor.rowcount
+            cursor.execute(MATCH_BY_UUID_SQL)
+            cursor.execute(MATCH_BY_TITLE_AUTHOR_SQL)
+            cursor.execute(UPDATE_SQL.format(quantity=quantity))
+            count_updated = cursor.rowcount
+            cursor.execute("SELECT count(*) FROM library_books_import WHERE book_id IS NULL")
+            count_unmatched = cursor.fetchone()[0]
+            cursor.execute(INSERT_SQL)
+            count_inserted = cursor.rowcount
+
+            # an unmatched uuid may belong to a deleted book, those rows are skipped by the insert
+            count_conflict = count_unmatched - count_inserted
+            if count_conflict:
+                self.count_rejected += count_conflict
+                self.errors.append(f"{count_conflict} rows share the uuid of a deleted book.")
+
+            transaction.on_commit(bump_catalog_version)
+
+        return {
+            "inserted": count_inserted,
+            "updated": count_updated,
+            "duplicate": count_duplicate,
+            "rejected": self.count_rejected,
+            "errors": self.errors,
+        }
+
+
+def import_books(file, import_format, replace_quantity=False):
+    """Import the books of a text file, return the inserted, updated, duplicate and rejected counts."""
+    return BookImporter(replace_quantity=replace_quantity).run(read_book_rows(file, import_format))
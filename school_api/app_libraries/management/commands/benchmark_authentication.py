@@ -0,0 +1,85 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client, override_settings
+from django.urls import reverse
+from rest_framework.authentication import BaseAuthentication, SessionAuthentication, TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+from school_api.app_libraries.api.views import ListBook
+from school_api.app_libraries.seeders import SEED_LIBRARIAN_USERNAME
+from school_api.bases.benchmarks import format_result, get_server_name, measure
+from school_api.bases.queries import QueryCounter
+from school_api.users.api.serializers.auth_jwt import UserClaimsTokenObtainPairSerializer
+from school_api.users.authentication import AuthorizationSchemeAuthentication, StatelessJWTAuthentication
+from school_api.users.models import User
+
+# the authentication before the `Authorization` scheme dispatch, every class tried in turn
+CHAINED_AUTHENTICATION_CLASSES = [SessionAuthentication, TokenAuthentication, StatelessJWTAuthentication]
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the authentication of a cached catalog page through the whole middleware stack, the chained "
+        "session/token/JWT classes against the `Authorization` scheme dispatch, with the queries and "
+        "session loads of a request."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument("--warmup", type=int, default=10)
+
+    def get_cases(self, librarian, token):
+        access = UserClaimsTokenObtainPairSerializer.get_token(librarian).access_token
+        browser = Client(SERVER_NAME=get_server_name())
+        browser.force_login(librarian)
+        session_cookie = f"{settings.SESSION_COOKIE_NAME}={browser.session.session_key}"
+        return {
+            "bearer": {"HTTP_AUTHORIZATION": f"Bearer {access}"},
+            "bearer+session-cookie": {"HTTP_AUTHORIZATION": f"Bearer {access}", "HTTP_COOKIE": session_cookie},
+            "token": {"HTTP_AUTHORIZATION": f"Token {token.key}"},
+            "session": {"HTTP_COOKIE": session_cookie},
+        }, browser
+
+    def measure_case(self, name, headers, options):
+        # a remote address outside of `INTERNAL_IPS`, the debug toolbar would load the session
+        client = Client(SERVER_NAME=get_server_name(), REMOTE_ADDR="192.0.2.1")
+        url = reverse("api_library:list-book")
+        client.get(url, **headers)
+
+        with QueryCounter() as counter:
+            response = client.get(url, **headers)
+        if response.status_code >= 400:
+            raise CommandError(f"{name} answered {response.status_code}")
+
+        result = measure(
+            lambda: client.get(url, **headers), iterations=options["iterations"], warmup=options["warmup"]
+        )
+        session_loads = int(response.wsgi_request.session.accessed)
+        self.stdout.write(f"{format_result(name, result)}  queries={counter.count} session_loads={session_loads}")
+
+    def handle(self, *args, **options):
+        librarian = User.objects.filter(username=SEED_LIBRARIAN_USERNAME).first()
+        if librarian is None:
+            raise CommandError("No benchmark dataset, run `manage.py seed_library` first.")
+
+        token, token_created = Token.objects.get_or_create(user=librarian)
+        cases, browser = self.get_cases(librarian, token)
+        # without the gate allauth loads the session of every API request
+        middleware = [name for name in settings.MIDDLEWARE if not name.endswith(".APISessionGateMiddleware")]
+        policies: dict[str, tuple[list[type[BaseAuthentication]], override_settings]] = {
+            "chained": (CHAINED_AUTHENTICATION_CLASSES, override_settings(MIDDLEWARE=middleware)),
+            "dispatched": ([AuthorizationSchemeAuthentication], override_settings()),
+        }
+
+        authentication_classes = ListBook.authentication_classes
+        try:
+            for policy, (classes, middleware_settings) in policies.items():
+                ListBook.authentication_classes = classes
+                with middleware_settings:
+                    for case, headers in cases.items():
+                        self.measure_case(f"{case} {policy}", headers, options)
+        finally:
+            ListBook.authentication_classes = authentication_classes
+            browser.logout()
+            if token_created:
+                token.delete()
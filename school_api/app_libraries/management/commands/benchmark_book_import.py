@@ -0,0 +1,55 @@
+import csv
+import tempfile
+import time
+from uuid import uuid4
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from school_api.app_libraries.imports import import_books
+from school_api.app_libraries.models import Book
+from school_api.bases.benchmarks import Rollback
+
+
+class Command(BaseCommand):
+    help = "Measure the throughput of the COPY based book import against saving books one by one."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=50000)
+        parser.add_argument("--orm-rows", type=int, default=2000, help="Rows saved one by one for comparison.")
+
+    def write_csv(self, file, count_row):
+        writer = csv.writer(file)
+        writer.writerow(["uuid", "title", "author", "quantity"])
+        for i in range(count_row):
+            # every tenth row has no uuid and is matched on title/author
+            writer.writerow([uuid4() if i % 10 else "", f"Imported Book vol. {i}", f"Author {i % 500}", 5])
+        file.seek(0)
+
+    def run_rolled_back(self, func):
+        """Time `func` inside a transaction that is rolled back, the catalog is left untouched."""
+        try:
+            with transaction.atomic():
+                started_at = time.perf_counter()
+                result = func()
+                elapsed = time.perf_counter() - started_at
+                raise Rollback
+        except Rollback:
+            return result, elapsed
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryFile("w+", newline="") as file:
+            self.write_csv(file, options["rows"])
+            result, elapsed = self.run_rolled_back(lambda: import_books(file, "csv"))
+        self.stdout.write(
+            f"copy import  rows={options['rows']:>7}  {elapsed:8.2f}s  {options['rows'] / elapsed:>10.0f} rows/s  "
+            f"inserted={result['inserted']} updated={result['updated']} rejected={result['rejected']}"
+        )
+
+        def save_books():
+            for i in range(options["orm_rows"]):
+                Book.objects.create(title=f"Imported Book vol. {i}", author=f"Author {i % 500}", quantity=5)
+
+        _, elapsed = self.run_rolled_back(save_books)
+        rows = options["orm_rows"]
+        self.stdout.write(f"orm save     rows={rows:>7}  {elapsed:8.2f}s  {rows / elapsed:>10.0f} rows/s")
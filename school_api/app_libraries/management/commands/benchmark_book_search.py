@@ -0,0 +1,73 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.filters import OrderingFilter
+from rest_framework.test import APIRequestFactory
+
+from school_api.app_libraries.api.views import ListBook
+from school_api.app_libraries.caches import bump_catalog_version
+from school_api.app_libraries.models import Book
+from school_api.bases.benchmarks import format_result, measure
+from school_api.bases.filters import CustomSearchFilter
+
+DEFAULT_TERMS = ["mathematics", "advance science", "scienc", "biologi beginer", "uncle john"]
+
+SEED_BOOKS_SQL = """
+INSERT INTO library_books (uuid, title, author, quantity, created_at, updated_at)
+SELECT
+    gen_random_uuid(),
+    (ARRAY['Learning', 'Advance in', 'Introduction to', 'Handbook of', 'Mastering'])[1 + i %% 5]
+    || ' ' || (ARRAY['Mathematics', 'Science', 'Biology', 'English', 'Bahasa', 'Computer', 'History'])[1 + i %% 7]
+    || ' ' || (ARRAY['for beginner', 'with experiment', 'in practice', 'fast formula'])[1 + i %% 4]
+    || ' vol. ' || i,
+    'Uncle ' || (ARRAY['John', 'Doe', 'Bob', 'Jack', 'Joko', 'Sato'])[1 + i %% 6] || ' ' || (i %% 10000),
+    10,
+    now(),
+    now()
+FROM generate_series(1, %s) AS i
+"""
+
+
+class LegacyListBook(ListBook):
+    filter_backends = [CustomSearchFilter, OrderingFilter, DjangoFilterBackend]
+    search_fields = ["title", "author", "uuid"]
+
+
+class Command(BaseCommand):
+    help = "Compare p50/p99 latency of the ListBook search backend against the legacy icontains search."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--books", type=int, default=0, help="Seed the catalog up to this many books first.")
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--term", action="append", dest="terms", help="Search term, can be repeated.")
+
+    def seed_books(self, count_book):
+        count_missing = count_book - Book.objects.count()
+        if count_missing <= 0:
+            return
+
+        self.stdout.write(f"Seeding {count_missing} books...")
+        with connection.cursor() as cursor:
+            cursor.execute(SEED_BOOKS_SQL, [count_missing])
+            cursor.execute("ANALYZE library_books")
+
+    def handle(self, *args, **options):
+        self.seed_books(options["books"])
+
+        views = {
+            "legacy": LegacyListBook.as_view(),
+            "search": ListBook.as_view(),
+        }
+        terms = options["terms"] or DEFAULT_TERMS + [str(Book.objects.values_list("uuid", flat=True).last())]
+        factory = APIRequestFactory(SERVER_NAME="localhost")
+
+        for term in terms:
+            for name, view in views.items():
+
+                def search():
+                    # a new catalog version per call, both backends render every page from the database
+                    bump_catalog_version()
+                    view(factory.get("/api/library/books/", {"q": term})).render()
+
+                result = measure(search, iterations=options["iterations"])
+                self.stdout.write(format_result(f"{name} q={term!r}", result))
@@ -0,0 +1,73 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from school_api.app_libraries import settings as app_settings
+from school_api.app_libraries.bussiness_logics.borrows import REMINDER_FIELDS, BorrowReminderBL
+from school_api.app_libraries.models import BorrowHistory
+from school_api.bases.benchmarks import format_result, measure
+
+SEED_BORROWS_SQL = """
+INSERT INTO library_borrow_histories
+    (uuid, user_student_id, book_id, count_extend, is_borrowed, deadline_date, created_at, updated_at)
+SELECT
+    gen_random_uuid(),
+    student.ids[1 + i %% array_length(student.ids, 1)],
+    book.ids[1 + i %% array_length(book.ids, 1)],
+    0,
+    %s,
+    current_date + (i %% 60) - 30,
+    now(),
+    now()
+FROM generate_series(1, %s) AS i,
+    (SELECT array_agg(id) AS ids FROM users_user) AS student,
+    (SELECT array_agg(id) AS ids FROM (SELECT id FROM library_books ORDER BY id LIMIT 10000) AS books) AS book
+"""
+
+
+class Command(BaseCommand):
+    help = "Measure a full scan of the reminder job over the due loans, keyset chunks against offset pages."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--history", type=int, default=0, help="Seed the returned loans up to this count first.")
+        parser.add_argument("--borrows", type=int, default=0, help="Seed the active loans up to this count first.")
+        parser.add_argument("--chunk-size", type=int, default=app_settings.BORROW_REMINDER_CHUNK_SIZE)
+        parser.add_argument("--iterations", type=int, default=5)
+
+    def seed_borrows(self, count_borrow, is_borrowed):
+        count_missing = count_borrow - BorrowHistory.objects.filter(is_borrowed=is_borrowed).count()
+        if count_missing <= 0:
+            return
+
+        self.stdout.write(f"Seeding {count_missing} {'active' if is_borrowed else 'returned'} loans...")
+        with connection.cursor() as cursor:
+            cursor.execute(SEED_BORROWS_SQL, [is_borrowed, count_missing])
+            cursor.execute("ANALYZE library_borrow_histories")
+
+    def handle(self, *args, **options):
+        self.seed_borrows(options["history"], is_borrowed=False)
+        self.seed_borrows(options["borrows"], is_borrowed=True)
+
+        today = timezone.localtime().date()
+        until_date = today + timedelta(days=app_settings.BORROW_REMINDER_DAYS)
+        chunk_size = options["chunk_size"]
+        reminder_bl = BorrowReminderBL()
+
+        def scan_keyset():
+            for borrows in reminder_bl.iter_due_borrows(until_date, chunk_size):
+                reminder_bl.build_reminders(borrows, today)
+
+        def scan_offset():
+            queryset = BorrowHistory.objects.filter(is_borrowed=True, deadline_date__lte=until_date).order_by("pk")
+            offset = 0
+            while borrows := list(queryset.values(*REMINDER_FIELDS)[offset : offset + chunk_size]):
+                reminder_bl.build_reminders(borrows, today)
+                offset += chunk_size
+
+        count_due = BorrowHistory.objects.filter(is_borrowed=True, deadline_date__lte=until_date).count()
+        self.stdout.write(f"history={BorrowHistory.objects.count()} due={count_due} chunk_size={chunk_size}")
+        for name, scan in [("keyset", scan_keyset), ("offset", scan_offset)]:
+            result = measure(scan, iterations=options["iterations"], warmup=1)
+            self.stdout.write(format_result(f"{name} scan", result))
@@ -0,0 +1,85 @@
+from django.core.management.base import CommandError
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+from django.db.backends.signals import connection_created
+from django.db.utils import load_backend
+
+from school_api.app_libraries.api.views.librarian import ListStudentBorrow
+from school_api.app_libraries.management.commands import benchmark_library
+from school_api.bases.benchmarks import format_result, measure, rolled_back
+
+POOL_ENGINE = "school_api.bases.backends.postgresql"
+
+
+class Command(benchmark_library.Command):
+    help = (
+        "Measure borrow requests with a new database connection per request, a persistent connection per thread "
+        "and a psycopg pool, against the `seed_library` dataset. Writes are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument("--warmup", type=int, default=10)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def get_policies(self, settings_dict):
+        # checked connections, as in production
+        settings_dict = {**settings_dict, "CONN_HEALTH_CHECKS": True}
+        return {
+            "new-connection": {**settings_dict, "CONN_MAX_AGE": 0},
+            "persistent": {**settings_dict, "CONN_MAX_AGE": 60},
+            "pool": {
+                **settings_dict,
+                "ENGINE": POOL_ENGINE,
+                "CONN_MAX_AGE": 0,
+                "OPTIONS": {**settings_dict["OPTIONS"], "pool": {"min_size": 1, "max_size": 2}},
+            },
+        }
+
+    def measure_policy(self, name, settings_dict, options):
+        database = load_backend(settings_dict["ENGINE"]).DatabaseWrapper(settings_dict, DEFAULT_DB_ALIAS)
+        connections[DEFAULT_DB_ALIAS] = database
+        list_borrow = ListStudentBorrow.as_view()
+        created = []
+
+        @rolled_back
+        def borrow_books():
+            student = self.random.choice(self.students)
+            book_uuids = [str(book.uuid) for book in self.random.sample(self.books, 3)]
+            self.call_view(list_borrow, "post", "/", {"book_uuids": book_uuids}, username=student.username)
+
+        def request():
+            borrow_books()
+            # what the request handler does on `request_finished`
+            close_old_connections()
+
+        def count_connection(sender, connection, **kwargs):
+            created.append(connection)
+
+        connection_created.connect(count_connection)
+        try:
+            result = measure(request, iterations=options["iterations"], warmup=options["warmup"])
+            pool = getattr(database, "pool", None)
+            # the pool sends `connection_created` for every connection handed out
+            server_connections = pool.get_stats()["connections_num"] if pool else len(created)
+        finally:
+            connection_created.disconnect(count_connection)
+            database.close()
+            if getattr(database, "pool", None):
+                database.close_pool()
+
+        name = f"api.student-borrow.create {name}"
+        self.stdout.write(f"{format_result(name, result)}  server_connections={server_connections}")
+
+    def handle(self, *args, **options):
+        self.load_dataset(options["seed"])
+        default = connections[DEFAULT_DB_ALIAS]
+        if default.in_atomic_block:
+            raise CommandError("Run outside of a transaction, the benchmark switches the database connection.")
+
+        settings_dict = default.settings_dict
+        default.close()
+        try:
+            for name, policy_settings in self.get_policies(settings_dict).items():
+                self.measure_policy(name, policy_settings, options)
+        finally:
+            connections[DEFAULT_DB_ALIAS] = default
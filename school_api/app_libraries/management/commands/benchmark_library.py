@@ -0,0 +1,165 @@
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Exists, Max, Min, OuterRef
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from school_api.app_libraries.api.serializers import BookSerializer
+from school_api.app_libraries.api.serializers.librarian import (
+    ListStudentBorrowSerializer,
+    StudentBorrowCreationSerializer,
+)
+from school_api.app_libraries.api.views import ListBook
+from school_api.app_libraries.api.views.librarian import (
+    ListStudentBorrow,
+    ListStudentBorrowHistory,
+    StudentBorrowExtend,
+    StudentBorrowReturn,
+)
+from school_api.app_libraries.bussiness_logics.books import BookBL
+from school_api.app_libraries.caches import bump_catalog_version
+from school_api.app_libraries.models import Book, BorrowHistory
+from school_api.app_libraries.paginations import BookPagination
+from school_api.app_libraries.seeders import SEED_LIBRARIAN_USERNAME, SEED_STUDENT_PREFIX
+from school_api.bases.benchmarks import (
+    format_comparison,
+    get_server_name,
+    load_report,
+    measure,
+    rolled_back,
+    write_report,
+)
+from school_api.users.models import User
+
+SEARCH_TERMS = ["history", "science", "develop", "management", "john", "analysis"]
+SAMPLE_SIZE = 500
+
+
+class Command(BaseCommand):
+    help = (
+        "Micro-benchmarks of the library serializers and BookBL, then of the catalog and borrow endpoints, "
+        "against the `seed_library` dataset. Writes are rolled back, the dataset is left untouched."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--seed", type=int, default=0, help="Same seed, same sampled books and students.")
+        parser.add_argument("--only", action="append", help="Run the benchmarks starting with this name.")
+        parser.add_argument("--output", help="Write the results as a JSON report.")
+        parser.add_argument("--compare", help="JSON report of an earlier run to compare against.")
+
+    def load_dataset(self, seed):
+        self.random = random.Random(seed)
+        self.librarian = User.objects.filter(username=SEED_LIBRARIAN_USERNAME).first()
+        if self.librarian is None:
+            raise CommandError("No benchmark dataset, run `manage.py seed_library` first.")
+
+        pks = Book.objects.aggregate(min_pk=Min("pk"), max_pk=Max("pk"))
+        pk_range = range(pks["min_pk"] or 0, (pks["max_pk"] or -1) + 1)
+        book_ids = self.random.sample(pk_range, min(SAMPLE_SIZE, len(pk_range)))
+        self.books = list(Book.objects.filter(pk__in=book_ids).order_by("pk").defer("search_vector"))
+        self.students = list(
+            User.objects.filter(username__startswith=SEED_STUDENT_PREFIX).order_by("pk")[:SAMPLE_SIZE]
+        )
+        self.active_borrows = list(
+            BorrowHistory.objects.filter(
+                is_borrowed=True, count_extend=0, user_student__username__startswith=SEED_STUDENT_PREFIX
+            )
+            # the return validation rejects a book the student already returned once
+            .exclude(
+                Exists(
+                    BorrowHistory.objects.filter(
+                        user_student=OuterRef("user_student"), book=OuterRef("book"), is_borrowed=False
+                    )
+                )
+            )
+            .select_related("book", "user_student")
+            .order_by("pk")[:SAMPLE_SIZE]
+        )
+        if not self.books or not self.students or not self.active_borrows:
+            raise CommandError("The benchmark dataset needs books, students and active loans.")
+        self.count_page = max(1, min(100, Book.objects.count() // BookPagination.page_size))
+        self.factory = APIRequestFactory(SERVER_NAME=get_server_name())
+
+    def call_view(self, view, method, path, data=None, **kwargs):
+        request = getattr(self.factory, method)(path, data, format="json" if method != "get" else None)
+        force_authenticate(request, self.librarian)
+        response = view(request, **kwargs)
+        response.render()
+        if response.status_code >= 400:
+            raise CommandError(f"{method.upper()} {path} answered {response.status_code}: {response.data}")
+        return response
+
+    def get_benchmarks(self):
+        book_bl = BookBL()
+        list_book = ListBook.as_view()
+        list_borrow = ListStudentBorrow.as_view()
+        list_borrow_history = ListStudentBorrowHistory.as_view()
+        borrow_return = StudentBorrowReturn.as_view()
+        borrow_extend = StudentBorrowExtend.as_view()
+        page_borrows = self.active_borrows[:10]
+
+        def borrow_books():
+            student = self.random.choice(self.students)
+            book_uuids = [str(book.uuid) for book in self.random.sample(self.books, 3)]
+            self.call_view(list_borrow, "post", "/", {"book_uuids": book_uuids}, username=student.username)
+
+        def validate_borrow():
+            serializer = StudentBorrowCreationSerializer(
+                data={"book_uuids": [str(book.uuid) for book in self.random.sample(self.books, 3)]},
+                context={"user_student": self.random.choice(self.students)},
+            )
+            serializer.is_valid(raise_exception=True)
+
+        def update_borrow(view):
+            borrow = self.random.choice(self.active_borrows)
+            data = {"book_uuids": [str(borrow.book.uuid)]}
+            self.call_view(view, "patch", "/", data, username=borrow.user_student.username)
+
+        def list_books(**params):
+            # a new catalog version per call, every page is rendered from the database
+            bump_catalog_version()
+            self.call_view(list_book, "get", "/", params)
+
+        return {
+            "serializer.book-list": lambda: BookSerializer(self.books[:10], many=True).data,
+            "serializer.borrow-list": lambda: ListStudentBorrowSerializer(page_borrows, many=True).data,
+            "serializer.borrow-create.validate": rolled_back(validate_borrow),
+            "bl.sync-qty-for-borrowed-book": rolled_back(
+                lambda: book_bl.sync_qty_for_borrowed_book([BorrowHistory(book=book) for book in self.books[:10]])
+            ),
+            "bl.sync-qty-for-returned-book": rolled_back(
+                lambda: book_bl.sync_qty_for_returned_book([BorrowHistory(book=book) for book in self.books[:10]])
+            ),
+            "bl.sync-nearest-return-date": rolled_back(lambda: book_bl.sync_nearest_return_date(page_borrows)),
+            "api.list-book": lambda: list_books(page=self.random.randint(1, self.count_page)),
+            "api.list-book.cached": lambda: self.call_view(list_book, "get", "/", {"page": 1}),
+            "api.list-book.search": lambda: list_books(q=self.random.choice(SEARCH_TERMS)),
+            "api.student-borrow.create": rolled_back(borrow_books),
+            "api.student-borrow.return": rolled_back(lambda: update_borrow(borrow_return)),
+            "api.student-borrow.extend": rolled_back(lambda: update_borrow(borrow_extend)),
+            "api.student-borrow.history": lambda: self.call_view(
+                list_borrow_history, "get", "/", username=self.random.choice(self.students).username
+            ),
+        }
+
+    def handle(self, *args, **options):
+        self.load_dataset(options["seed"])
+        baseline = load_report(options["compare"])["results"] if options["compare"] else {}
+
+        results = {}
+        for name, func in self.get_benchmarks().items():
+            if options["only"] and not any(name.startswith(prefix) for prefix in options["only"]):
+                continue
+            results[name] = measure(func, iterations=options["iterations"], warmup=options["warmup"])
+            self.stdout.write(format_comparison(name, results[name], baseline.get(name)))
+
+        if options["output"]:
+            write_report(
+                options["output"],
+                results,
+                books=Book.objects.count(),
+                students=User.objects.filter(username__startswith=SEED_STUDENT_PREFIX).count(),
+                borrows=BorrowHistory.objects.count(),
+            )
@@ -0,0 +1,61 @@
+import random
+from typing import Callable
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework.views import APIView
+
+from school_api.app_libraries.api.views import ListBook
+from school_api.app_libraries.api.views.librarian import ListStudentBorrow, ListStudentBorrowHistory
+from school_api.app_libraries.seeders import SEED_LIBRARIAN_USERNAME, SEED_STUDENT_PREFIX
+from school_api.bases.benchmarks import format_result, get_server_name, measure
+from school_api.users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure read endpoints in a transaction per request as with `ATOMIC_REQUESTS`, in autocommit, "
+        "and in a read-only transaction, against the `seed_library` dataset."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument("--warmup", type=int, default=10)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        librarian = User.objects.filter(username=SEED_LIBRARIAN_USERNAME).first()
+        usernames = list(
+            User.objects.filter(username__startswith=SEED_STUDENT_PREFIX).values_list("username", flat=True)[:500]
+        )
+        if librarian is None or not usernames:
+            raise CommandError("No benchmark dataset, run `manage.py seed_library` first.")
+
+        rng = random.Random(options["seed"])
+        factory = APIRequestFactory(SERVER_NAME=get_server_name())
+        endpoints: dict[str, tuple[type[APIView], Callable[[], dict]]] = {
+            "list-book.cached": (ListBook, lambda: {}),
+            "student-borrow": (ListStudentBorrow, lambda: {"username": rng.choice(usernames)}),
+            "student-borrow.history": (ListStudentBorrowHistory, lambda: {"username": rng.choice(usernames)}),
+        }
+
+        for name, (view_class, get_kwargs) in endpoints.items():
+            policies = {
+                # what the request handler does with `ATOMIC_REQUESTS` for a view not opted out
+                "atomic-requests": transaction.atomic(view_class.as_view()),
+                "autocommit": view_class.as_view(),
+                "read-only": view_class.as_view(read_only_transaction=True),
+            }
+            for policy, view in policies.items():
+
+                def call_view():
+                    request = factory.get("/")
+                    force_authenticate(request, librarian)
+                    response = view(request, **get_kwargs())
+                    response.render()
+                    if response.status_code >= 400:
+                        raise CommandError(f"{name} answered {response.status_code}: {response.data}")
+
+                result = measure(call_view, iterations=options["iterations"], warmup=options["warmup"])
+                self.stdout.write(format_result(f"{name} {policy}", result))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from school_api.app_libraries.caches import get_catalog_cache_stats, get_catalog_version
+
+
+class Command(BaseCommand):
+    help = "Show the hit and miss counters of the book catalog response cache."
+
+    def handle(self, *args, **options):
+        stats = get_catalog_cache_stats()
+        self.stdout.write(f"version={get_catalog_version()}")
+        self.stdout.write(f"hit={stats['hit']} miss={stats['miss']} hit_ratio={stats['hit_ratio']:.2%}")
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from school_api.app_libraries.exports import (
+    EXPORT_CHUNK_SIZE,
+    EXPORT_FORMATS,
+    get_export_queryset,
+    iter_export_rows,
+    render_export,
+)
+
+
+class Command(BaseCommand):
+    help = "Stream every borrow history with its book and student as CSV or NDJSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="csv", dest="export_format")
+        parser.add_argument("--output", help="Write to this file instead of stdout.")
+        parser.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+        parser.add_argument("--only-borrowed", action="store_true", help="Export active loans only.")
+
+    def handle(self, *args, **options):
+        filters = {"is_borrowed": True} if options["only_borrowed"] else {}
+        rows = iter_export_rows(get_export_queryset(**filters), chunk_size=options["chunk_size"])
+        lines = render_export(rows, options["export_format"])
+
+        if not options["output"]:
+            for line in lines:
+                self.stdout.write(line, ending="")
+            return
+
+        with open(options["output"], "w", newline="") as output:
+            output.writelines(lines)
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from school_api.app_libraries.imports import IMPORT_FORMATS, BookImportError, import_books
+
+
+class Command(BaseCommand):
+    help = "Bulk upsert books from a CSV, JSON or NDJSON file through PostgreSQL COPY."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--format", choices=IMPORT_FORMATS, dest="import_format")
+        parser.add_argument(
+            "--replace-quantity",
+            action="store_true",
+            help="Overwrite the stock of existing books instead of adding the imported quantity.",
+        )
+
+    def handle(self, *args, **options):
+        import_format = options["import_format"] or options["path"].rsplit(".", 1)[-1].lower()
+        if import_format not in IMPORT_FORMATS:
+            raise CommandError("Unknown file extension, pass the format with --format.")
+
+        with open(options["path"], newline="", encoding="utf-8-sig") as file:
+            try:
+                result = import_books(file, import_format, replace_quantity=options["replace_quantity"])
+            except BookImportError as e:
+                raise CommandError(str(e))
+
+        for error in result["errors"]:
+            self.stderr.write(error)
+        self.stdout.write(
+            "inserted={inserted} updated={updated} duplicate={duplicate} rejected={rejected}".format(**result)
+        )
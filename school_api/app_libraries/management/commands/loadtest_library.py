@@ -0,0 +1,172 @@
+import random
+import threading
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.db.models import Max, Min
+from django.test import Client
+from django.urls import reverse
+
+from school_api.app_libraries.models import Book
+from school_api.app_libraries.paginations import BookPagination
+from school_api.app_libraries.seeders import SEED_LIBRARIAN_USERNAME, SEED_STUDENT_PREFIX
+from school_api.bases.benchmarks import format_comparison, get_server_name, load_report, summarize, write_report
+from school_api.users.models import User
+
+SEARCH_TERMS = ["history", "science", "develop", "management", "john", "analysis"]
+# share of every action in the traffic of a virtual user
+SCENARIO = {
+    "browse": 50,
+    "search": 20,
+    "history": 10,
+    "borrow": 10,
+    "return": 7,
+    "extend": 3,
+}
+
+
+class VirtualUser:
+    """
+    A librarian desk serving its own students, browsing the catalog between checkouts and returns.
+
+    Only the books it borrowed are returned or extended, so concurrent users never race on a loan.
+    """
+
+    def __init__(self, seed, librarian, students, books, count_page):
+        self.random = random.Random(seed)
+        # a remote address outside of `INTERNAL_IPS`, the debug toolbar would record every request
+        self.client = Client(SERVER_NAME=get_server_name(), REMOTE_ADDR="192.0.2.1")
+        self.client.force_login(librarian)
+        self.students = students
+        self.books = books
+        self.count_page = count_page
+        self.borrowed = []
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def request(self, action, method, path, data=None):
+        started_at = time.perf_counter()
+        if method == "get":
+            response = self.client.get(path, data)
+        else:
+            response = getattr(self.client, method)(path, data, content_type="application/json")
+        self.samples[action].append((time.perf_counter() - started_at) * 1000)
+        if response.status_code >= 400:
+            self.errors[action] += 1
+        return response
+
+    def update_borrow(self, action, url_name, username, book_uuid):
+        url = reverse(f"api_library:{url_name}", args=[username])
+        return self.request(action, "patch", url, {"book_uuids": [book_uuid]})
+
+    def run_action(self, action):
+        if action == "browse":
+            self.request(
+                action, "get", reverse("api_library:list-book"), {"page": self.random.randint(1, self.count_page)}
+            )
+        elif action == "search":
+            self.request(action, "get", reverse("api_library:list-book"), {"q": self.random.choice(SEARCH_TERMS)})
+        elif action == "history":
+            url = reverse("api_library:list-student-borrow-history", args=[self.random.choice(self.students)])
+            self.request(action, "get", url)
+        elif action == "borrow":
+            username, book_uuid = self.random.choice(self.students), str(self.random.choice(self.books))
+            url = reverse("api_library:list-student-borrow", args=[username])
+            if self.request(action, "post", url, {"book_uuids": [book_uuid]}).status_code == 201:
+                self.borrowed.append((username, book_uuid))
+        elif action == "return" and self.borrowed:
+            self.update_borrow(action, "student-borrow-return", *self.borrowed.pop(0))
+        elif action == "extend" and self.borrowed:
+            self.update_borrow(action, "student-borrow-extend", *self.random.choice(self.borrowed))
+
+    def run(self, deadline):
+        actions, weights = list(SCENARIO), list(SCENARIO.values())
+        try:
+            while time.monotonic() < deadline:
+                self.run_action(self.random.choices(actions, weights)[0])
+            # leave the stock as it was found
+            while self.borrowed:
+                self.update_borrow("return", "student-borrow-return", *self.borrowed.pop())
+        finally:
+            connections.close_all()
+
+
+class Command(BaseCommand):
+    help = (
+        "Scripted load against the `seed_library` dataset, concurrent virtual users mixing catalog browsing "
+        "with borrow, return and extend traffic through the whole Django stack. Reports p50/p95/p99 per action."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=8, help="Concurrent virtual users, one thread each.")
+        parser.add_argument("--duration", type=float, default=30, help="Seconds of traffic.")
+        parser.add_argument("--seed", type=int, default=0, help="Same seed, same scripted traffic per user.")
+        parser.add_argument("--output", help="Write the results as a JSON report.")
+        parser.add_argument("--compare", help="JSON report of an earlier run to compare against.")
+
+    def get_virtual_users(self, count_user, seed):
+        librarian = User.objects.filter(username=SEED_LIBRARIAN_USERNAME).first()
+        if librarian is None:
+            raise CommandError("No benchmark dataset, run `manage.py seed_library` first.")
+
+        usernames = list(
+            User.objects.filter(username__startswith=SEED_STUDENT_PREFIX)
+            .order_by("pk")
+            .values_list("username", flat=True)
+        )
+        if len(usernames) < count_user:
+            raise CommandError("Seed at least one student per virtual user.")
+
+        rng = random.Random(seed)
+        pks = Book.objects.aggregate(min_pk=Min("pk"), max_pk=Max("pk"))
+        pk_range = range(pks["min_pk"] or 0, (pks["max_pk"] or -1) + 1)
+        book_ids = rng.sample(pk_range, min(5000, len(pk_range)))
+        books = list(Book.objects.filter(pk__in=book_ids, quantity__gt=0).values_list("uuid", flat=True))
+
+        count_page = max(1, min(50, Book.objects.count() // BookPagination.page_size))
+        # every user serves its own slice of students, no two users hold the same loan
+        return [
+            VirtualUser(seed + i, librarian, usernames[i::count_user], books, count_page) for i in range(count_user)
+        ]
+
+    def handle(self, *args, **options):
+        virtual_users = self.get_virtual_users(options["users"], options["seed"])
+        deadline = time.monotonic() + options["duration"]
+        threads = [threading.Thread(target=user.run, args=[deadline]) for user in virtual_users]
+        started_at = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started_at
+
+        samples: defaultdict[str, list[float]] = defaultdict(list)
+        errors: defaultdict[str, int] = defaultdict(int)
+        for user in virtual_users:
+            for action, action_samples in user.samples.items():
+                samples[action] += action_samples
+                errors[action] += user.errors[action]
+
+        baseline = load_report(options["compare"])["results"] if options["compare"] else {}
+        results = {}
+        for action in SCENARIO:
+            if not samples[action]:
+                continue
+            results[action] = {**summarize(samples[action]), "errors": errors[action]}
+            self.stdout.write(
+                f"{format_comparison(action, results[action], baseline.get(action))}  errors={errors[action]}"
+            )
+
+        count_request = sum(len(action_samples) for action_samples in samples.values())
+        self.stdout.write(f"{count_request} requests in {elapsed:.1f}s, {count_request / elapsed:.1f} req/s")
+        if options["output"]:
+            write_report(
+                options["output"],
+                results,
+                users=options["users"],
+                duration=elapsed,
+                requests=count_request,
+                throughput=count_request / elapsed,
+            )
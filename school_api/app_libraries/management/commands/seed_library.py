@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from school_api.app_libraries.seeders import SEED_LIBRARIAN_USERNAME, SEED_PASSWORD, LibrarySeeder
+
+
+class Command(BaseCommand):
+    help = "Grow the database up to a reproducible benchmark dataset of books, students and loans."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--books", type=int, default=1_000_000)
+        parser.add_argument("--students", type=int, default=10_000)
+        parser.add_argument("--active-borrows", type=int, default=20_000)
+        parser.add_argument("--returned-borrows", type=int, default=200_000)
+        parser.add_argument("--seed", type=int, default=0, help="Same seed, same dataset.")
+
+    def handle(self, *args, **options):
+        seeder = LibrarySeeder(seed=options["seed"], log=self.stdout.write)
+        seeder.seed(options["books"], options["students"], options["active_borrows"], options["returned_borrows"])
+        self.stdout.write(
+            f"Seeded, librarian {SEED_LIBRARIAN_USERNAME!r} and students sign in with {SEED_PASSWORD!r}."
+        )
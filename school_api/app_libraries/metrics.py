@@ -0,0 +1,15 @@
+from django.db import transaction
+from prometheus_client import Counter
+
+BORROW_EVENTS = Counter("library_borrow_events", "Books borrowed, returned or extended.", ["action"])
+CACHE_REQUESTS = Counter("library_cache_requests", "Lookups in the library caches.", ["cache", "result"])
+
+
+def record_borrow_event(action, count):
+    """Count `count` books for `action` once the transaction commits, a rolled back request counts nothing."""
+    if count:
+        transaction.on_commit(lambda: BORROW_EVENTS.labels(action).inc(count))
+
+
+def record_cache_request(cache, is_hit):
+    CACHE_REQUESTS.labels(cache, "hit" if is_hit else "miss").inc()
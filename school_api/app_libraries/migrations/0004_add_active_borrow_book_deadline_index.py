@@ -0,0 +1,20 @@
+# Generated by Django 4.2.5 on 2026-10-18 09:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("app_libraries", "0003_adjust_attr_deadline_date"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="borrowhistory",
+            index=models.Index(
+                condition=models.Q(("is_borrowed", True)),
+                fields=["book", "deadline_date"],
+                name="active_borrow_book_deadline",
+            ),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.5 on 2026-10-18 09:21
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("app_libraries", "0004_add_active_borrow_book_deadline_index"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="borrowhistory",
+            name="user_student",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.PROTECT,
+                related_name="borrow_histories",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="borrowhistory",
+            index=models.Index(
+                condition=models.Q(("is_borrowed", True)),
+                fields=["user_student", "created_at"],
+                name="active_borrow_student_created",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="borrowhistory",
+            index=models.Index(fields=["user_student", "created_at"], name="borrow_student_created"),
+        ),
+        migrations.AddIndex(
+            model_name="borrowhistory",
+            index=models.Index(fields=["user_student", "book"], name="borrow_student_book"),
+        ),
+    ]
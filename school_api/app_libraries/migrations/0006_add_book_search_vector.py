@@ -0,0 +1,65 @@
+# Generated by Django 4.2.5 on 2026-10-18 09:32
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.operations
+import django.contrib.postgres.search
+from django.db import migrations
+import django.db.models.functions.text
+
+SEARCH_VECTOR_TRIGGER_SQL = """
+CREATE FUNCTION library_books_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector := to_tsvector('simple', coalesce(NEW.title, '') || ' ' || coalesce(NEW.author, ''));
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER library_books_search_vector_update
+BEFORE INSERT OR UPDATE OF title, author, search_vector ON library_books
+FOR EACH ROW EXECUTE FUNCTION library_books_search_vector();
+
+UPDATE library_books SET search_vector = NULL;
+"""
+
+SEARCH_VECTOR_TRIGGER_REVERSE_SQL = """
+DROP TRIGGER IF EXISTS library_books_search_vector_update ON library_books;
+DROP FUNCTION IF EXISTS library_books_search_vector();
+"""
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("app_libraries", "0005_add_borrow_student_indexes"),
+    ]
+
+    operations = [
+        django.contrib.postgres.operations.TrigramExtension(),
+        migrations.AddField(
+            model_name="book",
+            name="search_vector",
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(SEARCH_VECTOR_TRIGGER_SQL, SEARCH_VECTOR_TRIGGER_REVERSE_SQL),
+        migrations.AddIndex(
+            model_name="book",
+            index=django.contrib.postgres.indexes.GinIndex(fields=["search_vector"], name="book_search_vector"),
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("title"), name="gin_trgm_ops"
+                ),
+                name="book_title_trgm",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="book",
+            index=django.contrib.postgres.indexes.GinIndex(
+                django.contrib.postgres.indexes.OpClass(
+                    django.db.models.functions.text.Upper("author"), name="gin_trgm_ops"
+                ),
+                name="book_author_trgm",
+            ),
+        ),
+    ]
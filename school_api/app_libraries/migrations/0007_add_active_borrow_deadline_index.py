@@ -0,0 +1,20 @@
+# Generated by Django 4.2.5 on 2026-10-18 09:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("app_libraries", "0006_add_book_search_vector"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="borrowhistory",
+            index=models.Index(
+                condition=models.Q(("is_borrowed", True)),
+                fields=["deadline_date", "id"],
+                name="active_borrow_deadline",
+            ),
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 4.2.5 on 2026-10-18 10:19
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+BORROW_HISTORY_COLUMNS = (
+    "id, created_at, updated_at, uuid, count_extend, is_borrowed, deadline_date, book_id, user_student_id"
+)
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("app_libraries", "0007_add_active_borrow_deadline_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CombinedBorrowHistory",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("uuid", models.UUIDField()),
+                ("count_extend", models.PositiveIntegerField()),
+                ("is_borrowed", models.BooleanField()),
+                ("deadline_date", models.DateField(blank=True, null=True)),
+            ],
+            options={
+                "db_table": "library_borrow_histories_combined",
+                "managed": False,
+            },
+        ),
+        migrations.CreateModel(
+            name="ArchivedBorrowHistory",
+            fields=[
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("id", models.BigIntegerField(primary_key=True, serialize=False)),
+                ("uuid", models.UUIDField(unique=True)),
+                ("count_extend", models.PositiveIntegerField(default=0)),
+                ("is_borrowed", models.BooleanField(default=False)),
+                ("deadline_date", models.DateField(blank=True, null=True)),
+                (
+                    "book",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="archived_borrow_histories",
+                        to="app_libraries.book",
+                    ),
+                ),
+                (
+                    "user_student",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="archived_borrow_histories",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "db_table": "library_borrow_histories_archive",
+                "indexes": [models.Index(fields=["user_student", "created_at"], name="archive_student_created")],
+            },
+        ),
+        migrations.RunSQL(
+            sql=f"""
+            CREATE VIEW library_borrow_histories_combined AS
+            SELECT {BORROW_HISTORY_COLUMNS} FROM library_borrow_histories
+            UNION ALL
+            SELECT {BORROW_HISTORY_COLUMNS} FROM library_borrow_histories_archive;
+            """,
+            reverse_sql="DROP VIEW IF EXISTS library_borrow_histories_combined;",
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.5 on 2026-10-18 11:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("app_libraries", "0008_add_borrow_history_archive"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="borrowhistory",
+            name="active_borrow_deadline",
+        ),
+        migrations.AddIndex(
+            model_name="borrowhistory",
+            index=models.Index(
+                condition=models.Q(("is_borrowed", True)),
+                fields=["user_student", "deadline_date", "id"],
+                name="active_borrow_student_deadline",
+            ),
+        ),
+    ]
@@ -1,6 +1,9 @@
 from uuid import uuid4
 
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
+from django.db.models.functions import Upper
 
 from school_api.bases.models import BaseModel, SafeDeleteModel
 from school_api.users.models import User
@@ -12,9 +15,16 @@ class Book(SafeDeleteModel):
     author = models.CharField(max_length=255)
     quantity = models.PositiveIntegerField(default=0)
     nearest_return_date = models.DateField(blank=True, null=True)
+    # maintained by the `library_books_search_vector_update` trigger from title and author
+    search_vector = SearchVectorField(null=True, editable=False)
 
     class Meta:
         db_table = "library_books"
+        indexes = [
+            GinIndex(fields=["search_vector"], name="book_search_vector"),
+            GinIndex(OpClass(Upper("title"), name="gin_trgm_ops"), name="book_title_trgm"),
+            GinIndex(OpClass(Upper("author"), name="gin_trgm_ops"), name="book_author_trgm"),
+        ]
 
     def __str__(self):
         return self.title
@@ -22,7 +32,8 @@ class Book(SafeDeleteModel):
 
 class BorrowHistory(BaseModel):
     uuid = models.UUIDField(default=uuid4, unique=True)
-    user_student = models.ForeignKey(User, on_delete=models.PROTECT, related_name="borrow_histories")
+    # indexed through the `borrow_student_*` composite indexes below
+    user_student = models.ForeignKey(User, on_delete=models.PROTECT, related_name="borrow_histories", db_index=False)
     book = models.ForeignKey(Book, on_delete=models.PROTECT, related_name="borrow_histories")
     count_extend = models.PositiveIntegerField(default=0)
     is_borrowed = models.BooleanField(default=True, db_index=True)
@@ -30,6 +41,71 @@ class BorrowHistory(BaseModel):
 
     class Meta:
         db_table = "library_borrow_histories"
+        indexes = [
+            models.Index(
+                fields=["book", "deadline_date"],
+                condition=models.Q(is_borrowed=True),
+                name="active_borrow_book_deadline",
+            ),
+            # keyset scan of the due loans by the reminder job, student by student, see `BorrowReminderBL`
+            models.Index(
+                fields=["user_student", "deadline_date", "id"],
+                condition=models.Q(is_borrowed=True),
+                name="active_borrow_student_deadline",
+            ),
+            models.Index(
+                fields=["user_student", "created_at"],
+                condition=models.Q(is_borrowed=True),
+                name="active_borrow_student_created",
+            ),
+            models.Index(fields=["user_student", "created_at"], name="borrow_student_created"),
+            models.Index(fields=["user_student", "book"], name="borrow_student_book"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_student.name} - {self.book.title}"
+
+    @property
+    def borrowed_at(self):
+        return self.created_at.date()
+
+
+class ArchivedBorrowHistory(BaseModel):
+    """Returned loans moved out of `library_borrow_histories` by `BorrowArchiveBL`, ids are kept."""
+
+    id = models.BigIntegerField(primary_key=True)
+    uuid = models.UUIDField(unique=True)
+    user_student = models.ForeignKey(
+        User, on_delete=models.PROTECT, related_name="archived_borrow_histories", db_index=False
+    )
+    book = models.ForeignKey(Book, on_delete=models.PROTECT, related_name="archived_borrow_histories")
+    count_extend = models.PositiveIntegerField(default=0)
+    is_borrowed = models.BooleanField(default=False)
+    deadline_date = models.DateField(blank=True, null=True)
+
+    class Meta:
+        db_table = "library_borrow_histories_archive"
+        indexes = [
+            models.Index(fields=["user_student", "created_at"], name="archive_student_created"),
+        ]
+
+
+class CombinedBorrowHistory(BaseModel):
+    """
+    Read only union of the active and the archived loans, backed by the `library_borrow_histories_combined`
+    view. Filters on the student are pushed down to the indexes of both tables.
+    """
+
+    uuid = models.UUIDField()
+    user_student = models.ForeignKey(User, on_delete=models.DO_NOTHING, related_name="+")
+    book = models.ForeignKey(Book, on_delete=models.DO_NOTHING, related_name="+")
+    count_extend = models.PositiveIntegerField()
+    is_borrowed = models.BooleanField()
+    deadline_date = models.DateField(blank=True, null=True)
+
+    class Meta:
+        managed = False
+        db_table = "library_borrow_histories_combined"
 
     def __str__(self):
         return f"{self.user_student.name} - {self.book.title}"
@@ -1,4 +1,4 @@
-from rest_framework.pagination import PageNumberPagination
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 
 
 class BookPagination(PageNumberPagination):
@@ -7,7 +7,61 @@ class BookPagination(PageNumberPagination):
     max_page_size = 20
 
 
+class BorrowCursorPagination(CursorPagination):
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 20
+    ordering = ("created_at", "id")
+
+    def get_ordering(self, request, queryset, view):
+        # keep the keyset stable, the view `ordering` only applies to page number pagination
+        return self.ordering
+
+
 class BorrowPagination(PageNumberPagination):
+    """
+    Page number pagination, or keyset pagination on `(created_at, id)` on request.
+
+    Clients opt in with `?pagination=cursor` then follow the `next`/`previous` links,
+    cursor pages skip the `COUNT(*)` and the `OFFSET` scan of long borrow histories.
+    """
+
     page_size = 10
     page_size_query_param = "page_size"
     max_page_size = 20
+    pagination_query_param = "pagination"
+    cursor_pagination_class = BorrowCursorPagination
+
+    def get_cursor_paginator(self, request):
+        cursor_paginator = self.cursor_pagination_class()
+        if (
+            request.query_params.get(self.pagination_query_param) == "cursor"
+            or cursor_paginator.cursor_query_param in request.query_params
+        ):
+            return cursor_paginator
+        return None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = self.get_cursor_paginator(request)
+        if self.cursor_paginator:
+            return self.cursor_paginator.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        parameters = super().get_schema_operation_parameters(view)
+        parameters.append(
+            {
+                "name": self.pagination_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Set to `cursor` for keyset pagination, pages are then followed through `next`.",
+                "schema": {"type": "string", "enum": ["cursor"]},
+            }
+        )
+        parameters.append(self.cursor_pagination_class().get_schema_operation_parameters(view)[0])
+        return parameters
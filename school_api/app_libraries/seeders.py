@@ -0,0 +1,128 @@
+import random
+from datetime import timedelta
+from itertools import islice
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.test import override_settings
+from django.utils import timezone
+
+from school_api.app_libraries.bussiness_logics.books import BookBL
+from school_api.app_libraries.imports import BookImporter
+from school_api.app_libraries.models import Book, BorrowHistory
+from school_api.users.models import User
+
+SEED_STUDENT_PREFIX = "bench-student-"
+SEED_LIBRARIAN_USERNAME = "bench-librarian"
+SEED_PASSWORD = "bench-password"
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class LibrarySeeder:
+    """
+    Grow the database up to a benchmark dataset, built with the test factories.
+
+    The same `seed` builds the same books, students and loans, a seeder run only adds what is missing
+    so the dataset can be grown step by step. Seeded users share the password `SEED_PASSWORD`.
+    The factories and `factory_boy` are imported by the seeding itself, they come with the local requirements.
+    """
+
+    def __init__(self, seed=0, batch_size=5000, log=None):
+        import factory.random
+
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.log = log or (lambda message: None)
+        factory.random.reseed_random(seed)
+
+    def seed_books(self, count_book):
+        from school_api.app_libraries.tests.factories import BookFactory
+
+        count_missing = count_book - Book.objects.count()
+        if count_missing <= 0:
+            return
+
+        self.log(f"Seeding {count_missing} books...")
+        # streamed through the COPY import, saving a million books one by one takes hours
+        rows = (
+            {"uuid": str(book.uuid), "title": book.title[:255], "author": book.author, "quantity": book.quantity}
+            for book in (BookFactory.build() for _ in range(count_missing))
+        )
+        BookImporter().run(rows)
+
+    def seed_students(self, count_student):
+        from school_api.users.tests.factories import UserFactory
+
+        seeded = User.objects.filter(username__startswith=SEED_STUDENT_PREFIX).count()
+        if seeded >= count_student:
+            return
+
+        self.log(f"Seeding {count_student - seeded} students...")
+        password = make_password(SEED_PASSWORD)
+        for batch in batched(range(seeded, count_student), self.batch_size):
+            # the factory hashes a password per user, only the cheapest hasher keeps that fast
+            with override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"]):
+                students = [UserFactory.build(username=f"{SEED_STUDENT_PREFIX}{i}", role="student") for i in batch]
+            for student in students:
+                student.password = password
+            User.objects.bulk_create(students, ignore_conflicts=True)
+
+    def seed_librarian(self):
+        librarian, created = User.objects.get_or_create(
+            username=SEED_LIBRARIAN_USERNAME, defaults={"role": "librarian"}
+        )
+        if created:
+            librarian.set_password(SEED_PASSWORD)
+            librarian.save(update_fields=["password"])
+        return librarian
+
+    def get_seeded_borrows(self):
+        return BorrowHistory.objects.filter(user_student__username__startswith=SEED_STUDENT_PREFIX)
+
+    def seed_borrows(self, count_active, count_returned):
+        """Active loans hold distinct books so no stock runs out, returned loans pick any book."""
+        student_ids = list(User.objects.filter(username__startswith=SEED_STUDENT_PREFIX).values_list("pk", flat=True))
+        book_ids = list(Book.objects.values_list("pk", flat=True))
+        if not student_ids or not book_ids:
+            return
+
+        count_active -= self.get_seeded_borrows().filter(is_borrowed=True).count()
+        if count_active > 0:
+            self.log(f"Seeding {count_active} active loans...")
+            deadline_date = timezone.localtime().date() + timedelta(days=14)
+            active_book_ids = self.random.sample(book_ids, min(count_active, len(book_ids)))
+            for batch in batched(active_book_ids, self.batch_size):
+                self.create_borrows(batch, student_ids, is_borrowed=True, deadline_date=deadline_date)
+
+        count_returned -= self.get_seeded_borrows().filter(is_borrowed=False).count()
+        if count_returned > 0:
+            self.log(f"Seeding {count_returned} returned loans...")
+            returned_book_ids = (self.random.choice(book_ids) for _ in range(count_returned))
+            for batch in batched(returned_book_ids, self.batch_size):
+                self.create_borrows(batch, student_ids, is_borrowed=False, deadline_date=None)
+
+    @transaction.atomic
+    def create_borrows(self, book_ids, student_ids, **kwargs):
+        from school_api.app_libraries.tests.factories import StudentBorrowFactory
+
+        borrows = BorrowHistory.objects.bulk_create(
+            [
+                StudentBorrowFactory.build(
+                    book=Book(pk=book_id), user_student=User(pk=self.random.choice(student_ids)), **kwargs
+                )
+                for book_id in book_ids
+            ]
+        )
+        if kwargs["is_borrowed"]:
+            BookBL().sync_qty_for_borrowed_book(borrows)
+
+    def seed(self, count_book, count_student, count_active=0, count_returned=0):
+        self.seed_books(count_book)
+        self.seed_students(count_student)
+        self.seed_librarian()
+        self.seed_borrows(count_active, count_returned)
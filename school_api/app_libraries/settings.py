@@ -3,6 +3,14 @@ BORROW_MIN_BOOK = 1
 BORROW_MAX_BOOK = 10
 BORROW_DEADLINE_DAYS = 30
 BORROW_EXTEND_MAX_COUNT = 1
+BORROW_BULK_MAX_STUDENT = 100
+BORROW_BULK_MAX_SCAN = 5000
+BORROW_REMINDER_DAYS = 3
+BORROW_REMINDER_CHUNK_SIZE = 1000
+BORROW_ARCHIVE_DAYS = 365
+BORROW_ARCHIVE_CHUNK_SIZE = 5000
+CACHE_ALIAS = "catalog"
+CATALOG_CACHE_TIMEOUT = 60 * 5
 
 # message
 MSG_STUDENT_NOT_FOUND = "Student not found."
@@ -11,8 +19,20 @@ MSG_BORROW_RETURN_SUCCESS = "Success return {} borrowed book from {}."
 MSG_BORROW_EXTEND_SUCCESS = "Success extend {} borrowed book from {}."
 MSG_BORROW_INVALID_MIN_COUNT = "Choose at least {} book.".format(BORROW_MIN_BOOK)
 MSG_BORROW_INVALID_MAX_COUNT = "Exceed the quota, maximum {} books.".format(BORROW_MAX_BOOK)
-MSG_BORROW_INVALID_BOOK_UUID = "There are some books that cannot be found."
+MSG_BORROW_BULK_SUCCESS = "Success add {} borrowed book to {} students."
+MSG_BORROW_BULK_INVALID_MIN_STUDENT = "Choose at least 1 student."
+MSG_BORROW_BULK_INVALID_MAX_STUDENT = "Exceed the quota, maximum {} students.".format(BORROW_BULK_MAX_STUDENT)
+MSG_BORROW_BULK_RETURN_SUCCESS = "Success return {} borrowed book."
+MSG_BORROW_BULK_INVALID_MAX_SCAN = "Exceed the quota, maximum {} scans.".format(BORROW_BULK_MAX_SCAN)
+MSG_BORROW_SCAN_INVALID = "Scan needs a borrow_uuid, or a username and a book_uuid."
+MSG_BORROW_SCAN_NOT_FOUND = "Scanned book is not borrowed."
+MSG_BORROW_INVALID_BOOK_UUID = "Choosen book cannot be found. book uuid: {}"
 MSG_BORROW_INVALID_BOOK_QTY = "Choosen book out of stok. book title: {}"
 MSG_BORROW_BORROWED_YET = "Choosen book have been borrowed. book title: {}"
 MSG_BORROW_RETURNED_YET = "Choosen book have been returned. book title: {}"
 MSG_BORROW_INVALID_EXTEND = "Choosen book can't be extended. book title: {}"
+MSG_BORROW_REMINDER_SUBJECT = "Reminder: return your borrowed books"
+MSG_BORROW_REMINDER_BODY = "Hi {},\n\nPlease return or extend these borrowed books:\n{}\n"
+MSG_BORROW_REMINDER_BOOK = "- {} (due {})"
+MSG_BORROW_REMINDER_BOOK_OVERDUE = "- {} (overdue since {})"
+MSG_EXPORT_INVALID_FORMAT = "Invalid export format, available 'csv' & 'ndjson'."
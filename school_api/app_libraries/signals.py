@@ -0,0 +1,31 @@
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from school_api.app_libraries.bussiness_logics.students import StudentBL
+from school_api.app_libraries.caches import bump_catalog_version
+from school_api.app_libraries.models import Book
+from school_api.users.models import User
+
+
+@receiver([post_save, post_delete], sender=Book)
+def invalidate_catalog_cache(sender, **kwargs):
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(pre_save, sender=User)
+def forget_renamed_student_id(sender, instance, raw=False, **kwargs):
+    if not settings.LIBRARY_STUDENT_ID_CACHE_TIMEOUT or raw or instance.pk is None:
+        return
+
+    username = User.objects.filter(pk=instance.pk).values_list("username", flat=True).first()
+    if username and username != instance.username:
+        transaction.on_commit(partial(StudentBL().forget_student_id, username))
+
+
+@receiver(post_delete, sender=User)
+def forget_deleted_student_id(sender, instance, **kwargs):
+    StudentBL().forget_student_id(instance.username)
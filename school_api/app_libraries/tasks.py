@@ -0,0 +1,38 @@
+from datetime import timedelta
+
+from django.utils import timezone
+
+from config import celery_app
+from school_api.app_libraries import settings as app_settings
+from school_api.app_libraries.bussiness_logics.books import BookBL
+from school_api.app_libraries.bussiness_logics.borrows import BorrowArchiveBL, BorrowReminderBL
+
+
+@celery_app.task()
+def reconcile_nearest_return_date():
+    """Find and repair books whose `nearest_return_date` drifted from their active loans."""
+    return BookBL().reconcile_nearest_return_date()
+
+
+@celery_app.task()
+def send_borrow_reminder_batch(reminders):
+    """Email a batch of reminders built by `send_borrow_reminders`."""
+    return BorrowReminderBL().send_reminders(reminders)
+
+
+@celery_app.task()
+def send_borrow_reminders():
+    """Find the overdue and soon due loans, enqueue one reminder batch per chunk of loans instead of one per loan."""
+    count_borrow = 0
+    for reminders, count_chunk in BorrowReminderBL().iter_reminder_batches():
+        count_borrow += count_chunk
+        if reminders:
+            send_borrow_reminder_batch.delay(reminders)
+    return count_borrow
+
+
+@celery_app.task()
+def archive_borrow_histories():
+    """Move the loans returned more than `BORROW_ARCHIVE_DAYS` ago out of the hot borrow table."""
+    returned_before = timezone.now() - timedelta(days=app_settings.BORROW_ARCHIVE_DAYS)
+    return BorrowArchiveBL().archive_returned_borrows(returned_before, app_settings.BORROW_ARCHIVE_CHUNK_SIZE)
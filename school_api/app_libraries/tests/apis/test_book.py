@@ -1,8 +1,12 @@
+from django.db import connection
 from django.shortcuts import reverse
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APITestCase
 
-from school_api.app_libraries.tests.factories import BookFactory
+from school_api.app_libraries.bussiness_logics.books import BookBL
+from school_api.app_libraries.caches import get_catalog_cache_stats
+from school_api.app_libraries.tests.factories import BookFactory, StudentBorrowFactory
 from school_api.users.tests.factories import UserFactory
 
 
@@ -48,3 +52,87 @@ class ListBookTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["count"], 1)
         self.assertEqual(len(response.data["results"][0]), 5)
+
+    def test_success_with_filter_author(self):
+        response = self.client.get(self.complete_url + "?q=uncle john")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 3)
+        self.assertEqual(
+            {book["author"] for book in response.data["results"]},
+            {"Uncle John", "Uncle John Doe"},
+        )
+
+    def test_success_with_filter_typo(self):
+        response = self.client.get(self.complete_url + "?q=biologi")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 1)
+        self.assertEqual(response.data["results"][0]["title"], "Biology for beginner")
+
+    def test_success_with_filter_ranked_by_relevance(self):
+        BookFactory(title="Advance in Biologi")
+
+        response = self.client.get(self.complete_url + "?q=biology")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [book["title"] for book in response.data["results"]],
+            ["Biology for beginner", "Advance in Biologi"],
+        )
+
+    def test_success_with_filter_and_ordering(self):
+        response = self.client.get(self.complete_url + "?q=uncle john&ordering=-title")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [book["title"] for book in response.data["results"]],
+            ["Science for beginner", "Advance in Science", "Advance in Mathematics"],
+        )
+
+    def test_success_with_cached_page(self):
+        response = self.client.get(self.complete_url + "?q=Uncle  John")
+        self.assertEqual(response["X-Cache"], "MISS")
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.complete_url + "?q=uncle john&ordering=")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(response.data["count"], 3)
+        self.assertFalse([query for query in context.captured_queries if "library_books" in query["sql"]])
+        self.assertEqual(get_catalog_cache_stats(), {"hit": 1, "miss": 1, "hit_ratio": 0.5})
+
+    def test_success_with_cache_invalidated_by_book_change(self):
+        self.client.get(self.complete_url + "?q=biology")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            BookFactory(title="Biology in practice")
+        response = self.client.get(self.complete_url + "?q=biology")
+
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["count"], 2)
+
+    def test_success_with_cache_invalidated_by_stock_change(self):
+        book = BookFactory(title="Chemistry for beginner", quantity=1)
+        self.client.get(self.complete_url + "?q=chemistry")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            BookBL().sync_qty_for_borrowed_book([StudentBorrowFactory(book=book)])
+        response = self.client.get(self.complete_url + "?q=chemistry")
+
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["results"][0]["quantity"], 0)
+
+    def test_success_with_not_modified(self):
+        etag = self.client.get(self.complete_url + "?q=science")["ETag"]
+
+        response = self.client.get(self.complete_url + "?q=science", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            BookFactory(title="Science in practice")
+        response = self.client.get(self.complete_url + "?q=science", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 4)
@@ -64,6 +64,18 @@ class ListBorrowMeTest(APITestCase):
         self.assertEqual(len(response.data["results"][0]), 5)
         self.assertEqual(len(response.data["results"][0]["book"]), 5)
 
+    def test_success_with_not_modified(self):
+        self.client.force_login(self.user_student)
+        etag = self.client.get(self.complete_url)["ETag"]
+
+        response = self.client.get(self.complete_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        StudentBorrowFactory(user_student=self.user_student)
+        response = self.client.get(self.complete_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 7)
+
 
 class ListBorrowMeHistoryTest(APITestCase):
     def setUp(self):
@@ -1,8 +1,18 @@
+import csv
+import io
+import json
+from datetime import timedelta
+
+from django.db import connection
 from django.shortcuts import reverse
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
+from django.utils.http import http_date
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from school_api.app_libraries.bussiness_logics.borrows import BorrowArchiveBL
+from school_api.app_libraries.models import BorrowHistory
 from school_api.app_libraries.tests.factories import BookFactory, StudentBorrowFactory
 from school_api.users.tests.factories import UserFactory
 
@@ -73,6 +83,51 @@ class ListStudentBorrowTest(APITestCase):
         self.assertEqual(len(response.data["results"][0]), 5)
         self.assertEqual(len(response.data["results"][0]["book"]), 5)
 
+    def test_success_with_not_modified(self):
+        self.client.force_login(self.user_librarian)
+        response = self.client.get(self.complete_url)
+        self.assertNotIn("Last-Modified", response)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.complete_url, HTTP_IF_NONE_MATCH=response["ETag"])
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        borrow_queries = [
+            query["sql"] for query in context.captured_queries if "library_borrow_histories" in query["sql"]
+        ]
+        self.assertEqual(len(borrow_queries), 1)
+        self.assertIn("COUNT(", borrow_queries[0])
+
+    def test_success_with_modified_book(self):
+        self.client.force_login(self.user_librarian)
+        etag = self.client.get(self.complete_url)["ETag"]
+
+        self.book_1.quantity += 1
+        self.book_1.save()
+        response = self.client.get(self.complete_url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.data["count"], 6)
+
+    def test_success_with_newest_borrow_returned(self):
+        self.client.force_login(self.user_librarian)
+        response = self.client.get(self.complete_url)
+        etag = response["ETag"]
+
+        # the newest row leaves the list, the latest `updated_at` of the list moves backwards
+        newest = BorrowHistory.objects.filter(user_student=self.user_student, is_borrowed=True).latest("updated_at")
+        BorrowHistory.objects.filter(pk=newest.pk).update(is_borrowed=False)
+        response = self.client.get(
+            self.complete_url,
+            HTTP_IF_NONE_MATCH=etag,
+            HTTP_IF_MODIFIED_SINCE=http_date((timezone.now() + timedelta(days=1)).timestamp()),
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(response.data["count"], 5)
+
 
 class ListStudentBorrowHistoryTest(APITestCase):
     def setUp(self):
@@ -140,6 +195,41 @@ class ListStudentBorrowHistoryTest(APITestCase):
         self.assertEqual(len(response.data["results"][0]), 5)
         self.assertEqual(len(response.data["results"][0]["book"]), 5)
 
+    def test_success_with_cursor_pagination(self):
+        self.client.force_login(self.user_librarian)
+        response = self.client.get(self.complete_url + "?pagination=cursor&page_size=4")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("count", response.data)
+        self.assertIsNone(response.data["previous"])
+        self.assertEqual(len(response.data["results"]), 4)
+
+        results = response.data["results"]
+        while response.data["next"]:
+            response = self.client.get(response.data["next"])
+
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            results += response.data["results"]
+
+        self.assertEqual(len(results), 10)
+        self.assertEqual([result["borrowed_at"] for result in results], sorted(r["borrowed_at"] for r in results))
+        self.assertEqual(len({result["book"]["uuid"] for result in results}), 10)
+
+    def test_success_with_archived_borrows(self):
+        count_archived = BorrowArchiveBL().archive_returned_borrows(timezone.now(), chunk_size=2)
+        self.assertEqual(count_archived, 4)
+        self.assertEqual(BorrowHistory.objects.filter(user_student=self.user_student).count(), 6)
+
+        self.client.force_login(self.user_librarian)
+        response = self.client.get(self.complete_url + "?q=" + self.book_2.title)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 1)
+        self.assertFalse(response.data["results"][0]["is_borrowed"])
+
+        response = self.client.get(self.complete_url)
+        self.assertEqual(response.data["count"], 10)
+
 
 class StudentBorrowCreateTest(APITestCase):
     def setUp(self):
@@ -238,6 +328,30 @@ class StudentBorrowCreateTest(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertIn("Choosen book have been borrowed. book title:", str(response.data["book_uuids"][0]))
 
+    def test_fail_with_every_invalid_book_reported(self):
+        StudentBorrowFactory(user_student=self.user_student, book=self.book_1)
+        self.book_2.quantity = 0
+        self.book_2.save()
+        unknown_uuid = "f3252e4f-c7dd-4a41-b755-4adcb1efd50f"
+
+        self.client.force_login(self.user_librarian)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(
+                self.complete_url, data={"book_uuids": [self.book_1.uuid, self.book_2.uuid, unknown_uuid, "1"]}
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            [str(message) for message in response.data["book_uuids"]],
+            [
+                "“1” is not a valid UUID.",
+                f"Choosen book cannot be found. book uuid: {unknown_uuid}",
+                f"Choosen book have been borrowed. book title: {self.book_1.title}",
+                f"Choosen book out of stok. book title: {self.book_2.title}",
+            ],
+        )
+        self.assertEqual(len([query for query in context if "library_books" in query["sql"]]), 1)
+
     def test_success(self):
         StudentBorrowFactory(user_student=UserFactory(role="student"), book=self.book_2)
         StudentBorrowFactory(user_student=UserFactory(role="student"), book=self.book_2, deadline_date=self.today)
@@ -268,6 +382,121 @@ class StudentBorrowCreateTest(APITestCase):
             self.assertEqual(response.data["count"], 1)
             self.assertIsNotNone(response.data["results"][0]["nearest_return_date"])
 
+    def test_success_query_count_not_depend_on_count_book(self):
+        user_student = UserFactory(role="student")
+        book_objects = BookFactory.create_batch(10, quantity=1)
+
+        self.client.force_login(self.user_librarian)
+        with CaptureQueriesContext(connection) as single_book_queries:
+            response = self.client.post(self.complete_url, data={"book_uuids": [self.book_2.uuid]})
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        with CaptureQueriesContext(connection) as batch_book_queries:
+            response = self.client.post(
+                reverse("api_library:list-student-borrow", args=[user_student.username]),
+                data={"book_uuids": [book.uuid for book in book_objects]},
+            )
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(len(batch_book_queries), len(single_book_queries))
+        student_queries = [query for query in batch_book_queries if '"users_user"."username" =' in query["sql"]]
+        self.assertEqual(len(student_queries), 1)
+        for book in book_objects:
+            book.refresh_from_db()
+            self.assertEqual(book.quantity, 0)
+            self.assertEqual(book.nearest_return_date, self.today + timedelta(days=30))
+
+
+class StudentBulkBorrowCreateTest(APITestCase):
+    def setUp(self):
+        self.today = timezone.localtime().date()
+
+        self.user_student_1 = UserFactory(role="student")
+        self.user_student_2 = UserFactory(role="student")
+        self.user_librarian = UserFactory(role="librarian")
+
+        self.book_1 = BookFactory(quantity=10)
+        self.book_2 = BookFactory(quantity=1)
+        self.payload = {
+            "usernames": [self.user_student_1.username, "random", self.user_student_2.username],
+            "book_uuids": [self.book_1.uuid, self.book_2.uuid],
+        }
+        self.complete_url = reverse("api_library:student-borrow-bulk")
+
+    def test_fail_because_logged_as_student(self):
+        self.client.force_login(self.user_student_1)
+        response = self.client.post(self.complete_url, data=self.payload)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_fail_because_empty_usernames(self):
+        self.client.force_login(self.user_librarian)
+        response = self.client.post(self.complete_url, data={**self.payload, "usernames": []})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(str(response.data["usernames"][0]), "Choose at least 1 student.")
+
+    def test_fail_because_invalid_book_uuids_value(self):
+        self.client.force_login(self.user_librarian)
+        response = self.client.post(
+            self.complete_url, data={**self.payload, "book_uuids": ["f3252e4f-c7dd-4a41-b755-4adcb1efd50f"]}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            str(response.data["book_uuids"][0]),
+            "Choosen book cannot be found. book uuid: f3252e4f-c7dd-4a41-b755-4adcb1efd50f",
+        )
+        self.assertFalse(BorrowHistory.objects.exists())
+
+    def test_success(self):
+        StudentBorrowFactory(user_student=self.user_student_2, book=self.book_1)
+
+        self.client.force_login(self.user_librarian)
+        response = self.client.post(self.complete_url, data=self.payload)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["message"], "Success add 2 borrowed book to 1 students.")
+        self.assertEqual(
+            response.data["results"],
+            [
+                {"username": self.user_student_1.username, "count_borrow": 2, "errors": []},
+                {"username": "random", "count_borrow": 0, "errors": ["Student not found."]},
+                {
+                    "username": self.user_student_2.username,
+                    "count_borrow": 0,
+                    "errors": [
+                        f"Choosen book have been borrowed. book title: {self.book_1.title}",
+                        f"Choosen book out of stok. book title: {self.book_2.title}",
+                    ],
+                },
+            ],
+        )
+
+        self.book_1.refresh_from_db()
+        self.book_2.refresh_from_db()
+        self.assertEqual(self.book_1.quantity, 9)
+        self.assertEqual(self.book_2.quantity, 0)
+        self.assertEqual(self.book_2.nearest_return_date, self.today + timedelta(days=30))
+        self.assertEqual(self.user_student_1.borrow_histories.filter(is_borrowed=True).count(), 2)
+
+    def test_success_query_count_not_depend_on_count_student(self):
+        book_uuids = [book.uuid for book in BookFactory.create_batch(5, quantity=50)]
+        usernames = [user_student.username for user_student in UserFactory.create_batch(40, role="student")]
+
+        self.client.force_login(self.user_librarian)
+        with CaptureQueriesContext(connection) as single_student_queries:
+            response = self.client.post(self.complete_url, data={"usernames": usernames[:1], "book_uuids": book_uuids})
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        with CaptureQueriesContext(connection) as class_queries:
+            response = self.client.post(self.complete_url, data={"usernames": usernames[1:], "book_uuids": book_uuids})
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(len(class_queries), len(single_student_queries))
+        self.assertEqual(response.data["message"], "Success add 195 borrowed book to 39 students.")
+        self.assertEqual(BorrowHistory.objects.filter(book__uuid__in=book_uuids).count(), 200)
+
 
 class StudentBorrowReturnTest(APITestCase):
     def setUp(self):
@@ -383,6 +612,87 @@ class StudentBorrowReturnTest(APITestCase):
             self.assertIsNone(response.data["results"][0]["nearest_return_date"])
 
 
+class StudentBulkBorrowReturnTest(APITestCase):
+    def setUp(self):
+        self.user_student_1 = UserFactory(role="student")
+        self.user_student_2 = UserFactory(role="student")
+        self.user_librarian = UserFactory(role="librarian")
+
+        self.book_1 = BookFactory(quantity=0)
+        self.book_2 = BookFactory(quantity=3)
+        self.borrow_1 = StudentBorrowFactory(user_student=self.user_student_1, book=self.book_1)
+        self.borrow_2 = StudentBorrowFactory(user_student=self.user_student_2, book=self.book_1)
+        self.borrow_3 = StudentBorrowFactory(user_student=self.user_student_2, book=self.book_2, is_borrowed=False)
+
+        self.complete_url = reverse("api_library:student-borrow-bulk-return")
+
+    def test_fail_because_logged_as_student(self):
+        self.client.force_login(self.user_student_1)
+        response = self.client.patch(self.complete_url, data={"scans": []})
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_fail_because_empty_scans(self):
+        self.client.force_login(self.user_librarian)
+        response = self.client.patch(self.complete_url, data={"scans": []})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(str(response.data["scans"][0]), "Choose at least 1 book.")
+
+    def test_success(self):
+        scans = [
+            {"username": self.user_student_1.username, "book_uuid": str(self.book_1.uuid)},
+            {"borrow_uuid": str(self.borrow_2.uuid)},
+            {"borrow_uuid": str(self.borrow_2.uuid)},
+            {"borrow_uuid": str(self.borrow_3.uuid)},
+            {"username": self.user_student_1.username, "book_uuid": str(self.book_2.uuid)},
+            {"book_uuid": "1"},
+            {"borrow_uuid": "1"},
+        ]
+
+        self.client.force_login(self.user_librarian)
+        response = self.client.patch(self.complete_url, data={"scans": scans})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["message"], "Success return 2 borrowed book.")
+        self.assertEqual(
+            [(result["is_returned"], result["error"]) for result in response.data["results"]],
+            [
+                (True, None),
+                (True, None),
+                (False, f"Choosen book have been returned. book title: {self.book_1.title}"),
+                (False, f"Choosen book have been returned. book title: {self.book_2.title}"),
+                (False, "Scanned book is not borrowed."),
+                (False, "Scan needs a borrow_uuid, or a username and a book_uuid."),
+                (False, "“1” is not a valid UUID."),
+            ],
+        )
+
+        self.book_1.refresh_from_db()
+        self.book_2.refresh_from_db()
+        self.assertEqual(self.book_1.quantity, 2)
+        self.assertEqual(self.book_2.quantity, 3)
+        self.assertFalse(BorrowHistory.objects.filter(is_borrowed=True).exists())
+
+    def test_success_query_count_not_depend_on_count_scan(self):
+        borrow_objects = StudentBorrowFactory.create_batch(30, user_student=self.user_student_1)
+
+        self.client.force_login(self.user_librarian)
+        with CaptureQueriesContext(connection) as single_scan_queries:
+            response = self.client.patch(self.complete_url, data={"scans": [{"borrow_uuid": str(self.borrow_1.uuid)}]})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        scans = [
+            {"username": self.user_student_1.username, "book_uuid": str(borrow.book.uuid)} for borrow in borrow_objects
+        ]
+        with CaptureQueriesContext(connection) as pile_scan_queries:
+            response = self.client.patch(self.complete_url, data={"scans": scans})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(len(pile_scan_queries), len(single_scan_queries))
+        self.assertEqual(response.data["message"], "Success return 30 borrowed book.")
+
+
 class StudentBorrowExtendTest(APITestCase):
     def setUp(self):
         self.today = timezone.localtime().date()
@@ -486,6 +796,11 @@ class StudentBorrowExtendTest(APITestCase):
         self.assertEqual(self.borrow_2.count_extend, 1)
         self.assertEqual(self.borrow_2.deadline_date, self.deadline_date)
 
+        self.book_1.refresh_from_db()
+        self.book_2.refresh_from_db()
+        self.assertEqual(self.book_1.nearest_return_date, None)
+        self.assertEqual(self.book_2.nearest_return_date, self.deadline_date)
+
         with self.subTest("check list student borrow"):
             response = self.client.get(reverse("api_library:list-student-borrow", args=[self.user_student.username]))
 
@@ -498,3 +813,56 @@ class StudentBorrowExtendTest(APITestCase):
             self.assertEqual(response.status_code, status.HTTP_200_OK)
             self.assertEqual(response.data["count"], 1)
             self.assertIsNotNone(response.data["results"][0]["nearest_return_date"])
+
+
+class BorrowHistoryExportTest(APITestCase):
+    def setUp(self):
+        self.user_student = UserFactory(role="student", username="eko", first_name="eko", last_name="aziz")
+        self.user_librarian = UserFactory(role="librarian")
+
+        self.borrow_1 = StudentBorrowFactory(user_student=self.user_student)
+        self.borrow_2 = StudentBorrowFactory(user_student=self.user_student, is_borrowed=False)
+        StudentBorrowFactory.create_batch(3)
+
+        self.complete_url = reverse("api_library:borrow-history-export")
+
+    def test_fail_because_logged_as_student(self):
+        self.client.force_login(self.user_student)
+        response = self.client.get(self.complete_url)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_fail_because_invalid_export_format(self):
+        self.client.force_login(self.user_librarian)
+        response = self.client.get(self.complete_url + "?export_format=xml")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(str(response.data["export_format"]), "Invalid export format, available 'csv' & 'ndjson'.")
+
+    def test_success_csv(self):
+        self.client.force_login(self.user_librarian)
+        response = self.client.get(self.complete_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/csv")
+
+        rows = list(csv.DictReader(io.StringIO(response.getvalue().decode())))
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]["uuid"], str(self.borrow_1.uuid))
+        self.assertEqual(rows[0]["username"], "eko")
+        self.assertEqual(rows[0]["book_title"], self.borrow_1.book.title)
+        self.assertEqual(rows[1]["is_borrowed"], "False")
+
+    def test_success_ndjson_with_filter(self):
+        self.client.force_login(self.user_librarian)
+        response = self.client.get(self.complete_url + "?export_format=ndjson&username=eko&is_borrowed=true")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+
+        rows = [json.loads(line) for line in response.getvalue().decode().splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["uuid"], str(self.borrow_1.uuid))
+        self.assertEqual(rows[0]["first_name"], "eko")
+        self.assertEqual(rows[0]["deadline_date"], str(self.borrow_1.deadline_date))
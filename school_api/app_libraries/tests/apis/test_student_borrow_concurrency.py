@@ -0,0 +1,102 @@
+import threading
+
+from django.db import connection
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient, APITransactionTestCase
+
+from school_api.app_libraries.models import Book, BorrowHistory
+from school_api.app_libraries.tests.factories import BookFactory, StudentBorrowFactory
+from school_api.users.tests.factories import UserFactory
+
+
+class StudentBorrowConcurrencyTest(APITransactionTestCase):
+    count_request = 12
+    count_stock = 5
+
+    def setUp(self):
+        self.user_librarian = UserFactory(role="librarian")
+        self.user_students = UserFactory.create_batch(self.count_request, role="student")
+        self.book = BookFactory(quantity=self.count_stock)
+
+    def borrow(self, user_student, barrier, responses):
+        client = APIClient()
+        client.force_authenticate(self.user_librarian)
+        try:
+            barrier.wait()
+            response = client.post(
+                reverse("api_library:list-student-borrow", args=[user_student.username]),
+                data={"book_uuids": [self.book.uuid]},
+            )
+            responses.append(response)
+        finally:
+            connection.close()
+
+    def test_parallel_borrow_same_book(self):
+        barrier = threading.Barrier(self.count_request)
+        responses: list = []
+        threads = [
+            threading.Thread(target=self.borrow, args=(user_student, barrier, responses))
+            for user_student in self.user_students
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        created = [response for response in responses if response.status_code == status.HTTP_201_CREATED]
+        rejected = [response for response in responses if response.status_code == status.HTTP_400_BAD_REQUEST]
+        self.assertEqual(len(created), self.count_stock)
+        self.assertEqual(len(rejected), self.count_request - self.count_stock)
+        for response in rejected:
+            self.assertIn("Choosen book out of stok. book title:", str(response.data["book_uuids"][0]))
+
+        book = Book.objects.get(pk=self.book.pk)
+        self.assertEqual(book.quantity, 0)
+        self.assertIsNotNone(book.nearest_return_date)
+        self.assertEqual(BorrowHistory.objects.filter(book=book, is_borrowed=True).count(), self.count_stock)
+
+
+class StudentBorrowReturnConcurrencyTest(APITransactionTestCase):
+    count_request = 8
+    count_stock = 3
+
+    def setUp(self):
+        self.user_librarian = UserFactory(role="librarian")
+        self.user_student = UserFactory(role="student")
+        self.book = BookFactory(quantity=self.count_stock)
+        self.borrow = StudentBorrowFactory(user_student=self.user_student, book=self.book)
+
+    def return_book(self, barrier, responses):
+        client = APIClient()
+        client.force_authenticate(self.user_librarian)
+        try:
+            barrier.wait()
+            response = client.patch(
+                reverse("api_library:student-borrow-return", args=[self.user_student.username]),
+                data={"book_uuids": [self.book.uuid]},
+            )
+            responses.append(response)
+        finally:
+            connection.close()
+
+    def test_parallel_return_same_borrow(self):
+        barrier = threading.Barrier(self.count_request)
+        responses: list = []
+        threads = [
+            threading.Thread(target=self.return_book, args=(barrier, responses)) for _ in range(self.count_request)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        returned = [response for response in responses if response.status_code == status.HTTP_200_OK]
+        rejected = [response for response in responses if response.status_code == status.HTTP_400_BAD_REQUEST]
+        self.assertEqual(len(returned), 1)
+        self.assertEqual(len(rejected), self.count_request - 1)
+        for response in rejected:
+            self.assertIn("Choosen book have been returned. book title:", str(response.data["book_uuids"][0]))
+
+        self.assertEqual(Book.objects.get(pk=self.book.pk).quantity, self.count_stock + 1)
+        self.assertFalse(BorrowHistory.objects.get(pk=self.borrow.pk).is_borrowed)
@@ -0,0 +1,31 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+
+from school_api.app_libraries.models import Book
+
+
+class TestBookAdmin:
+    def test_changelist(self, admin_client):
+        response = admin_client.get(reverse("admin:app_libraries_book_changelist"))
+        assert response.status_code == 200
+        assert reverse("admin:app_libraries_book_import") in response.content.decode()
+
+    def test_import(self, admin_client):
+        url = reverse("admin:app_libraries_book_import")
+        response = admin_client.get(url)
+        assert response.status_code == 200
+
+        file = SimpleUploadedFile("books.ndjson", b'{"title": "Imported Book", "author": "Author", "quantity": 3}\n')
+        response = admin_client.post(url, data={"file": file, "import_format": "ndjson"})
+        assert response.status_code == 302
+        assert Book.objects.get(title="Imported Book").quantity == 3
+
+    def test_import_invalid_file(self, admin_client):
+        url = reverse("admin:app_libraries_book_import")
+        file = SimpleUploadedFile("books.csv", "title,author,quantity\nLivre,Écrivain,1\n".encode("latin-1"))
+
+        response = admin_client.post(url, data={"file": file, "import_format": "csv"}, follow=True)
+
+        assert response.status_code == 200
+        assert "Books not imported: The file is not UTF-8 encoded." in response.content.decode()
+        assert not Book.objects.filter(title="Livre").exists()
@@ -0,0 +1,27 @@
+import pytest
+
+from school_api.app_libraries.bussiness_logics.books import BookBL, BookOutOfStock
+from school_api.app_libraries.models import Book, BorrowHistory
+from school_api.app_libraries.tests.factories import BookFactory, StudentBorrowFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_sync_qty_for_borrowed_book_reports_the_exhausted_titles(monkeypatch):
+    book_in_stock = BookFactory(title="In stock", quantity=3)
+    book_exhausted = BookFactory(title="Exhausted", quantity=3)
+    StudentBorrowFactory(book=book_in_stock)
+    StudentBorrowFactory(book=book_exhausted)
+    get_nearest_return_dates = BookBL._get_nearest_return_dates
+
+    def exhaust_after_check(self, book_ids):
+        # a stock change the locked read did not see, only the guarded update catches it
+        Book.objects.filter(pk=book_exhausted.pk).update(quantity=0)
+        return get_nearest_return_dates(self, book_ids)
+
+    monkeypatch.setattr(BookBL, "_get_nearest_return_dates", exhaust_after_check)
+
+    with pytest.raises(BookOutOfStock) as e:
+        BookBL().sync_qty_for_borrowed_book(list(BorrowHistory.objects.all()))
+
+    assert e.value.titles == ["Exhausted"]
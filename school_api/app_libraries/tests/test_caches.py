@@ -0,0 +1,46 @@
+import pytest
+from django.conf import settings as django_settings
+from django.core.cache import caches
+from django.urls import reverse
+
+from school_api.app_libraries import settings as app_settings
+from school_api.app_libraries.api.views import ListBook
+from school_api.app_libraries.tests.factories import BookFactory
+from school_api.bases.throttles import CachedAnonRateThrottle
+
+pytestmark = pytest.mark.django_db
+
+
+def get_cache_keys(alias):
+    # `LocMemCache` keeps its entries in a dict, its keys are enough to tell where a value went
+    return list(caches[alias]._cache)
+
+
+def test_catalog_page_in_catalog_cache(client):
+    BookFactory()
+
+    response = client.get(reverse("api_library:list-book"))
+
+    assert response["X-Cache"] == "MISS"
+    assert app_settings.CACHE_ALIAS == "catalog"
+    assert get_cache_keys("catalog")
+    assert not get_cache_keys("default")
+
+
+def test_cached_db_session_in_sessions_cache(client, settings, user):
+    settings.SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+
+    client.force_login(user)
+
+    assert len(get_cache_keys(django_settings.SESSION_CACHE_ALIAS)) == 1
+    assert not get_cache_keys("default")
+
+
+def test_throttle_in_throttle_cache(client, monkeypatch):
+    BookFactory()
+    monkeypatch.setattr(ListBook, "throttle_classes", [CachedAnonRateThrottle])
+    monkeypatch.setattr(CachedAnonRateThrottle, "rate", "1/minute", raising=False)
+
+    assert client.get(reverse("api_library:list-book")).status_code == 200
+    assert client.get(reverse("api_library:list-book")).status_code == 429
+    assert len(get_cache_keys("throttle")) == 1
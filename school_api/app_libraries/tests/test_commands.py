@@ -0,0 +1,158 @@
+import json
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+
+from school_api.app_libraries.models import Book, BorrowHistory
+from school_api.app_libraries.seeders import SEED_STUDENT_PREFIX
+from school_api.app_libraries.tests.factories import BookFactory, StudentBorrowFactory
+from school_api.users.models import User
+
+pytestmark = pytest.mark.django_db
+
+
+def test_export_borrow_histories():
+    borrow_active = StudentBorrowFactory()
+    StudentBorrowFactory(is_borrowed=False)
+
+    stdout = StringIO()
+    call_command(
+        "export_borrow_histories", "--format", "ndjson", "--only-borrowed", "--chunk-size", "1", stdout=stdout
+    )
+
+    rows = [json.loads(line) for line in stdout.getvalue().splitlines()]
+    assert [row["uuid"] for row in rows] == [str(borrow_active.uuid)]
+    assert rows[0]["book_uuid"] == str(borrow_active.book.uuid)
+
+
+def test_import_books(tmp_path):
+    book_by_uuid = BookFactory(quantity=2)
+    book_by_title = BookFactory(quantity=3)
+    path = tmp_path / "books.csv"
+    path.write_text(
+        "uuid,title,author,quantity\n"
+        f"{book_by_uuid.uuid},Renamed Title,{book_by_uuid.author},4\n"
+        f",{book_by_title.title},{book_by_title.author},1\n"
+        ",New Book,New Author,5\n"
+        ",New Book,New Author,6\n"
+        ",,No Title,1\n"
+        "not-a-uuid,Bad Uuid,Author,1\n"
+    )
+
+    stdout = StringIO()
+    call_command("import_books", str(path), stdout=stdout)
+
+    book_by_uuid.refresh_from_db()
+    book_by_title.refresh_from_db()
+    assert (book_by_uuid.title, book_by_uuid.quantity) == ("Renamed Title", 6)
+    assert book_by_title.quantity == 4
+    assert Book.objects.get(title="New Book").quantity == 6
+    assert stdout.getvalue().strip() == "inserted=1 updated=2 duplicate=1 rejected=2"
+    assert Book.objects.get(title="New Book").search_vector is not None
+
+
+def test_import_books_replace_quantity(tmp_path):
+    book = BookFactory(quantity=2)
+    path = tmp_path / "books.json"
+    path.write_text(json.dumps([{"uuid": str(book.uuid), "title": book.title, "author": book.author, "quantity": 7}]))
+
+    call_command("import_books", str(path), "--replace-quantity", stdout=StringIO())
+
+    book.refresh_from_db()
+    assert book.quantity == 7
+
+
+def test_import_books_replace_quantity_syncs_nearest_return_date(tmp_path):
+    book_sold_out = BookFactory(quantity=2)
+    borrow = StudentBorrowFactory(book=book_sold_out)
+    book_restocked = BookFactory(quantity=0, nearest_return_date=borrow.deadline_date)
+    path = tmp_path / "books.json"
+    path.write_text(
+        json.dumps(
+            [
+                {"uuid": str(book.uuid), "title": book.title, "author": book.author, "quantity": quantity}
+                for book, quantity in [(book_sold_out, 0), (book_restocked, 3)]
+            ]
+        )
+    )
+
+    call_command("import_books", str(path), "--replace-quantity", stdout=StringIO())
+
+    book_sold_out.refresh_from_db()
+    book_restocked.refresh_from_db()
+    assert (book_sold_out.quantity, book_sold_out.nearest_return_date) == (0, borrow.deadline_date)
+    assert (book_restocked.quantity, book_restocked.nearest_return_date) == (3, None)
+
+
+def test_import_books_rejects_invalid_ndjson_line(tmp_path):
+    path = tmp_path / "books.ndjson"
+    path.write_text(
+        '{"title": "First Book", "author": "Author", "quantity": 1}\n'
+        '{"title": "Broken Book", "author": \n'
+        '"not a book"\n'
+        '{"title": "Last Book", "author": "Author", "quantity": 2}\n'
+    )
+
+    stdout, stderr = StringIO(), StringIO()
+    call_command("import_books", str(path), stdout=stdout, stderr=stderr)
+
+    assert stdout.getvalue().strip() == "inserted=2 updated=0 duplicate=0 rejected=2"
+    assert stderr.getvalue().splitlines() == [
+        "line 2: Invalid JSON, Expecting value.",
+        "line 3: Invalid row.",
+    ]
+    assert set(Book.objects.values_list("title", flat=True)) == {"First Book", "Last Book"}
+
+
+@pytest.mark.parametrize(
+    "filename, content, error",
+    [
+        ("books.json", b'{"title": "Book", "author": "Author", "quantity": 1}', "A JSON file holds a list of books."),
+        ("books.json", b'[{"title": "Book",', "Invalid JSON, Expecting property name enclosed in double quotes"),
+        ("books.csv", "title,author,quantity\nLivre,Écrivain,1\n".encode("latin-1"), "The file is not UTF-8 encoded."),
+    ],
+)
+def test_import_books_invalid_file(tmp_path, filename, content, error):
+    path = tmp_path / filename
+    path.write_bytes(content)
+
+    with pytest.raises(CommandError, match=error):
+        call_command("import_books", str(path), stdout=StringIO())
+    assert not Book.objects.exists()
+
+
+def test_seed_and_benchmark_library(tmp_path):
+    options = ["--books", "30", "--students", "5", "--active-borrows", "5", "--returned-borrows", "5"]
+    call_command("seed_library", *options, stdout=StringIO())
+    # a second run only adds what is missing
+    call_command("seed_library", *options, stdout=StringIO())
+
+    assert Book.objects.count() == 30
+    assert User.objects.filter(username__startswith=SEED_STUDENT_PREFIX).count() == 5
+    assert BorrowHistory.objects.filter(is_borrowed=True).count() == 5
+    count_borrow = BorrowHistory.objects.count()
+
+    path = tmp_path / "report.json"
+    call_command("benchmark_library", "--iterations", "2", "--warmup", "0", "--output", str(path), stdout=StringIO())
+
+    report = json.loads(path.read_text())
+    assert report["meta"]["books"] == 30
+    assert report["results"]["api.student-borrow.create"]["iterations"] == 2
+    # the write benchmarks are rolled back
+    assert BorrowHistory.objects.count() == count_borrow
+
+    stdout = StringIO()
+    call_command(
+        "benchmark_library",
+        "--iterations",
+        "1",
+        "--warmup",
+        "0",
+        "--only",
+        "api.list-book",
+        "--compare",
+        str(path),
+        stdout=stdout,
+    )
+    assert "vs baseline" in stdout.getvalue()
@@ -0,0 +1,86 @@
+import pytest
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, connections
+
+from school_api.bases.backends.postgresql.base import DatabaseWrapper, configure_pools
+
+pytestmark = pytest.mark.django_db
+
+POOLED_ALIAS = "pooled"
+
+
+@pytest.fixture
+def pooled_settings(monkeypatch):
+    settings_dict = {
+        **connection.settings_dict,
+        "ENGINE": "school_api.bases.backends.postgresql",
+        "CONN_MAX_AGE": 0,
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {**connection.settings_dict["OPTIONS"], "pool": {"min_size": 1, "max_size": 1}},
+    }
+    # `django.contrib.postgres` looks the alias up on connect
+    monkeypatch.setitem(connections.settings, POOLED_ALIAS, settings_dict)
+    yield settings_dict
+    DatabaseWrapper(settings_dict, alias=POOLED_ALIAS).close_pool()
+
+
+@pytest.fixture
+def pooled_connection(pooled_settings):
+    pooled = connections[POOLED_ALIAS] = DatabaseWrapper(pooled_settings, alias=POOLED_ALIAS)
+    yield pooled
+    pooled.close()
+    del connections[POOLED_ALIAS]
+
+
+def get_backend_pid(database_connection):
+    with database_connection.cursor() as cursor:
+        cursor.execute("SELECT pg_backend_pid()")
+        return cursor.fetchone()[0]
+
+
+def test_closed_connection_back_to_pool(pooled_connection):
+    backend_pid = get_backend_pid(pooled_connection)
+    pooled_connection.close()
+
+    assert pooled_connection.connection is None
+    assert get_backend_pid(pooled_connection) == backend_pid
+    assert pooled_connection.pool.get_stats()["connections_num"] == 1
+
+
+def test_closed_connection_in_transaction_rolled_back(pooled_connection):
+    pooled_connection.set_autocommit(False)
+    get_backend_pid(pooled_connection)
+    pooled_connection.close()
+
+    with pooled_connection.cursor() as cursor:
+        cursor.execute("SELECT now() = statement_timestamp()")
+        assert cursor.fetchone()[0] is True
+    assert pooled_connection.get_autocommit()
+
+
+def test_terminated_connection_replaced_by_health_check(pooled_connection):
+    backend_pid = get_backend_pid(pooled_connection)
+    pooled_connection.close()
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_terminate_backend(%s, 1000)", [backend_pid])
+
+    assert get_backend_pid(pooled_connection) != backend_pid
+
+
+def test_pool_refuses_persistent_connections(pooled_settings):
+    pooled_settings["CONN_MAX_AGE"] = 60
+
+    with pytest.raises(ImproperlyConfigured):
+        DatabaseWrapper(pooled_settings, alias=POOLED_ALIAS).pool
+
+
+def test_configure_pools_sizes_pool_of_process_type(pooled_settings, settings):
+    settings.DATABASE_POOL_SIZES = {"celery": {"min_size": 2, "max_size": 3}}
+    inherited_pool = DatabaseWrapper(pooled_settings, alias=POOLED_ALIAS).pool
+
+    configure_pools("celery")
+
+    pool = DatabaseWrapper(pooled_settings, alias=POOLED_ALIAS).pool
+    assert pool is not inherited_pool
+    assert (pool.min_size, pool.max_size) == (2, 3)
+    inherited_pool.close()
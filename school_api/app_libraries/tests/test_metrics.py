@@ -0,0 +1,89 @@
+import os
+import subprocess
+import sys
+
+import pytest
+from django.urls import reverse
+from prometheus_client import REGISTRY
+
+from school_api.app_libraries.tests.factories import BookFactory
+from school_api.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture(autouse=True)
+def metrics_access(settings):
+    settings.METRICS_TOKEN = "scrape-token"
+    settings.METRICS_ALLOWED_NETWORKS = ["10.0.0.0/8"]
+
+
+def get_sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0
+
+
+def test_request_metrics(client):
+    BookFactory()
+    labels = {"view": "api_library:list-book", "method": "GET"}
+    count_request = get_sample("http_request_duration_seconds_count", status="200", **labels)
+    count_query = get_sample("http_request_db_queries_sum", **labels)
+
+    client.get(reverse("api_library:list-book"))
+    client.get(reverse("api_library:list-book"))
+
+    assert get_sample("http_request_duration_seconds_count", status="200", **labels) == count_request + 2
+    assert get_sample("http_request_db_queries_sum", **labels) == count_query + 2
+    assert get_sample("library_cache_requests_total", cache="catalog", result="hit") >= 1
+
+    response = client.get("/metrics", HTTP_AUTHORIZATION="Bearer scrape-token")
+    assert response.status_code == 200
+    assert (
+        'http_request_duration_seconds_bucket{le="0.005",method="GET",status="200",view="api_library:list-book"}'
+        in (response.content.decode())
+    )
+
+
+def test_borrow_metrics(client, django_capture_on_commit_callbacks):
+    book = BookFactory(quantity=2)
+    student = UserFactory(role="student")
+    client.force_login(UserFactory(role="librarian"))
+    count_borrow = get_sample("library_borrow_events_total", action="borrow")
+
+    with django_capture_on_commit_callbacks(execute=True):
+        client.post(
+            reverse("api_library:list-student-borrow", args=[student.username]),
+            data={"book_uuids": [str(book.uuid)]},
+            content_type="application/json",
+        )
+
+    assert get_sample("library_borrow_events_total", action="borrow") == count_borrow + 1
+
+
+def test_metrics_of_every_worker_process(client, monkeypatch, tmp_path):
+    monkeypatch.setenv("PROMETHEUS_MULTIPROC_DIR", str(tmp_path))
+    worker = "from school_api.app_libraries.metrics import BORROW_EVENTS; BORROW_EVENTS.labels('borrow').inc(3)"
+    for _ in range(2):
+        subprocess.run([sys.executable, "-c", worker], check=True, env=os.environ)
+
+    response = client.get("/metrics", REMOTE_ADDR="10.1.2.3")
+    assert response.status_code == 200
+    assert 'library_borrow_events_total{action="borrow"} 6.0' in response.content.decode()
+
+
+@pytest.mark.parametrize(
+    "headers",
+    [
+        {},
+        {"HTTP_AUTHORIZATION": "Bearer wrong-token"},
+        {"REMOTE_ADDR": "192.0.2.1"},
+    ],
+)
+def test_metrics_unauthorized(client, headers):
+    response = client.get("/metrics", **headers)
+    assert response.status_code == 404
+
+
+def test_metrics_without_token_configured(client, settings):
+    settings.METRICS_TOKEN = ""
+    response = client.get("/metrics", HTTP_AUTHORIZATION="Bearer ")
+    assert response.status_code == 404
@@ -0,0 +1,52 @@
+import pytest
+from django.urls import reverse
+
+from school_api.app_libraries.api.views import ListBook
+from school_api.app_libraries.models import Book
+from school_api.app_libraries.tests.factories import BookFactory
+from school_api.bases.queries import QueryBudgetExceeded, QueryCounter, get_sql_shape
+
+pytestmark = pytest.mark.django_db
+
+
+def test_query_budget_fixture(client, query_budget):
+    BookFactory.create_batch(3)
+
+    with query_budget(ListBook.query_budget) as counter:
+        response = client.get(reverse("api_library:list-book"))
+
+    assert response.status_code == 200
+    assert counter.count == 2
+
+
+def test_view_over_query_budget(client, monkeypatch):
+    BookFactory()
+    monkeypatch.setattr(ListBook, "query_budget", 1)
+
+    with pytest.raises(QueryBudgetExceeded, match="2 queries, over the budget of 1"):
+        client.get(reverse("api_library:list-book"))
+
+
+def test_repeated_query_shape():
+    books = BookFactory.create_batch(5)
+
+    with QueryCounter() as counter:
+        for book in books:
+            Book.objects.get(pk=book.pk)
+        Book.objects.filter(pk__in=[book.pk for book in books]).count()
+        Book.objects.filter(pk__in=[books[0].pk]).count()
+
+    assert counter.count == 7
+    problems = counter.get_problems(budget=10, repeat_threshold=5)
+    assert len(problems) == 1
+    assert problems[0].startswith("Likely N+1, 5 queries of: SELECT")
+    assert get_sql_shape("SELECT 1 WHERE id IN (%s, %s, %s)") == get_sql_shape("SELECT 1 WHERE id IN (%s)")
+
+
+def test_query_count_header_in_debug(client, settings):
+    BookFactory()
+    settings.DEBUG = True
+    response = client.get(reverse("api_library:list-book"))
+
+    assert response["X-DB-Query-Count"] == "2"
+    assert response["Server-Timing"].startswith('db;desc="2 queries";dur=')
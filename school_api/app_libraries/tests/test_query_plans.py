@@ -0,0 +1,132 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from school_api.app_libraries.models import Book, BorrowHistory
+from school_api.users.models import User
+from school_api.users.tests.factories import UserFactory
+
+
+class BorrowQueryPlanTest(APITestCase):
+    """Make sure the borrow hot paths keep hitting the `library_borrow_histories` indexes on a large table."""
+
+    count_book = 200
+    count_student = 1000
+    count_borrow_per_student = 40
+    count_borrow_long_time_student = 4000
+    count_active_borrow = 10
+    student_index_names = ["active_borrow_student_created", "borrow_student_created", "borrow_student_book"]
+    user_student: User
+    user_librarian: User
+    book_uuids: list[str]
+
+    @classmethod
+    def setUpTestData(cls):
+        deadline_date = timezone.localtime().date() + timedelta(days=30)
+
+        book_objects = Book.objects.bulk_create(
+            Book(title=f"Book {index}", author=f"Author {index}", quantity=100) for index in range(cls.count_book)
+        )
+        user_students = User.objects.bulk_create(
+            User(username=f"student-{index}", role="student") for index in range(cls.count_student)
+        )
+        # every student has a short history except the last one, a long-time student with years of returned loans
+        borrow_objects = []
+        for index, user_student in enumerate(user_students):
+            count_borrow = cls.count_borrow_per_student
+            if user_student is user_students[-1]:
+                count_borrow = cls.count_borrow_long_time_student
+
+            for position in range(count_borrow):
+                is_borrowed = position < cls.count_active_borrow
+                book_index = position if is_borrowed else cls.count_active_borrow + (index + position) % 100
+                borrow_objects.append(
+                    BorrowHistory(
+                        user_student=user_student,
+                        book=book_objects[book_index],
+                        is_borrowed=is_borrowed,
+                        deadline_date=deadline_date if is_borrowed else None,
+                    )
+                )
+        BorrowHistory.objects.bulk_create(borrow_objects, batch_size=5000)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE library_books")
+            cursor.execute("ANALYZE library_borrow_histories")
+            cursor.execute("ANALYZE users_user")
+
+        cls.user_student = user_students[-1]
+        cls.user_librarian = UserFactory(role="librarian")
+        cls.book_uuids = [
+            str(borrow.book.uuid)
+            for borrow in cls.user_student.borrow_histories.filter(is_borrowed=True).select_related("book")[:2]
+        ]
+
+    def assertIndexScan(self, captured_queries):
+        plans = []
+        for query in captured_queries:
+            sql = query["sql"]
+            if "library_borrow_histories" not in sql or sql.startswith(("SAVEPOINT", "RELEASE")):
+                continue
+
+            with connection.cursor() as cursor:
+                cursor.execute("EXPLAIN " + sql)
+                plan = "\n".join(row[0] for row in cursor.fetchall())
+
+            self.assertNotIn("Seq Scan on library_borrow_histories", plan, msg=f"{sql}\n{plan}")
+            plans.append(plan)
+
+        used_index_names = {name for name in self.student_index_names for plan in plans if name in plan}
+        self.assertTrue(used_index_names, msg="\n\n".join(plans))
+
+    def test_list_student_borrow(self):
+        self.client.force_login(self.user_librarian)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("api_library:list-student-borrow", args=[self.user_student.username]))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIndexScan(queries)
+
+    def test_list_student_borrow_history(self):
+        self.client.force_login(self.user_librarian)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse("api_library:list-student-borrow-history", args=[self.user_student.username])
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIndexScan(queries)
+
+    def test_list_borrow_me(self):
+        self.client.force_login(self.user_student)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("api_library:list-borrow-me"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIndexScan(queries)
+
+    def test_student_borrow_return(self):
+        self.client.force_login(self.user_librarian)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(
+                reverse("api_library:student-borrow-return", args=[self.user_student.username]),
+                data={"book_uuids": self.book_uuids},
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIndexScan(queries)
+
+    def test_student_borrow_extend(self):
+        self.client.force_login(self.user_librarian)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(
+                reverse("api_library:student-borrow-extend", args=[self.user_student.username]),
+                data={"book_uuids": self.book_uuids},
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIndexScan(queries)
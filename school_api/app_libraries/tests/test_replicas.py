@@ -0,0 +1,144 @@
+import pytest
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from school_api.app_libraries.api.views import ListBook
+from school_api.app_libraries.caches import bump_catalog_version
+from school_api.app_libraries.tests.factories import BookFactory, StudentBorrowFactory
+from school_api.bases.routers import ReplicaRouter
+from school_api.users.tests.factories import UserFactory
+
+# the `replica` of the test settings is a second connection, it only sees committed rows
+pytestmark = pytest.mark.django_db(transaction=True, databases=[DEFAULT_DB_ALIAS, "replica"])
+
+
+@pytest.fixture(autouse=True)
+def replica(settings):
+    settings.DATABASE_REPLICAS = ["replica"]
+    return "replica"
+
+
+def get_database_reads(client, url):
+    """Status of a GET on `url` and the aliases the request read from."""
+    with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as primary:
+        with CaptureQueriesContext(connections["replica"]) as replica:
+            response = client.get(url)
+    aliases = {alias for alias, context in [("default", primary), ("replica", replica)] if context.captured_queries}
+    return response.status_code, aliases
+
+
+def expire_sticky_window():
+    cache.clear()
+
+
+def get_client(user):
+    client = APIClient()
+    client.force_authenticate(user)
+    return client
+
+
+def test_safe_method_reads_replica():
+    BookFactory()
+    expire_sticky_window()
+
+    assert get_database_reads(APIClient(), reverse("api_library:list-book")) == (200, {"replica"})
+
+
+def test_user_list_reads_replica():
+    UserFactory(role="student")
+    client = get_client(UserFactory(role="librarian"))
+
+    assert get_database_reads(client, reverse("api_user:list-student")) == (200, {"replica"})
+
+
+def test_borrow_sticks_librarian_and_student_to_primary():
+    user_student = UserFactory(role="student")
+    client = get_client(UserFactory(role="librarian"))
+    url = reverse("api_library:list-student-borrow", args=[user_student.username])
+
+    response = client.post(url, data={"book_uuids": [str(BookFactory().uuid)]}, format="json")
+
+    assert response.status_code == 201
+    assert get_database_reads(client, url) == (200, {"default"})
+    assert get_database_reads(get_client(user_student), reverse("api_library:list-borrow-me")) == (200, {"default"})
+    assert get_database_reads(get_client(UserFactory(role="student")), reverse("api_library:list-borrow-me")) == (
+        200,
+        {"replica"},
+    )
+
+
+def test_bulk_borrow_and_return_stick_students_to_primary():
+    user_student, other_student = UserFactory(role="student"), UserFactory(role="student")
+    client = get_client(UserFactory(role="librarian"))
+    book = BookFactory()
+
+    response = client.post(
+        reverse("api_library:student-borrow-bulk"),
+        data={"usernames": [user_student.username], "book_uuids": [str(book.uuid)]},
+        format="json",
+    )
+
+    assert response.status_code == 201
+    assert get_database_reads(get_client(user_student), reverse("api_library:list-borrow-me")) == (200, {"default"})
+    assert get_database_reads(get_client(other_student), reverse("api_library:list-borrow-me")) == (200, {"replica"})
+
+    expire_sticky_window()
+    response = client.patch(
+        reverse("api_library:student-borrow-bulk-return"),
+        data={"scans": [{"username": user_student.username, "book_uuid": str(book.uuid)}]},
+        format="json",
+    )
+
+    assert response.status_code == 200
+    assert response.data["results"][0]["is_returned"]
+    assert get_database_reads(get_client(user_student), reverse("api_library:list-borrow-me")) == (200, {"default"})
+    assert get_database_reads(get_client(other_student), reverse("api_library:list-borrow-me")) == (200, {"replica"})
+
+
+def test_failed_write_keeps_reads_on_replica():
+    user_student = UserFactory(role="student")
+    client = get_client(UserFactory(role="librarian"))
+    url = reverse("api_library:list-student-borrow", args=[user_student.username])
+
+    response = client.post(url, data={"book_uuids": []}, format="json")
+
+    assert response.status_code == 400
+    assert get_database_reads(client, url) == (200, {"replica"})
+
+
+def test_sticky_window_disabled_reads_replica(settings):
+    settings.REPLICA_STICKY_SECONDS = 0
+    user_student = UserFactory(role="student")
+    StudentBorrowFactory(user_student=user_student)
+    url = reverse("api_library:list-student-borrow", args=[user_student.username])
+    client = get_client(UserFactory(role="librarian"))
+
+    response = client.post(url, data={"book_uuids": [str(BookFactory().uuid)]}, format="json")
+
+    assert response.status_code == 201
+    assert get_database_reads(client, url) == (200, {"replica"})
+
+
+def test_catalog_change_sticks_catalog_to_primary():
+    BookFactory()
+    expire_sticky_window()
+    bump_catalog_version()
+
+    assert get_database_reads(APIClient(), reverse("api_library:list-book")) == (200, {"default"})
+
+
+def test_read_only_transaction_reads_primary(monkeypatch):
+    BookFactory()
+    monkeypatch.setattr(ListBook, "read_only_transaction", True)
+
+    assert get_database_reads(APIClient(), reverse("api_library:list-book")) == (200, {"default"})
+
+
+def test_replicas_never_migrated():
+    router = ReplicaRouter()
+
+    assert router.allow_migrate(DEFAULT_DB_ALIAS, "app_libraries")
+    assert not router.allow_migrate("replica", "app_libraries")
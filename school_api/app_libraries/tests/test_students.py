@@ -0,0 +1,36 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from school_api.app_libraries.bussiness_logics.students import StudentBL
+from school_api.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_get_student_id_without_cache(settings):
+    settings.LIBRARY_STUDENT_ID_CACHE_TIMEOUT = 0
+    user_student = UserFactory(role="student")
+
+    assert StudentBL().get_student_id(user_student.username) == user_student.pk
+    with CaptureQueriesContext(connection) as context:
+        assert StudentBL().get_student_id(user_student.username) == user_student.pk
+    assert len(context) == 1
+    assert StudentBL().get_student_id("random") is None
+
+
+def test_get_student_id_with_cache(settings, django_capture_on_commit_callbacks):
+    settings.LIBRARY_STUDENT_ID_CACHE_TIMEOUT = 60
+    user_student = UserFactory(role="student")
+
+    assert StudentBL().get_student_id(user_student.username) == user_student.pk
+    with CaptureQueriesContext(connection) as context:
+        assert StudentBL().get_student_id(user_student.username) == user_student.pk
+    assert len(context) == 0
+
+    old_username = user_student.username
+    user_student.username = "renamed"
+    with django_capture_on_commit_callbacks(execute=True):
+        user_student.save()
+    assert StudentBL().get_student_id(old_username) is None
+    assert StudentBL().get_student_id("renamed") == user_student.pk
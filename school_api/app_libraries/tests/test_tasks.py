@@ -0,0 +1,111 @@
+from datetime import timedelta
+
+import pytest
+from celery.result import EagerResult
+from django.utils import timezone
+
+from school_api.app_libraries.bussiness_logics.borrows import BorrowReminderBL
+from school_api.app_libraries.models import ArchivedBorrowHistory, BorrowHistory, CombinedBorrowHistory
+from school_api.app_libraries.tasks import (
+    archive_borrow_histories,
+    reconcile_nearest_return_date,
+    send_borrow_reminders,
+)
+from school_api.app_libraries.tests.factories import BookFactory, StudentBorrowFactory
+from school_api.users.tests.factories import UserFactory
+
+pytestmark = pytest.mark.django_db
+
+
+def test_reconcile_nearest_return_date(settings):
+    today = timezone.localtime().date()
+    deadline_date = today + timedelta(days=3)
+
+    book_stale = BookFactory(quantity=0, nearest_return_date=today)
+    StudentBorrowFactory(book=book_stale, deadline_date=deadline_date)
+    StudentBorrowFactory(book=book_stale, deadline_date=today - timedelta(days=1), is_borrowed=False)
+    book_in_stock = BookFactory(quantity=2, nearest_return_date=today)
+    book_synced = BookFactory(quantity=0, nearest_return_date=deadline_date)
+    StudentBorrowFactory(book=book_synced, deadline_date=deadline_date)
+
+    settings.CELERY_TASK_ALWAYS_EAGER = True
+    task_result = reconcile_nearest_return_date.delay()
+    assert isinstance(task_result, EagerResult)
+    assert task_result.result == 2
+
+    book_stale.refresh_from_db()
+    book_in_stock.refresh_from_db()
+    book_synced.refresh_from_db()
+    assert book_stale.nearest_return_date == deadline_date
+    assert book_in_stock.nearest_return_date is None
+    assert book_synced.nearest_return_date == deadline_date
+
+
+def test_send_borrow_reminders(settings, mailoutbox):
+    today = timezone.localtime().date()
+    student = UserFactory(email="student@example.com", first_name="Budi", last_name="")
+    StudentBorrowFactory(user_student=student, deadline_date=today - timedelta(days=2))
+    StudentBorrowFactory(user_student=student, deadline_date=today + timedelta(days=3))
+    StudentBorrowFactory(user_student=student, deadline_date=today + timedelta(days=10))
+    StudentBorrowFactory(user_student=student, deadline_date=today - timedelta(days=2), is_borrowed=False)
+    StudentBorrowFactory(user_student=UserFactory(email=""), deadline_date=today)
+
+    settings.CELERY_TASK_ALWAYS_EAGER = True
+    task_result = send_borrow_reminders.delay()
+    assert task_result.result == 3
+
+    assert len(mailoutbox) == 1
+    assert mailoutbox[0].to == ["student@example.com"]
+    assert mailoutbox[0].body.startswith("Hi Budi,")
+    assert "overdue since" in mailoutbox[0].body
+    assert mailoutbox[0].body.count("\n- ") == 2
+
+
+def test_iter_due_borrows_keyset():
+    today = timezone.localtime().date()
+    borrows = [StudentBorrowFactory(deadline_date=today) for _ in range(3)]
+    borrows.append(StudentBorrowFactory(user_student=borrows[1].user_student, deadline_date=today - timedelta(days=1)))
+    StudentBorrowFactory(user_student=borrows[1].user_student, deadline_date=today + timedelta(days=1))
+
+    chunks = list(BorrowReminderBL().iter_due_borrows(today, chunk_size=2))
+    # the chunk ends with the last student, the due loans of a student are never split
+    assert [[borrow["pk"] for borrow in chunk] for chunk in chunks] == [
+        [borrows[0].pk, borrows[3].pk, borrows[1].pk],
+        [borrows[2].pk],
+    ]
+
+
+def test_iter_reminder_batches_once_per_student():
+    today = timezone.localtime().date()
+    student = UserFactory(email="student@example.com")
+    StudentBorrowFactory(user_student=student, deadline_date=today - timedelta(days=1))
+    StudentBorrowFactory(user_student=student, deadline_date=today)
+
+    batches = list(BorrowReminderBL().iter_reminder_batches(today=today, chunk_size=1))
+
+    reminders = [reminder for reminders, _ in batches for reminder in reminders]
+    assert len(reminders) == 1
+    assert len(reminders[0]["books"]) == 2
+    assert sum(count_chunk for _, count_chunk in batches) == 2
+
+
+def test_archive_borrow_histories(settings):
+    borrow_active = StudentBorrowFactory()
+    borrow_returned = StudentBorrowFactory(is_borrowed=False)
+    borrow_returned_old = StudentBorrowFactory(is_borrowed=False)
+    BorrowHistory.objects.filter(pk__in=[borrow_active.pk, borrow_returned_old.pk]).update(
+        updated_at=timezone.now() - timedelta(days=400)
+    )
+
+    settings.CELERY_TASK_ALWAYS_EAGER = True
+    task_result = archive_borrow_histories.delay()
+    assert task_result.result == 1
+
+    assert set(BorrowHistory.objects.values_list("pk", flat=True)) == {borrow_active.pk, borrow_returned.pk}
+    archived = ArchivedBorrowHistory.objects.get()
+    assert (archived.pk, archived.uuid, archived.created_at) == (
+        borrow_returned_old.pk,
+        borrow_returned_old.uuid,
+        borrow_returned_old.created_at,
+    )
+    assert CombinedBorrowHistory.objects.count() == 3
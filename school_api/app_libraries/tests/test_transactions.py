@@ -0,0 +1,89 @@
+import pytest
+from django.db import connection
+from django.urls import reverse
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+
+from school_api.app_libraries.api.views import ListBook
+from school_api.app_libraries.api.views.librarian import ListStudentBorrow
+from school_api.app_libraries.exports import get_export_queryset, iter_export_rows
+from school_api.app_libraries.models import Book
+from school_api.app_libraries.tests.factories import BookFactory, StudentBorrowFactory
+from school_api.users.tests.factories import UserFactory
+
+# the views must open the outermost transaction themselves
+pytestmark = pytest.mark.django_db(transaction=True)
+
+
+def record_transaction(monkeypatch, view_class, method_name):
+    """Replace a view method with one recording the transaction it runs in."""
+    state = {}
+
+    def record(self, request, *args, **kwargs):
+        state["in_atomic_block"] = connection.in_atomic_block
+        with connection.cursor() as cursor:
+            cursor.execute("SHOW transaction_read_only")
+            state["read_only"] = cursor.fetchone()[0]
+            cursor.execute("SHOW transaction_isolation")
+            state["isolation"] = cursor.fetchone()[0]
+        return original(self, request, *args, **kwargs)
+
+    original = getattr(view_class, method_name)
+    monkeypatch.setattr(view_class, method_name, record)
+    return state
+
+
+def test_safe_method_runs_in_autocommit(client, monkeypatch):
+    BookFactory()
+    state = record_transaction(monkeypatch, ListBook, "list")
+
+    response = client.get(reverse("api_library:list-book"))
+
+    assert response.status_code == 200
+    assert state == {"in_atomic_block": False, "read_only": "off", "isolation": "read committed"}
+
+
+def test_safe_method_in_read_only_transaction(client, monkeypatch):
+    BookFactory()
+    monkeypatch.setattr(ListBook, "read_only_transaction", True)
+    state = record_transaction(monkeypatch, ListBook, "list")
+
+    response = client.get(reverse("api_library:list-book"))
+
+    assert response.status_code == 200
+    assert state == {"in_atomic_block": True, "read_only": "on", "isolation": "repeatable read"}
+
+
+def test_unsafe_method_rolled_back_on_error_response(monkeypatch):
+    user_student = UserFactory(role="student")
+    in_atomic_block = []
+
+    def create(self, request, *args, **kwargs):
+        in_atomic_block.append(connection.in_atomic_block)
+        BookFactory(title="Never Committed")
+        raise ValidationError("rejected")
+
+    monkeypatch.setattr(ListStudentBorrow, "create", create)
+    client = APIClient()
+    client.force_authenticate(UserFactory(role="librarian"))
+
+    response = client.post(reverse("api_library:list-student-borrow", args=[user_student.username]), data={})
+
+    assert response.status_code == 400
+    assert in_atomic_block == [True]
+    assert not Book.objects.filter(title="Never Committed").exists()
+
+
+def test_export_cursor_lives_in_its_transaction():
+    # behind pgbouncer in transaction mode the cursor must not outlive the transaction it was declared in
+    StudentBorrowFactory.create_batch(3)
+    rows = iter_export_rows(get_export_queryset(), chunk_size=1)
+
+    next(rows)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT is_holdable FROM pg_cursors WHERE name LIKE '_django_curs_%%'")
+        cursors = cursor.fetchall()
+    assert connection.in_atomic_block
+    assert cursors == [(False,)]
+    assert len(list(rows)) == 2
+    assert not connection.in_atomic_block
@@ -0,0 +1,108 @@
+"""
+PostgreSQL backend taking its connections from a `psycopg_pool.ConnectionPool`, one pool per process and alias.
+
+`OPTIONS["pool"]` takes the `ConnectionPool` arguments, or `True` for its defaults, as the backend of Django 5.1
+which this one follows. `CONN_MAX_AGE` stays 0, the connection closed at the end of a request goes back to the pool.
+"""
+import threading
+
+import psycopg
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base
+from psycopg import IsolationLevel
+from psycopg_pool import ConnectionPool
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    # shared by the threads of a process, `connections` holds one wrapper per thread
+    _connection_pools: dict[str, ConnectionPool] = {}
+    _connection_pools_lock = threading.Lock()
+
+    @property
+    def pool(self):
+        pool_options = self.settings_dict["OPTIONS"].get("pool")
+        if self.alias == NO_DB_ALIAS or not pool_options:
+            return None
+
+        with self._connection_pools_lock:
+            if self.alias not in self._connection_pools:
+                if self.settings_dict["CONN_MAX_AGE"] != 0:
+                    raise ImproperlyConfigured("A pooled database needs CONN_MAX_AGE = 0.")
+                connect_kwargs = self.get_connection_params()
+                # the pool hands out idle connections, Django sets its own autocommit on connect
+                connect_kwargs["autocommit"] = True
+                self._connection_pools[self.alias] = ConnectionPool(
+                    kwargs=connect_kwargs,
+                    # opened by the first connection, never in a process about to fork
+                    open=False,
+                    **({} if pool_options is True else pool_options),
+                )
+        return self._connection_pools[self.alias]
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params.pop("pool", None)
+        return conn_params
+
+    def get_new_connection(self, conn_params):
+        pool = self.pool
+        if pool is None:
+            return super().get_new_connection(conn_params)
+
+        pool.open()
+        connection = pool.getconn()
+        # a pooled connection may have been idle for a while, checked as Django checks a persistent one
+        while self.settings_dict["CONN_HEALTH_CHECKS"] and not self.is_pooled_connection_usable(connection):
+            # a broken connection given back is dropped by the pool
+            pool.putconn(connection)
+            connection = pool.getconn()
+
+        isolation_level = self.settings_dict["OPTIONS"].get("isolation_level")
+        if isolation_level is None:
+            self.isolation_level = IsolationLevel.READ_COMMITTED
+        else:
+            self.isolation_level = connection.isolation_level = IsolationLevel(isolation_level)
+        return connection
+
+    @staticmethod
+    def is_pooled_connection_usable(connection):
+        try:
+            # outside of a transaction, Django may have left the autocommit off
+            connection.autocommit = True
+            connection.execute("SELECT 1")
+        except psycopg.Error:
+            return False
+        return True
+
+    def _close(self):
+        if self.connection is None or self.pool is None:
+            return super()._close()  # type: ignore[misc] # private to the Django backend, absent from the stubs
+
+        with self.wrap_database_errors:
+            # the pool rolls back an open transaction, and drops a broken connection
+            self.connection._pool.putconn(self.connection)
+            self.connection = None
+
+    def close_pool(self):
+        pool = self._connection_pools.pop(self.alias, None)
+        if pool is not None:
+            pool.close()
+
+
+def configure_pools(process_type):
+    """
+    Size the pools of a new worker process with the `DATABASE_POOL_SIZES` of its process type.
+
+    A pool inherited from the parent process is forgotten rather than closed, closing would end the sessions
+    of the parent on the server.
+    """
+    sizes = getattr(settings, "DATABASE_POOL_SIZES", {}).get(process_type, {})
+    for alias in connections:
+        pool_options = connections.settings[alias]["OPTIONS"].get("pool")
+        if not pool_options:
+            continue
+        DatabaseWrapper._connection_pools.pop(alias, None)
+        connections.settings[alias]["OPTIONS"]["pool"] = {**({} if pool_options is True else pool_options), **sizes}
@@ -0,0 +1,104 @@
+import json
+import math
+import subprocess
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+
+class Rollback(Exception):
+    pass
+
+
+def percentile(samples, percent):
+    """Nearest-rank percentile of the samples."""
+    ordered = sorted(samples)
+    index = math.ceil(percent / 100 * len(ordered)) - 1
+    return ordered[max(0, min(index, len(ordered) - 1))]
+
+
+def summarize(samples):
+    """Latency percentiles in milliseconds of samples in milliseconds."""
+    return {
+        "iterations": len(samples),
+        "p50": percentile(samples, 50),
+        "p95": percentile(samples, 95),
+        "p99": percentile(samples, 99),
+    }
+
+
+def measure(func, iterations=100, warmup=5):
+    """Call `func` repeatedly and return its latency percentiles in milliseconds."""
+    for _ in range(warmup):
+        func()
+
+    samples = []
+    for _ in range(iterations):
+        started_at = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started_at) * 1000)
+
+    return summarize(samples)
+
+
+def rolled_back(func):
+    """Wrap `func` so every call runs inside a transaction that is rolled back, the data is left untouched."""
+
+    def wrapper(*args, **kwargs):
+        try:
+            with transaction.atomic():
+                result = func(*args, **kwargs)
+                raise Rollback
+        except Rollback:
+            return result
+
+    return wrapper
+
+
+def get_server_name():
+    """A host the settings accept, for requests built outside of a server."""
+    hosts = [host.lstrip(".") for host in settings.ALLOWED_HOSTS if host != "*"]
+    return hosts[0] if hosts else "localhost"
+
+
+def format_result(name, result):
+    return "{:<48} p50={:>9.2f}ms  p95={:>9.2f}ms  p99={:>9.2f}ms".format(
+        name, result["p50"], result["p95"], result["p99"]
+    )
+
+
+def format_comparison(name, result, baseline):
+    """`format_result` followed by the p50/p99 change against the same benchmark of a baseline report."""
+    if not baseline:
+        return format_result(name, result)
+
+    changes = [
+        "{}={:+.1f}%".format(key, (result[key] - baseline[key]) / baseline[key] * 100 if baseline[key] else 0.0)
+        for key in ["p50", "p99"]
+    ]
+    return f"{format_result(name, result)}  vs baseline {' '.join(changes)}"
+
+
+def get_revision():
+    try:
+        output = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return output.stdout.strip()
+
+
+def write_report(path, results, **meta):
+    """Save the results with the commit they were measured on, to compare a later run against."""
+    report = {
+        "meta": {"revision": get_revision(), "created_at": timezone.now().isoformat(), **meta},
+        "results": results,
+    }
+    with open(path, "w") as file:
+        json.dump(report, file, indent=2)
+
+
+def load_report(path):
+    with open(path) as file:
+        return json.load(file)
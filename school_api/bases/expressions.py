@@ -0,0 +1,14 @@
+from django.db import models
+
+
+class Row(models.Func):
+    """
+    SQL row constructor, compare it with a lookup for keyset pagination, e.g.
+    `GreaterThan(Row("deadline_date", "pk"), Row(Value(date), Value(pk)))`.
+
+    PostgreSQL turns the row comparison into a single index condition of a matching composite
+    index, unlike the equivalent `OR` of column comparisons.
+    """
+
+    function = "ROW"
+    output_field = models.Field()
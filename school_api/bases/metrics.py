@@ -0,0 +1,95 @@
+import ipaddress
+import os
+import time
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+UNRESOLVED_VIEW = "<unresolved>"
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "Latency of a request through the whole middleware stack.",
+    ["view", "method", "status"],
+)
+REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Database queries run by a request.",
+    ["view", "method"],
+    buckets=(1, 2, 3, 4, 6, 8, 10, 15, 20, 30, 50, 100),
+)
+REQUEST_DB_DURATION = Histogram(
+    "http_request_db_duration_seconds",
+    "Time a request spent waiting on the database.",
+    ["view", "method"],
+)
+
+
+def get_view_name(request):
+    """Namespaced url name of the resolved view, e.g. `api_library:list-book`, a bounded label value."""
+    resolver_match = getattr(request, "resolver_match", None)
+    return resolver_match.view_name if resolver_match else UNRESOLVED_VIEW
+
+
+class PrometheusMetricsMiddleware:
+    """
+    Record the latency, the query count and the database time of every request per view.
+
+    Keep it first in `MIDDLEWARE` so the latency covers the whole stack, the queries are read from the
+    counter `QueryBudgetMiddleware` leaves on the request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        started_at = time.perf_counter()
+        response = self.get_response(request)
+        duration = time.perf_counter() - started_at
+
+        view, method = get_view_name(request), request.method
+        REQUEST_LATENCY.labels(view, method, response.status_code).observe(duration)
+        query_counter = getattr(request, "query_counter", None)
+        if query_counter is not None:
+            REQUEST_DB_QUERIES.labels(view, method).observe(query_counter.count)
+            REQUEST_DB_DURATION.labels(view, method).observe(query_counter.duration)
+        return response
+
+
+def get_registry():
+    """Metrics of every worker process when `PROMETHEUS_MULTIPROC_DIR` is set, e.g. under gunicorn."""
+    if "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return REGISTRY
+
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def is_metrics_allowed(request):
+    """A request with the `METRICS_TOKEN` bearer token, or from an address of `METRICS_ALLOWED_NETWORKS`."""
+    authorization = request.headers.get("Authorization", "")
+    if settings.METRICS_TOKEN and constant_time_compare(authorization, f"Bearer {settings.METRICS_TOKEN}"):
+        return True
+
+    try:
+        address = ipaddress.ip_address(request.META.get("REMOTE_ADDR", ""))
+    except ValueError:
+        return False
+    return any(address in ipaddress.ip_network(network) for network in settings.METRICS_ALLOWED_NETWORKS)
+
+
+def metrics_view(request):
+    # not found rather than forbidden, the endpoint is not advertised to whoever may not scrape it
+    if not is_metrics_allowed(request):
+        raise Http404
+    return HttpResponse(generate_latest(get_registry()), content_type=CONTENT_TYPE_LATEST)
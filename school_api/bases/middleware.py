@@ -0,0 +1,53 @@
+import logging
+
+from django.conf import settings
+
+from school_api.bases.queries import QueryBudgetExceeded, QueryCounter
+
+logger = logging.getLogger(__name__)
+
+
+def get_query_budget(view_func, method):
+    """
+    `query_budget` declared by a view, either a number of queries per request or a mapping of
+    HTTP method to number, e.g. `{"GET": 6, "POST": 12}`.
+    """
+    view_class = getattr(view_func, "view_class", None)
+    budget = getattr(view_class or view_func, "query_budget", None)
+    if isinstance(budget, dict):
+        return budget.get(method)
+    return budget
+
+
+class QueryBudgetMiddleware:
+    """
+    Count the queries and the database time of every request, report a view going over its `query_budget`
+    and the SQL shapes repeated `QUERY_BUDGET_REPEAT_THRESHOLD` times or more, the usual sign of an N+1.
+
+    Problems are logged, or raised with `QUERY_BUDGET_STRICT` so the test suite fails on them.
+    In `DEBUG` the count and the time are returned in the `X-DB-Query-Count` and `Server-Timing` headers.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.query_budget = None
+        with QueryCounter() as counter:
+            response = self.get_response(request)
+        request.query_counter = counter
+
+        problems = counter.get_problems(request.query_budget, settings.QUERY_BUDGET_REPEAT_THRESHOLD)
+        if problems:
+            message = f"{request.method} {request.path}: " + " ".join(problems)
+            if settings.QUERY_BUDGET_STRICT:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+        if settings.DEBUG:
+            response["X-DB-Query-Count"] = counter.count
+            response["Server-Timing"] = f'db;desc="{counter.count} queries";dur={counter.duration * 1000:.1f}'
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.query_budget = get_query_budget(view_func, request.method)
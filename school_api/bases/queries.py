@@ -0,0 +1,65 @@
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.db import connections
+
+# transaction bookkeeping of `atomic`, not part of what a view asks from the database
+IGNORED_SQL = re.compile(r"^\s*(SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK TO SAVEPOINT|SET TRANSACTION)\b", re.IGNORECASE)
+IN_LIST = re.compile(r"\bIN \((?:%s, )*%s\)")
+VALUES_LIST = re.compile(r"\bVALUES (\([^()]*\))(?:, \([^()]*\))*")
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def get_sql_shape(sql):
+    """SQL without the number of placeholders, `IN` lists and multi-row `VALUES` of any size share a shape."""
+    return VALUES_LIST.sub(r"VALUES \1, ...", IN_LIST.sub("IN (%s, ...)", sql))
+
+
+class QueryCounter:
+    """
+    Count the queries and the database time spent on every connection while it is entered.
+
+    Queries are recorded through `connection.execute_wrapper`, so counting works with `DEBUG` off.
+    """
+
+    def __init__(self):
+        self.shapes: Counter[str] = Counter()
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started_at = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            if not IGNORED_SQL.match(sql):
+                self.count += 1
+                self.duration += time.perf_counter() - started_at
+                self.shapes[get_sql_shape(sql)] += 1
+
+    def __enter__(self):
+        self._stack = ExitStack()
+        for connection in connections.all():
+            self._stack.enter_context(connection.execute_wrapper(self))
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stack.close()
+
+    def get_repeated_shapes(self, threshold):
+        """Shapes run at least `threshold` times, most likely a query per row of an N+1."""
+        return {shape: count for shape, count in self.shapes.most_common() if count >= threshold}
+
+    def get_problems(self, budget=None, repeat_threshold=None):
+        problems = []
+        if budget is not None and self.count > budget:
+            problems.append(f"{self.count} queries, over the budget of {budget}.")
+        if repeat_threshold:
+            for shape, count in self.get_repeated_shapes(repeat_threshold).items():
+                problems.append(f"Likely N+1, {count} queries of: {shape}")
+        return problems
@@ -0,0 +1,53 @@
+import random
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS
+
+PRIMARY_STICKY_KEY = "database:primary:{}"
+
+# set by `ReplicaReadMixin` for the safe methods, a callable returning the alias of their reads
+read_database: ContextVar[Optional[Callable[[], Optional[str]]]] = ContextVar("read_database", default=None)
+
+
+def get_replica():
+    """A replica of `DATABASE_REPLICAS`, or None for the primary."""
+    return random.choice(settings.DATABASE_REPLICAS) if settings.DATABASE_REPLICAS else None
+
+
+def stick_to_primary(scopes):
+    """Keep the reads of `scopes` on the primary while the replicas catch up with a write."""
+    if settings.DATABASE_REPLICAS and scopes and settings.REPLICA_STICKY_SECONDS:
+        cache.set_many(
+            {PRIMARY_STICKY_KEY.format(scope): True for scope in scopes}, timeout=settings.REPLICA_STICKY_SECONDS
+        )
+
+
+def is_stuck_to_primary(scopes):
+    return bool(scopes) and bool(cache.get_many([PRIMARY_STICKY_KEY.format(scope) for scope in scopes]))
+
+
+class ReplicaRouter:
+    """
+    Reads of a `ReplicaReadMixin` safe method go to a replica, every other read and all writes to the primary.
+
+    The replicas hold the rows of the primary, relations across them are allowed and only the primary is migrated.
+    """
+
+    def db_for_read(self, model, **hints):
+        get_database = read_database.get()
+        return get_database() if get_database else None
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
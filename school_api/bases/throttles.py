@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
+
+
+class ThrottleCacheMixin:
+    """Count the requests in the `THROTTLE_CACHE_ALIAS` cache, a burst of requests can't evict cached pages."""
+
+    def __init__(self):
+        super().__init__()
+        self.cache = caches[settings.THROTTLE_CACHE_ALIAS]
+
+
+class CachedAnonRateThrottle(ThrottleCacheMixin, AnonRateThrottle):
+    pass
+
+
+class CachedUserRateThrottle(ThrottleCacheMixin, UserRateThrottle):
+    pass
@@ -0,0 +1,126 @@
+import hashlib
+from typing import TYPE_CHECKING
+
+from django.db import transaction
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.functional import cached_property
+from django.utils.http import quote_etag
+from rest_framework import generics
+from rest_framework.permissions import SAFE_METHODS
+
+from school_api.bases.routers import get_replica, is_stuck_to_primary, read_database, stick_to_primary
+
+if TYPE_CHECKING:
+    # the mixins only ever come before a generic view, type check them as one
+    GenericViewBase = generics.GenericAPIView
+    ListViewBase = generics.ListAPIView
+else:
+    GenericViewBase = ListViewBase = object
+
+
+class TransactionPolicyMixin(GenericViewBase):
+    """
+    Opt a view out of `ATOMIC_REQUESTS`, only the unsafe methods run in a transaction.
+
+    Safe methods run in autocommit, without the `BEGIN`/`COMMIT` round trips of a transaction around
+    every read. A view whose reads must agree with each other sets `read_only_transaction`, its safe
+    methods then share one `REPEATABLE READ READ ONLY` snapshot. An error response rolls back the writes
+    of an unsafe method, as with `ATOMIC_REQUESTS`.
+    """
+
+    read_only_transaction = False
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        return transaction.non_atomic_requests(super().as_view(**initkwargs))
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method in SAFE_METHODS and not self.read_only_transaction:
+            return super().dispatch(request, *args, **kwargs)
+
+        connection = transaction.get_connection()
+        # only the first statement of a transaction may set its isolation level
+        is_read_only = request.method in SAFE_METHODS and not connection.in_atomic_block
+        with transaction.atomic():
+            if is_read_only:
+                with connection.cursor() as cursor:
+                    cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+
+            response = super().dispatch(request, *args, **kwargs)
+            if getattr(response, "exception", False):
+                transaction.set_rollback(True)
+        return response
+
+
+class ReplicaReadMixin(GenericViewBase):
+    """
+    Send the reads of the safe methods to a replica, the unsafe methods read and write the primary.
+
+    A replica may lag behind a write, a successful unsafe method keeps the `get_primary_scopes` of its request,
+    its user by default, on the primary for `REPLICA_STICKY_SECONDS`. The replica is picked on the first read
+    after authentication, a view with `read_only_transaction` took its snapshot on the primary before that.
+    """
+
+    def get_primary_scopes(self, request):
+        # by username, the claims of a token user or a url kwarg, picking the database never queries it
+        return [f"user:{request.user.username}"] if request.user.is_authenticated else []
+
+    @cached_property
+    def read_alias(self):
+        if getattr(self, "read_only_transaction", False) or is_stuck_to_primary(self.get_primary_scopes(self.request)):
+            return None
+        return get_replica()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if request.method in SAFE_METHODS:
+            read_database.set(lambda: self.read_alias)
+
+    def dispatch(self, request, *args, **kwargs):
+        token = read_database.set(None)
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            read_database.reset(token)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            stick_to_primary(self.get_primary_scopes(request))
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class ConditionalListMixin(ListViewBase):
+    """
+    Answer `If-None-Match` of a list endpoint before any row is fetched or serialized.
+
+    The ETag comes from one aggregate over the filtered queryset, the row count and the latest
+    value of every `conditional_timestamp_fields`, e.g. the `updated_at` of a nested relation.
+    No `Last-Modified`, that latest value moves backwards when the newest row leaves the filter,
+    e.g. a returned loan, while the count in the ETag still changes.
+    """
+
+    conditional_timestamp_fields = ["updated_at"]
+
+    def get_conditional_etag(self, request):
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        aggregates = queryset.aggregate(
+            count=Count("pk"),
+            **{f"last_modified_{i}": Max(field) for i, field in enumerate(self.conditional_timestamp_fields)},
+        )
+        count = aggregates.pop("count")
+        timestamps = [value for value in aggregates.values() if value is not None]
+        last_modified = max(timestamps) if timestamps else None
+
+        validator = f"{request.user.pk}:{request.get_full_path()}:{count}:{last_modified}"
+        return quote_etag(hashlib.md5(validator.encode()).hexdigest())
+
+    def get(self, request, *args, **kwargs):
+        etag = self.get_conditional_etag(request)
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+
+        response["ETag"] = etag
+        return response
@@ -1,5 +1,10 @@
+from contextlib import contextmanager
+
 import pytest
+from django.conf import settings
+from django.core.cache import caches
 
+from school_api.bases.queries import QueryCounter
 from school_api.users.models import User
 from school_api.users.tests.factories import UserFactory
 
@@ -9,6 +14,31 @@ def media_storage(settings, tmpdir):
     settings.MEDIA_ROOT = tmpdir.strpath
 
 
+@pytest.fixture(autouse=True)
+def clear_cache():
+    for cache in caches.all():
+        cache.clear()
+
+
 @pytest.fixture
 def user(db) -> User:
     return UserFactory()
+
+
+@pytest.fixture
+def query_budget():
+    """
+    Fail the test when the wrapped block runs more than `budget` queries or repeats a query, e.g.
+    `with query_budget(3) as counter:`, `counter.duration` then holds the database time.
+    """
+
+    @contextmanager
+    def check(budget=None, repeat_threshold=None):
+        with QueryCounter() as counter:
+            yield counter
+
+        problems = counter.get_problems(budget, repeat_threshold or settings.QUERY_BUDGET_REPEAT_THRESHOLD)
+        if problems:
+            pytest.fail(" ".join(problems))
+
+    return check
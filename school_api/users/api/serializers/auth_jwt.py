@@ -0,0 +1,37 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from school_api.users import settings as app_settings
+from school_api.users.models import User
+
+
+def set_user_claims(token, user):
+    for claim in app_settings.TOKEN_USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+class UserClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """Token pair holding the claims `StatelessJWTAuthentication` authenticates with."""
+
+    @classmethod
+    def get_token(cls, user):
+        return set_user_claims(super().get_token(user), user)
+
+
+class UserClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    """Access token with the current claims of the user, a refresh picks up a new role or a deactivation."""
+
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        refresh = self.token_class(data.get("refresh", attrs["refresh"]))
+        user = User.objects.filter(pk=refresh[api_settings.USER_ID_CLAIM]).first()
+        if user is None or not user.is_active:
+            raise AuthenticationFailed(
+                _("No active account found with the given credentials"), code="no_active_account"
+            )
+
+        data["access"] = str(set_user_claims(refresh.access_token, user))
+        return data
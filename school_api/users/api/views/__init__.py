@@ -1,13 +1,15 @@
 from rest_framework import generics
 
+from school_api.bases.views import ReplicaReadMixin, TransactionPolicyMixin
 from school_api.users.api.serializers import CustomUserSerializer
 from school_api.users.models import User
 from school_api.users.paginations import UserPagination
 from school_api.users.permissions import IsLibrarian, IsSuperadmin
 
 
-class ListStudent(generics.ListAPIView):
+class ListStudent(TransactionPolicyMixin, ReplicaReadMixin, generics.ListAPIView):
     permission_classes = [IsSuperadmin | IsLibrarian]
+    query_budget = 4
     serializer_class = CustomUserSerializer
     pagination_class = UserPagination
     queryset = User.objects.filter(role="student", is_active=True)
@@ -7,6 +7,8 @@ class UsersConfig(AppConfig):
     verbose_name = _("Users")
 
     def ready(self):
+        import school_api.users.schema  # noqa: F401
+
         try:
             import school_api.users.signals  # noqa: F401
         except ImportError:
@@ -0,0 +1,97 @@
+from django.utils.functional import SimpleLazyObject
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import (
+    BaseAuthentication,
+    SessionAuthentication,
+    TokenAuthentication,
+    get_authorization_header,
+)
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+
+from school_api.users import settings as app_settings
+from school_api.users.models import User
+
+
+def load_user(user_id):
+    try:
+        return User.objects.get(pk=user_id)
+    except User.DoesNotExist:
+        raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+
+class LazyTokenUser(SimpleLazyObject):
+    """
+    The `User` of a token, its pk and `TOKEN_USER_CLAIMS` are read from the token and the row is only
+    loaded the first time anything else is needed, e.g. `request.user.get_full_name()`.
+    """
+
+    def __init__(self, validated_token):
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        super().__init__(lambda: load_user(user_id))
+        # found before `LazyObject.__getattr__`, reading them never loads the user
+        self.__dict__.update(
+            {claim: validated_token[claim] for claim in app_settings.TOKEN_USER_CLAIMS},
+            pk=user_id,
+            id=user_id,
+            is_authenticated=True,
+            is_anonymous=False,
+        )
+
+    def __bool__(self):
+        return True
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication trusting the user claims of the token, a request no longer queries its user.
+
+    A deactivated user or a new role takes effect at the next token refresh, at most one
+    `ACCESS_TOKEN_LIFETIME` later. Tokens issued without the claims still load the user.
+    """
+
+    def get_user(self, validated_token):
+        claims = [api_settings.USER_ID_CLAIM, *app_settings.TOKEN_USER_CLAIMS]
+        if any(claim not in validated_token for claim in claims):
+            return super().get_user(validated_token)
+
+        if not validated_token["is_active"]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return LazyTokenUser(validated_token)
+
+
+class AuthorizationSchemeAuthentication(BaseAuthentication):
+    """
+    Run the one authentication matching the scheme of the `Authorization` header, instead of trying
+    each in turn: `Bearer` for a JWT, `Token` for an auth token, and the session without the header.
+
+    A JWT request never touches the session store, even when the browser also sends a session cookie.
+    """
+
+    default_authentication_class = SessionAuthentication
+
+    def get_scheme_authentication_classes(self):
+        scheme_authentication_classes: dict[str, type[BaseAuthentication]] = {
+            scheme.lower(): StatelessJWTAuthentication for scheme in api_settings.AUTH_HEADER_TYPES
+        }
+        scheme_authentication_classes[TokenAuthentication.keyword.lower()] = TokenAuthentication
+        return scheme_authentication_classes
+
+    def get_authenticator(self, request):
+        header = get_authorization_header(request).split()
+        if not header:
+            return self.default_authentication_class()
+
+        authentication_class = self.get_scheme_authentication_classes().get(header[0].decode("latin-1").lower())
+        return authentication_class() if authentication_class else None
+
+    def authenticate(self, request):
+        authenticator = self.get_authenticator(request)
+        if authenticator is None:
+            return None
+        return authenticator.authenticate(request)
+
+    def authenticate_header(self, request):
+        # as when `SessionAuthentication` led the list, an unauthenticated request keeps answering 403
+        return None
@@ -0,0 +1,21 @@
+from school_api.users import settings as app_settings
+
+
+class APISessionGateMiddleware:
+    """
+    Keep allauth's `AccountMiddleware` from loading the session of every API request.
+
+    After each request allauth clears a pending login of its pages from the session, unless the login
+    was read during the request. API requests never start one, a JWT or token request would load the
+    session for nothing, so they are flagged as read. Goes right after `AccountMiddleware`, allauth requires
+    its own middleware in `MIDDLEWARE` so it can't be skipped. The flag is allauth's private
+    `_account_login_accessed` (0.56), `tests/test_middleware.py` fails once allauth stops honouring it.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if request.path.startswith(app_settings.API_PATH_PREFIX):
+            request._account_login_accessed = True
+        return self.get_response(request)
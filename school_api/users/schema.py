@@ -0,0 +1,36 @@
+from typing import cast
+
+from drf_spectacular.authentication import SessionScheme, TokenScheme
+from drf_spectacular.contrib.rest_framework_simplejwt import SimpleJWTScheme
+from drf_spectacular.extensions import OpenApiAuthenticationExtension
+from rest_framework.authentication import SessionAuthentication, TokenAuthentication
+
+from school_api.users.authentication import StatelessJWTAuthentication
+
+
+class StatelessJWTScheme(SimpleJWTScheme):
+    """Document `StatelessJWTAuthentication` as the `jwtAuth` bearer scheme, as for simplejwt."""
+
+    target_class = "school_api.users.authentication.StatelessJWTAuthentication"
+
+
+class AuthorizationSchemeAuthenticationScheme(OpenApiAuthenticationExtension):
+    """Document `AuthorizationSchemeAuthentication` as any one of the schemes it dispatches to."""
+
+    target_class = "school_api.users.authentication.AuthorizationSchemeAuthentication"
+    schemes = [
+        (StatelessJWTScheme, StatelessJWTAuthentication),
+        (TokenScheme, TokenAuthentication),
+        (SessionScheme, SessionAuthentication),
+    ]
+    name = [cast(str, scheme.name) for scheme, _ in schemes]
+
+    def get_security_requirement(self, auto_schema):
+        # a list of requirements is an OR, a single dict would require all of them
+        return [{name: []} for name in self.name]
+
+    def get_security_definition(self, auto_schema):
+        return [
+            scheme(authentication_class).get_security_definition(auto_schema)
+            for scheme, authentication_class in self.schemes
+        ]
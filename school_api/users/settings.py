@@ -1 +1,6 @@
 MSG_INVALID_ROLE = "Invalid Role input value. only available 'librarian' & 'student'."
+
+# claims of a JWT answering for the user without loading it, see `authentication.StatelessJWTAuthentication`
+TOKEN_USER_CLAIMS = ["username", "role", "is_active"]
+# requests served by the REST API, see `middleware.APISessionGateMiddleware`
+API_PATH_PREFIX = "/api/"
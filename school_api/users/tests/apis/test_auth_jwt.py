@@ -0,0 +1,156 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from school_api.app_libraries.tests.factories import StudentBorrowFactory
+from school_api.users.api.serializers.auth_jwt import UserClaimsTokenObtainPairSerializer
+from school_api.users.tests.factories import UserFactory
+
+
+def count_user_queries(queries):
+    return sum('"users_user"' in query["sql"] for query in queries)
+
+
+class JWTCreateTest(APITestCase):
+    def setUp(self):
+        self.user = UserFactory(username="eko_aziz", role="librarian", password="r-a_n-d_o-m--->123")
+        self.complete_url = reverse("authentications:jwt-create")
+
+    def test_success_with_user_claims(self):
+        response = self.client.post(self.complete_url, data={"username": "eko_aziz", "password": "r-a_n-d_o-m--->123"})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        access = RefreshToken(response.data["refresh"]).access_token
+        self.assertEqual(access["username"], "eko_aziz")
+        self.assertEqual(access["role"], "librarian")
+        self.assertEqual(access["is_active"], True)
+
+
+class JWTRefreshTest(APITestCase):
+    def setUp(self):
+        self.user = UserFactory(role="student")
+        self.complete_url = reverse("authentications:jwt-refresh")
+
+    def test_success_with_current_role(self):
+        refresh = RefreshToken.for_user(self.user)
+        self.user.role = "librarian"
+        self.user.save()
+
+        response = self.client.post(self.complete_url, data={"refresh": str(refresh)})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        access_url = reverse("api_user:list-student")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        self.assertEqual(self.client.get(access_url).status_code, status.HTTP_200_OK)
+
+    def test_fail_because_user_inactive(self):
+        refresh = RefreshToken.for_user(self.user)
+        self.user.is_active = False
+        self.user.save()
+
+        response = self.client.post(self.complete_url, data={"refresh": str(refresh)})
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class StatelessJWTAuthenticationTest(APITestCase):
+    def setUp(self):
+        self.user_librarian = UserFactory(role="librarian")
+        self.user_student = UserFactory(role="student")
+
+    def authenticate(self, user, **claims):
+        access = UserClaimsTokenObtainPairSerializer.get_token(user).access_token
+        access.payload.update(claims)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+    def test_success_without_user_query(self):
+        self.authenticate(self.user_librarian)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse("api_user:list-student"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # only the listed students, the librarian is never loaded
+        self.assertEqual(count_user_queries(context.captured_queries), 2)
+
+    def test_success_borrow_me_without_user_query(self):
+        StudentBorrowFactory(user_student=self.user_student)
+        self.authenticate(self.user_student)
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(reverse("api_library:list-borrow-me"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], 1)
+        self.assertEqual(count_user_queries(context.captured_queries), 0)
+
+    def test_fail_because_logged_as_student(self):
+        self.authenticate(self.user_student)
+        response = self.client.get(reverse("api_user:list-student"))
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_fail_because_user_inactive(self):
+        self.authenticate(self.user_librarian, is_active=False)
+        response = self.client.get(reverse("api_user:list-student"))
+
+        # no `WWW-Authenticate` from the first authentication class, DRF answers 403
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.data["code"], "user_inactive")
+
+    def test_success_with_token_without_claims(self):
+        access = RefreshToken.for_user(self.user_librarian).access_token
+        for claim in ["username", "role", "is_active"]:
+            access.payload.pop(claim, None)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+        response = self.client.get(reverse("api_user:list-student"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_success_user_loaded_when_needed(self):
+        self.authenticate(self.user_student)
+        response = self.client.get(reverse("user-me"))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["name"], self.user_student.name)
+
+
+class AuthorizationSchemeAuthenticationTest(APITestCase):
+    def setUp(self):
+        self.user_librarian = UserFactory(role="librarian")
+        self.user_student = UserFactory(role="student")
+        self.complete_url = reverse("api_user:list-student")
+
+    def test_success_bearer_without_session_lookup(self):
+        # a browser session of another user is ignored once a JWT is sent
+        self.client.force_login(self.user_student)
+        access = UserClaimsTokenObtainPairSerializer.get_token(self.user_librarian).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.complete_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(any('"django_session"' in query["sql"] for query in context.captured_queries))
+
+    def test_success_with_auth_token(self):
+        token = Token.objects.create(user=self.user_librarian)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {token.key}")
+
+        response = self.client.get(self.complete_url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_fail_because_unknown_scheme(self):
+        self.client.force_login(self.user_librarian)
+        self.client.credentials(HTTP_AUTHORIZATION="Basic ZWtvOmF6aXo=")
+
+        response = self.client.get(self.complete_url)
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(str(response.data["detail"]), "Authentication credentials were not provided.")
@@ -0,0 +1,45 @@
+import pytest
+from allauth.account.middleware import AccountMiddleware
+from django.contrib.sessions.backends.signed_cookies import SessionStore
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+
+from school_api.users.api.serializers.auth_jwt import UserClaimsTokenObtainPairSerializer
+from school_api.users.middleware import APISessionGateMiddleware
+from school_api.users.tests.factories import UserFactory
+
+
+def request_with_pending_login(path):
+    # the gate only sets allauth's private `_account_login_accessed`, fails once allauth stops honouring it
+    request = RequestFactory().get(path)
+    request.session = SessionStore()
+    request.session["account_login"] = {"state": "pending"}
+    request.session.accessed = False
+    AccountMiddleware(APISessionGateMiddleware(lambda request: HttpResponse()))(request)
+    return request
+
+
+def test_api_request_does_not_load_session():
+    request = request_with_pending_login("/api/v1/books/")
+
+    assert not request.session.accessed
+    assert "account_login" in request.session
+
+
+def test_site_request_removes_dangling_login():
+    request = request_with_pending_login("/users/~redirect/")
+
+    assert "account_login" not in request.session
+
+
+@pytest.mark.django_db
+def test_bearer_request_with_session_cookie(client):
+    user = UserFactory(role="librarian")
+    client.force_login(user)
+    access = UserClaimsTokenObtainPairSerializer.get_token(user).access_token
+
+    response = client.get(reverse("api_user:list-student"), HTTP_AUTHORIZATION=f"Bearer {access}")
+
+    assert response.status_code == 200
+    assert not response.wsgi_request.session.accessed